@@ -1,19 +1,82 @@
+import csv
+import io
+import json
+import math
 import os
+import time
 from functools import wraps
-from datetime import datetime
+from datetime import date, datetime
 
-from flask import Flask, render_template, request, redirect, url_for, session
+from flask import Flask, Response, g, jsonify, render_template, request, redirect, url_for, session, stream_with_context
 
 from models.preguntas import contar_preguntas, obtener_todas_preguntas
 from models.carreras import CARRERAS_OBJETIVO
-from models.recomendador import calcular_estadisticas, recomendar_carreras, construir_vector_usuario
-from utils.storage import agregar_al_historial, agregar_muestra_entrenamiento, cargar_historial, guardar_historial, guardar_estadisticas
+from models.recomendador import cache_stats, recomendar_carreras, recomendar_carreras_batch, construir_vector_usuario
+from models.modelo_ml import registry_stats
+from utils.storage import (
+    agregar_muestra_entrenamiento,
+    cargar_estadisticas_agregadas,
+    cargar_historial_keyset,
+    contar_historial,
+    iterar_historial,
+    guardar_historial,
+    registrar_test,
+)
 from models.buffer import add_to_buffer
-from models.modelo_ml import retrain_from_buffer
+from models.reentrenamiento import ServicioReentrenamiento
+from utils.escritura_diferida import ColaEscritura
+from utils.metricas import METRICAS, finalizar_traza, iniciar_traza, medir
 
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "vocational-ai-secret-key-2024")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
+HISTORIAL_POR_PAGINA = int(os.getenv("HISTORIAL_POR_PAGINA", os.getenv("HISTORIAL_RECIENTES", "50")))
+API_LOTE = int(os.getenv("API_LOTE", "256"))
+# Traza por request: siempre con CAREERMATE_TRACE=1, o por request con el header X-CareerMate-Trace: 1
+TRAZA_REQUESTS = os.getenv("CAREERMATE_TRACE", "0") == "1"
+# /metrics expone el estado interno sin autenticación: solo con METRICAS_ENDPOINT=1
+METRICAS_ENDPOINT = os.getenv("METRICAS_ENDPOINT", "0") == "1"
+
+# Reentrenamiento con el buffer de híbridos. Se ejecuta como proceso aparte
+# (python -m models.reentrenamiento); REENTRENAMIENTO_AUTOMATICO=1 lo inicia
+# como hilo dentro del proceso web (solo para un único proceso de desarrollo)
+servicio_reentrenamiento = ServicioReentrenamiento(
+    umbral_muestras=int(os.getenv("REENTRENAMIENTO_UMBRAL", "50")),
+    intervalo_max=float(os.getenv("REENTRENAMIENTO_INTERVALO", "3600")),
+    modo=os.getenv("REENTRENAMIENTO_MODO", "completo"),
+)
+if os.getenv("REENTRENAMIENTO_AUTOMATICO", "0") == "1":
+    servicio_reentrenamiento.iniciar()
+
+# Historial y buffer se escriben después de responder (ESCRITURA_DIFERIDA=0 lo desactiva)
+cola_escritura = ColaEscritura(
+    capacidad=int(os.getenv("ESCRITURA_DIFERIDA_CAPACIDAD", "10000")),
+    activa=os.getenv("ESCRITURA_DIFERIDA", "1") == "1",
+)
+
+
+@app.before_request
+def _iniciar_medicion():
+    g.inicio_request = time.perf_counter()
+    if TRAZA_REQUESTS or request.headers.get('X-CareerMate-Trace') == '1':
+        g.traza = iniciar_traza()
+
+
+@app.after_request
+def _cerrar_medicion(response):
+    inicio = g.pop('inicio_request', None)
+    if inicio is not None and request.endpoint:
+        METRICAS.observar(f"request_{request.endpoint}", time.perf_counter() - inicio)
+
+    token = g.pop('traza', None)
+    if token is not None:
+        etapas = finalizar_traza(token)
+        detalle = ", ".join(f"{etapa}={segundos * 1000:.3f}ms" for etapa, segundos in etapas)
+        app.logger.info("Traza %s %s: %s", request.method, request.path, detalle or "sin etapas")
+        response.headers['Server-Timing'] = ", ".join(
+            f"{etapa};dur={segundos * 1000:.3f}" for etapa, segundos in etapas
+        )
+    return response
 
 
 def login_requerido(func):
@@ -48,16 +111,31 @@ def procesar_test():
             return redirect(url_for('test'))
 
         recomendaciones = recomendar_carreras(respuestas)
-        vector_usuario = construir_vector_usuario(respuestas)
+        registrar_resultado(respuestas, recomendaciones)
 
+        return render_template(
+            'resultados.html',
+            recomendaciones=recomendaciones,
+            fecha=datetime.now()
+        )
+
+    except Exception as exc:
+        app.logger.error("Error procesando test: %s", exc)
+        return redirect(url_for('test'))
+
+
+def registrar_resultado(respuestas, recomendaciones):
+    """
+    Guarda el test en el historial y, si es híbrido, en el buffer de
+    reentrenamiento. Las escrituras pasan por ``cola_escritura``.
+    """
+    with medir("persistencia"):
+        features = construir_vector_usuario(respuestas).reshape(-1).tolist()
 
         # Guardar historial
-        historial = cargar_historial()
         carreras = [r['carrera'] for r in recomendaciones]
         compat = [r['compatibilidad'] for r in recomendaciones]
-        historial = agregar_al_historial(
-            historial, carreras, compat, features=vector_usuario.reshape(-1).tolist()
-        )
+        cola_escritura.enviar(registrar_test, carreras, compat, features=features)
 
         # ===== BUFFER PARA HÍBRIDOS =====
         if len(recomendaciones) >= 2:
@@ -65,20 +143,157 @@ def procesar_test():
             p2 = recomendaciones[1]['compatibilidad']
 
             if abs(p1 - p2) < 0.25:
-                add_to_buffer(
-                    vector_usuario.reshape(-1).tolist(),
+                cola_escritura.enviar(
+                    add_to_buffer,
+                    features,
                     [recomendaciones[0]['carrera'], recomendaciones[1]['carrera']]
                 )
 
-        return render_template(
-            'resultados.html',
-            recomendaciones=recomendaciones,
-            fecha=datetime.now()
-        )
 
-    except Exception as exc:
-        app.logger.error("Error procesando test: %s", exc)
-        return redirect(url_for('test'))
+# =========================
+# API JSON
+# =========================
+
+def parsear_respuestas(datos):
+    """
+    Acepta ``{"respuestas": [[pregunta, opcion], ...]}`` o
+    ``{"respuestas": {"pregunta": opcion}}`` (también la lista sola).
+    Lanza ValueError si el formato no es válido.
+    """
+    if isinstance(datos, dict):
+        datos = datos.get('respuestas')
+    if isinstance(datos, dict):
+        datos = list(datos.items())
+    if not isinstance(datos, list) or not datos:
+        raise ValueError("Se esperaba una lista no vacía de respuestas")
+
+    total = contar_preguntas()
+    respuestas = []
+    for par in datos:
+        if not isinstance(par, (list, tuple)) or len(par) != 2:
+            raise ValueError(f"Respuesta inválida: {par!r}")
+        try:
+            pregunta, opcion = int(par[0]), int(par[1])
+        except (TypeError, ValueError):
+            raise ValueError(f"Respuesta inválida: {par!r}") from None
+        if not 0 <= pregunta < total:
+            raise ValueError(f"Pregunta fuera de rango: {pregunta}")
+        respuestas.append((pregunta, opcion))
+    return respuestas
+
+
+def _parametro_top(valor, defecto=3):
+    try:
+        top = int(valor if valor is not None else defecto)
+    except (TypeError, ValueError):
+        raise ValueError("top debe ser un entero") from None
+    if not 1 <= top <= len(CARRERAS_OBJETIVO):
+        raise ValueError(f"top debe estar entre 1 y {len(CARRERAS_OBJETIVO)}")
+    return top
+
+
+def parsear_pedido_recomendacion(datos, top_query=None):
+    """
+    Respuestas y ``top`` de un pedido a ``/api/v1/recommend`` (Flask y ASGI).
+    ``datos`` es el cuerpo JSON ya decodificado (None si no lo era); ``top``
+    se toma del cuerpo y, si no viene ahí, del parámetro ``?top=``.
+    Lanza ValueError si el pedido no es válido.
+    """
+    if datos is None:
+        raise ValueError("El cuerpo debe ser JSON")
+    respuestas = parsear_respuestas(datos)
+    top = datos.get('top') if isinstance(datos, dict) else None
+    return respuestas, _parametro_top(top if top is not None else top_query)
+
+
+@app.route('/api/v1/recommend', methods=['POST'])
+def api_recomendar():
+    try:
+        respuestas, top = parsear_pedido_recomendacion(request.get_json(silent=True), request.args.get('top'))
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+
+    recomendaciones = recomendar_carreras(respuestas, top=top)
+    registrar_resultado(respuestas, recomendaciones)
+    return jsonify(recomendaciones=recomendaciones)
+
+
+@app.route('/api/v1/recommend/bulk', methods=['POST'])
+def api_recomendar_bulk():
+    """
+    Entrada NDJSON: un conjunto de respuestas por línea (opcionalmente con
+    ``"id"``). Salida NDJSON en el mismo orden, emitida de a ``API_LOTE``
+    líneas por el camino por lotes, sin cargar todo el cuerpo en memoria.
+    No guarda historial.
+    """
+    try:
+        top = _parametro_top(request.args.get('top'))
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+
+    def _linea(obj):
+        return json.dumps(obj, ensure_ascii=False) + "\n"
+
+    def _procesar(pendientes):
+        validos = [(i, r) for i, (_, r, _) in enumerate(pendientes) if r is not None]
+        resultados = recomendar_carreras_batch([r for _, r in validos], top=top) if validos else []
+        por_indice = {i: res for (i, _), res in zip(validos, resultados)}
+        for i, (ident, _, error) in enumerate(pendientes):
+            salida = {"linea": ident[0]}
+            if ident[1] is not None:
+                salida["id"] = ident[1]
+            if error is None:
+                salida["recomendaciones"] = por_indice[i]
+            else:
+                salida["error"] = error
+            yield _linea(salida)
+
+    def _generar():
+        pendientes = []
+        for numero, crudo in enumerate(request.stream, start=1):
+            if not crudo.strip():
+                continue
+            ident, respuestas, error = None, None, None
+            try:
+                datos = json.loads(crudo)
+                ident = datos.get('id') if isinstance(datos, dict) else None
+                respuestas = parsear_respuestas(datos)
+            except ValueError as exc:
+                error = str(exc)
+            pendientes.append(((numero, ident), respuestas, error))
+            if len(pendientes) >= API_LOTE:
+                yield from _procesar(pendientes)
+                pendientes = []
+        if pendientes:
+            yield from _procesar(pendientes)
+
+    return Response(stream_with_context(_generar()), mimetype='application/x-ndjson')
+
+
+@app.route('/metrics')
+def metricas():
+    """Histogramas por etapa y contadores de cache, modelo y escritura en formato Prometheus."""
+    if not METRICAS_ENDPOINT:
+        return not_found(None)
+
+    cache = cache_stats()
+    registro = registry_stats()
+    cola = cola_escritura.stats()
+    contadores = {
+        "cache_aciertos_total": cache["aciertos"],
+        "cache_fallos_total": cache["fallos"],
+        "cache_desalojos_total": cache["desalojos"],
+        "cache_invalidaciones_total": cache["invalidaciones"],
+        "modelo_cargas_total": registro["load_count"],
+        "modelo_carga_segundos_total": registro["load_seconds_total"],
+        "escritura_errores_total": cola["errores"],
+    }
+    medidores = {
+        "cache_entradas": cache["tamano"],
+        "escritura_pendientes": cola["pendientes"],
+        "reentrenamiento_pendientes": servicio_reentrenamiento.stats()["pendientes"],
+    }
+    return Response(METRICAS.exportar_prometheus(medidores, contadores), mimetype='text/plain; version=0.0.4')
 
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -105,10 +320,93 @@ def logout():
 @app.route('/estadisticas')
 @login_requerido
 def estadisticas():
-    historial = cargar_historial()
-    estadisticas_data = calcular_estadisticas(historial)
-    guardar_estadisticas(estadisticas_data)
-    return render_template('estadisticas.html', estadisticas=estadisticas_data, historial=historial, carreras=CARRERAS_OBJETIVO)
+    estadisticas_data = cargar_estadisticas_agregadas()
+    filtros = filtros_historial()
+
+    # Una página del historial filtrada en la base, recientes primero. Se navega
+    # por id (?antes=/?despues=) sin OFFSET; ?pagina= solo numera la página.
+    total = contar_historial(**filtros)
+    paginas = max(1, math.ceil(total / HISTORIAL_POR_PAGINA))
+    antes = request.args.get('antes', type=int)
+    despues = request.args.get('despues', type=int) if antes is None else None
+    # Una fila de más indica si hay otra página en la dirección pedida
+    historial = cargar_historial_keyset(HISTORIAL_POR_PAGINA + 1, antes, despues, **filtros)
+    if despues is not None:
+        hay_anterior = len(historial) > HISTORIAL_POR_PAGINA
+        historial = historial[-HISTORIAL_POR_PAGINA:]
+        hay_siguiente = True
+    else:
+        hay_anterior = antes is not None
+        hay_siguiente = len(historial) > HISTORIAL_POR_PAGINA
+        historial = historial[:HISTORIAL_POR_PAGINA]
+    pagina = min(max(1, request.args.get('pagina', 1, type=int)), paginas) if hay_anterior else 1
+    paginacion = {
+        'pagina': pagina,
+        'paginas': paginas,
+        'total': total,
+        'anterior': historial[0]['id'] if hay_anterior and historial else None,
+        'siguiente': historial[-1]['id'] if hay_siguiente and historial else None,
+    }
+
+    return render_template(
+        'estadisticas.html',
+        estadisticas=estadisticas_data,
+        historial=historial,
+        carreras=CARRERAS_OBJETIVO,
+        filtros=filtros,
+        paginacion=paginacion,
+    )
+
+
+def filtros_historial():
+    """Filtros del historial desde la query string; ignora fechas inválidas y carreras desconocidas."""
+    filtros = {}
+    for clave in ('desde', 'hasta'):
+        valor = (request.args.get(clave) or '').strip()
+        try:
+            filtros[clave] = date.fromisoformat(valor).isoformat() if valor else None
+        except ValueError:
+            filtros[clave] = None
+    carrera = request.args.get('carrera') or None
+    filtros['carrera'] = carrera if carrera in CARRERAS_OBJETIVO else None
+    return filtros
+
+
+@app.route('/estadisticas/exportar')
+@login_requerido
+def exportar_historial():
+    """Exporta el historial (con los filtros de la vista) como CSV o NDJSON, en streaming."""
+    formato = request.args.get('formato', 'csv')
+    if formato not in ('csv', 'ndjson'):
+        return jsonify(error="formato debe ser csv o ndjson"), 400
+    filtros = filtros_historial()
+
+    def _ndjson():
+        for test in iterar_historial(**filtros):
+            yield json.dumps(test, ensure_ascii=False) + "\n"
+
+    def _csv():
+        buffer_csv = io.StringIO()
+        escritor = csv.writer(buffer_csv)
+        escritor.writerow(['id', 'fecha', 'carrera_1', 'compatibilidad_1', 'carrera_2', 'compatibilidad_2', 'carrera_3', 'compatibilidad_3'])
+        for test in iterar_historial(**filtros):
+            fila = [test['id'], test['fecha']]
+            for i in range(3):
+                carreras, compat = test['carreras'], test['compatibilidades']
+                fila += [carreras[i] if i < len(carreras) else '', compat[i] if i < len(compat) else '']
+            escritor.writerow(fila)
+            if buffer_csv.tell() > 64 * 1024:
+                yield buffer_csv.getvalue()
+                buffer_csv.seek(0)
+                buffer_csv.truncate()
+        yield buffer_csv.getvalue()
+
+    mimetype = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(_csv() if formato == 'csv' else _ndjson()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=historial.{formato}'},
+    )
 
 @app.route('/limpiar-historial', methods=['POST'])
 @login_requerido
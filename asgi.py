@@ -0,0 +1,107 @@
+"""
+Modo de servicio ASGI.
+
+``/api/v1/recommend`` se atiende de forma asíncrona: el cálculo corre en un
+pool acotado de hilos (``RECOMENDACION_HILOS``) y como máximo
+``RECOMENDACION_EN_VUELO`` pedidos esperan turno a la vez; historial y buffer
+quedan en la cola de escritura diferida de ``app``. El resto de las rutas se
+sirve con la app Flask envuelta en ``asgiref.wsgi.WsgiToAsgi`` (dependencia
+opcional, ``pip install asgiref``).
+
+    uvicorn asgi:application --workers 1
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from app import app, cola_escritura, parsear_pedido_recomendacion, registrar_resultado
+from models.recomendador import recomendar_carreras
+
+RECOMENDACION_HILOS = int(os.getenv("RECOMENDACION_HILOS", str(os.cpu_count() or 2)))
+RECOMENDACION_EN_VUELO = int(os.getenv("RECOMENDACION_EN_VUELO", "256"))
+
+ejecutor = ThreadPoolExecutor(max_workers=RECOMENDACION_HILOS, thread_name_prefix="recomendacion")
+
+_wsgi = None
+_en_vuelo: asyncio.Semaphore | None = None
+
+
+def _app_wsgi():
+    global _wsgi
+    if _wsgi is None:
+        try:
+            from asgiref.wsgi import WsgiToAsgi
+        except ImportError as e:
+            raise RuntimeError("El modo ASGI requiere asgiref para las rutas HTML (pip install asgiref)") from e
+        _wsgi = WsgiToAsgi(app)
+    return _wsgi
+
+
+def _puntuar(respuestas, top):
+    recomendaciones = recomendar_carreras(respuestas, top=top)
+    registrar_resultado(respuestas, recomendaciones)
+    return recomendaciones
+
+
+async def _leer_cuerpo(receive) -> bytes:
+    partes = []
+    while True:
+        mensaje = await receive()
+        partes.append(mensaje.get("body", b""))
+        if not mensaje.get("more_body"):
+            return b"".join(partes)
+
+
+async def _responder(send, estado: int, cuerpo: dict) -> None:
+    datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": estado,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(datos)).encode())],
+    })
+    await send({"type": "http.response.body", "body": datos})
+
+
+async def recomendar(scope, receive, send) -> None:
+    global _en_vuelo
+    try:
+        datos = json.loads(await _leer_cuerpo(receive))
+    except ValueError:
+        datos = None
+    top_query = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("top", [None])[0]
+    try:
+        respuestas, top = parsear_pedido_recomendacion(datos, top_query)
+    except ValueError as exc:
+        await _responder(send, 400, {"error": str(exc)})
+        return
+
+    if _en_vuelo is None:
+        _en_vuelo = asyncio.Semaphore(RECOMENDACION_EN_VUELO)
+    async with _en_vuelo:
+        recomendaciones = await asyncio.get_running_loop().run_in_executor(ejecutor, _puntuar, respuestas, top)
+    await _responder(send, 200, {"recomendaciones": recomendaciones})
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        mensaje = await receive()
+        if mensaje["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif mensaje["type"] == "lifespan.shutdown":
+            await asyncio.get_running_loop().run_in_executor(None, cola_escritura.vaciar)
+            ejecutor.shutdown(wait=True)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/api/v1/recommend" and scope["method"] == "POST":
+        await recomendar(scope, receive, send)
+    else:
+        await _app_wsgi()(scope, receive, send)
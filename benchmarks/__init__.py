@@ -0,0 +1 @@
+"""Suite de benchmarks del pipeline de recomendación (``python -m benchmarks``)."""
@@ -0,0 +1,325 @@
+"""
+Generador de carga para la app Flask.
+
+Sintetiza cuestionarios a partir de ``obtener_todas_preguntas()`` con varias
+distribuciones y los envía a ``/procesar-test`` (formulario) o a
+``/api/v1/recommend`` (JSON), con el test client de Flask en el mismo proceso
+o contra un servidor HTTP. Reporta throughput, percentiles de latencia y
+tasa de errores; con ``--curva-historial`` repite la medición con el
+historial precargado a distintos tamaños (solo con el test client).
+
+Distribuciones:
+
+- ``uniforme``: cada opción con la misma probabilidad
+- ``sesgada``: una distribución categórica fija y concentrada por pregunta
+  (muchos estudiantes repiten respuestas parecidas)
+- ``neutral``: siempre la opción del medio
+- ``arquetipos``: un eje profesional al azar; sus preguntas técnicas al
+  máximo y el resto bajo
+
+Uso:
+    python -m benchmarks.carga --total 2000 --concurrencia 16 --distribucion sesgada
+    python -m benchmarks.carga --objetivo http://127.0.0.1:5000 --endpoint api --tasa 500
+    python -m benchmarks.carga --curva-historial 0,10000,100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+DISTRIBUCIONES = ("uniforme", "sesgada", "neutral", "arquetipos")
+ENDPOINTS = {"form": "/procesar-test", "api": "/api/v1/recommend"}
+
+
+class GeneradorRespuestas:
+    """Fuente reproducible de cuestionarios completos para una distribución."""
+
+    def __init__(self, distribucion: str = "uniforme", seed: int = 0):
+        from models.ejes_profesionales import EJES_PROFESIONALES
+        from models.preguntas import obtener_todas_preguntas
+
+        if distribucion not in DISTRIBUCIONES:
+            raise ValueError(f"Distribución desconocida: {distribucion}")
+        self.distribucion = distribucion
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+        preguntas = obtener_todas_preguntas()
+        self._n_opciones = np.array([len(p["opciones"]) for p in preguntas])
+        self._tecnicas = np.array([p["tipo"] == "tecnica" for p in preguntas])
+        self._features = [p["feature_principal"] for p in preguntas]
+        self._ejes = list(EJES_PROFESIONALES.values())
+        # Una categórica concentrada por pregunta (Dirichlet con alpha < 1)
+        self._probabilidades = [self._rng.dirichlet(np.full(n, 0.4)) for n in self._n_opciones]
+
+    def siguiente(self) -> List[Tuple[int, int]]:
+        with self._lock:
+            opciones = self._opciones()
+        return list(enumerate(opciones.tolist()))
+
+    def _opciones(self) -> np.ndarray:
+        n = self._n_opciones
+        if self.distribucion == "uniforme":
+            return (self._rng.random(n.size) * n).astype(int)
+        if self.distribucion == "neutral":
+            return n // 2
+        if self.distribucion == "sesgada":
+            return np.array([self._rng.choice(len(p), p=p) for p in self._probabilidades])
+
+        eje = self._ejes[self._rng.integers(len(self._ejes))]
+        opciones = (self._rng.random(n.size) * n).astype(int)
+        for q, feature in enumerate(self._features):
+            if not self._tecnicas[q]:
+                continue
+            if feature in eje.features_primarias:
+                opciones[q] = n[q] - 1
+            elif feature in eje.features_secundarias:
+                opciones[q] = n[q] - 2
+            else:
+                opciones[q] = self._rng.integers(2)
+        return opciones
+
+
+class ObjetivoCliente:
+    """Envía pedidos con el test client de Flask (un cliente por hilo)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def enviar(self, endpoint: str, respuestas: List[Tuple[int, int]]) -> int:
+        cliente = getattr(self._local, "cliente", None)
+        if cliente is None:
+            cliente = self._local.cliente = self.app.test_client()
+        if endpoint == "form":
+            r = cliente.post(ENDPOINTS[endpoint], data={f"respuesta_{q}": o for q, o in respuestas})
+        else:
+            r = cliente.post(ENDPOINTS[endpoint], json={"respuestas": respuestas})
+        return r.status_code
+
+
+class ObjetivoHTTP:
+    """Envía pedidos a un servidor en ``base_url`` con urllib (sin seguir redirecciones)."""
+
+    class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, *args, **kwargs):
+            return None
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._opener = urllib.request.build_opener(self._SinRedirecciones)
+
+    def enviar(self, endpoint: str, respuestas: List[Tuple[int, int]]) -> int:
+        if endpoint == "form":
+            from urllib.parse import urlencode
+
+            cuerpo = urlencode({f"respuesta_{q}": o for q, o in respuestas}).encode()
+            tipo = "application/x-www-form-urlencoded"
+        else:
+            cuerpo = json.dumps({"respuestas": respuestas}).encode()
+            tipo = "application/json"
+        pedido = urllib.request.Request(self.base_url + ENDPOINTS[endpoint], data=cuerpo, headers={"Content-Type": tipo})
+        try:
+            with self._opener.open(pedido, timeout=self.timeout) as r:
+                r.read()
+                return r.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return 0
+
+
+def ejecutar_carga(
+    objetivo,
+    generador: GeneradorRespuestas,
+    endpoint: str = "form",
+    total: int = 1000,
+    concurrencia: int = 8,
+    tasa: float | None = None,
+) -> dict:
+    """
+    Envía ``total`` pedidos con ``concurrencia`` hilos. Con ``tasa`` (pedidos/s)
+    la carga es de lazo abierto: cada pedido tiene un instante programado y la
+    latencia se mide desde ese instante, de modo que la espera en cola cuenta.
+    """
+    cuestionarios = [generador.siguiente() for _ in range(total)]
+    latencias = np.zeros(total)
+    estados = np.zeros(total, dtype=int)
+    inicio = time.perf_counter()
+
+    def _uno(i: int) -> None:
+        programado = inicio + i / tasa if tasa else None
+        if programado is not None:
+            espera = programado - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+        t0 = programado if programado is not None else time.perf_counter()
+        try:
+            estados[i] = objetivo.enviar(endpoint, cuestionarios[i])
+        except Exception:
+            estados[i] = 0
+        latencias[i] = time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        list(pool.map(_uno, range(total)))
+    duracion = time.perf_counter() - inicio
+
+    errores = int(np.count_nonzero(estados != 200))
+    ms = latencias * 1e3
+    return {
+        "endpoint": endpoint,
+        "distribucion": generador.distribucion,
+        "total": total,
+        "concurrencia": concurrencia,
+        "tasa_objetivo": tasa,
+        "duracion_s": duracion,
+        "rps": total / duracion,
+        "errores": errores,
+        "tasa_errores": errores / total if total else 0.0,
+        "estados": {str(k): int(v) for k, v in zip(*np.unique(estados, return_counts=True))},
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+# Rutas de utils.storage que la app aislada redirige al directorio temporal
+_RUTAS_STORAGE = {
+    "HISTORIAL_DB": "historial.db",
+    "HISTORIAL_FILE": "historial.json",
+    "ESTADISTICAS_FILE": "estadisticas.json",
+    "MUESTRAS_FILE": "muestras_entrenamiento.bin",
+    "MUESTRAS_LEGADO": "muestras_entrenamiento.jsonl",
+}
+
+
+@contextmanager
+def _app_aislada(directorio: Path) -> Iterator:
+    """
+    Importa la app apuntando historial, estadísticas, muestras y buffer a
+    ``directorio``. Al salir vacía la cola de escrituras, cierra los stores
+    abiertos sobre ``directorio`` y restaura las rutas originales.
+    """
+    import app as app_module
+    from models import buffer
+    from utils import storage
+
+    originales = {nombre: getattr(storage, nombre) for nombre in _RUTAS_STORAGE}
+    buffer_original = buffer.BUFFER_FILE
+    for nombre, archivo in _RUTAS_STORAGE.items():
+        setattr(storage, nombre, str(directorio / archivo))
+    buffer.BUFFER_FILE = directorio / "buffer.bin"
+    try:
+        yield app_module
+    finally:
+        try:
+            app_module.cola_escritura.vaciar()
+        finally:
+            for nombre, valor in originales.items():
+                setattr(storage, nombre, valor)
+            buffer.BUFFER_FILE = buffer_original
+            buffer._ACTUAL = None
+            raiz = directorio.resolve()
+            for cache in (storage._STORES, storage._BITACORAS, buffer._WRITERS):
+                for clave in [c for c in cache if Path(c).parent == raiz]:
+                    store = cache.pop(clave)
+                    # Las conexiones de otros hilos se liberan junto con el store
+                    if hasattr(store, "cerrar"):
+                        store.cerrar()
+
+
+def curva_historial(
+    tamanos: List[int],
+    generador: GeneradorRespuestas,
+    endpoint: str = "form",
+    total: int = 1000,
+    concurrencia: int = 8,
+    tasa: float | None = None,
+) -> List[dict]:
+    """Repite la carga con el historial precargado a cada tamaño (en orden creciente)."""
+    from utils import storage
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        with _app_aislada(Path(tmp)) as app_module:
+            objetivo = ObjetivoCliente(app_module.app)
+            db = storage.obtener_historial_db()
+            test = {"fecha": "2024-01-01T00:00:00", "carreras": ["Software Developer", "API Specialist", "Software tester"], "compatibilidades": [60, 30, 10]}
+            for tamano in sorted(tamanos):
+                app_module.cola_escritura.vaciar()
+                faltan = tamano - db.contar()
+                while faltan > 0:
+                    lote = min(faltan, 50_000)
+                    db.agregar_muchos([test] * lote)
+                    faltan -= lote
+                resultado = ejecutar_carga(objetivo, generador, endpoint, total, concurrencia, tasa)
+                inicio = time.perf_counter()
+                app_module.cola_escritura.vaciar()
+                resultado["vaciado_escrituras_s"] = time.perf_counter() - inicio
+                resultado["historial_previo"] = tamano
+                resultados.append(resultado)
+    return resultados
+
+
+def _imprimir(resultado: dict) -> None:
+    previo = f" historial={resultado['historial_previo']:>8}" if "historial_previo" in resultado else ""
+    print(
+        f"{resultado['endpoint']:4s} {resultado['distribucion']:10s}{previo} "
+        f"{resultado['rps']:8.1f} req/s  p50={resultado['p50_ms']:7.2f}ms p95={resultado['p95_ms']:7.2f}ms "
+        f"p99={resultado['p99_ms']:7.2f}ms  errores={resultado['tasa_errores']:.2%}"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generador de carga para CareerMate")
+    parser.add_argument("--objetivo", default="cliente", help="'cliente' (test client) o la URL base de un servidor")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="form")
+    parser.add_argument("--distribucion", default="uniforme", help=f"Una o varias separadas por comas: {', '.join(DISTRIBUCIONES)}")
+    parser.add_argument("--total", type=int, default=1000, help="Pedidos por corrida")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--tasa", type=float, help="Pedidos por segundo (lazo abierto); sin valor, lazo cerrado")
+    parser.add_argument("--curva-historial", help="Tamaños de historial previos, p. ej. 0,10000,100000 (solo 'cliente')")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    args = parser.parse_args(argv)
+
+    resultados: List[Dict] = []
+    for distribucion in [d.strip() for d in args.distribucion.split(",") if d.strip()]:
+        generador = GeneradorRespuestas(distribucion, args.seed)
+        if args.curva_historial:
+            if args.objetivo != "cliente":
+                parser.error("--curva-historial solo está disponible con --objetivo cliente")
+            tamanos = [int(t) for t in args.curva_historial.split(",") if t]
+            corridas = curva_historial(tamanos, generador, args.endpoint, args.total, args.concurrencia, args.tasa)
+        elif args.objetivo == "cliente":
+            with tempfile.TemporaryDirectory() as tmp, _app_aislada(Path(tmp)) as app_module:
+                corridas = [ejecutar_carga(ObjetivoCliente(app_module.app), generador, args.endpoint, args.total, args.concurrencia, args.tasa)]
+        else:
+            corridas = [ejecutar_carga(ObjetivoHTTP(args.objetivo), generador, args.endpoint, args.total, args.concurrencia, args.tasa)]
+        for r in corridas:
+            _imprimir(r)
+        resultados.extend(corridas)
+
+    if args.salida:
+        salida = Path(args.salida)
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        salida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
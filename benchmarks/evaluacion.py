@@ -0,0 +1,239 @@
+"""
+Evaluación offline del pipeline de recomendación: calidad contra latencia.
+
+Sobre una partición estratificada de ``CareerMap.csv`` que el modelo no vio
+se comparan:
+
+- ``clasificador``: el top de ``predict_proba`` sobre todas las carreras
+- ``pipeline``: las dos etapas que sirve la app por lotes
+  (``rankear_perfiles``: eje profesional, normalización, ranking ML dentro
+  del eje y requisitos mínimos)
+
+Por cada uno se reporta accuracy top-1/top-3 y recall top-1 por carrera;
+del pipeline además cuántas filas pierden la carrera correcta en el filtro
+de eje o en los requisitos mínimos y cuántas quedan sin recomendación. La
+latencia se da por fila en lote (por etapa) y de a una fila (p50/p95/p99).
+
+Por defecto se entrena un modelo con la partición de entrenamiento y los
+hiperparámetros del modelo activo; ``--modelo activo`` usa el servido (que
+vio todo el dataset, así que la calidad sale optimista).
+
+    python -m benchmarks.evaluacion [--proporcion 0.2] [--seed 42] [--salida eval.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import warnings
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+def separar(y: np.ndarray, proporcion: float = 0.2, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """Índices (entrenamiento, evaluación) estratificados por carrera."""
+    from sklearn.model_selection import StratifiedShuffleSplit
+
+    corte = StratifiedShuffleSplit(n_splits=1, test_size=proporcion, random_state=seed)
+    return next(corte.split(np.zeros(len(y)), y))
+
+
+def entrenar_modelo(X: np.ndarray, y: np.ndarray, hiperparametros: dict | None = None):
+    """Ajusta scaler + clasificador calibrado y lo envuelve como ``ActiveModel`` (sin tocar disco)."""
+    from sklearn.preprocessing import StandardScaler
+
+    from models.inferencia_lineal import export_linear_model
+    from models.modelo_ml import ActiveModel, ModelArtifacts, construir_clasificador
+
+    scaler = StandardScaler()
+    Xs = scaler.fit_transform(X)
+    clf = construir_clasificador(hiperparametros)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        clf.fit(Xs, y)
+
+    linear = export_linear_model(scaler, clf, version="evaluacion") if clf.method == "sigmoid" else None
+    return ActiveModel(
+        artifacts=ModelArtifacts(scaler=scaler, classifier=clf, classes_=clf.classes_),
+        version="evaluacion",
+        signature=(),
+        loaded_at=time.time(),
+        linear=linear,
+    )
+
+
+def _percentiles_ms(segundos: List[float]) -> Dict[str, float]:
+    valores = np.asarray(segundos) * 1000.0
+    return {f"p{p}": float(np.percentile(valores, p)) for p in PERCENTILES}
+
+
+def _calidad(y: np.ndarray, rankings: List[List[str]], carreras: List[str]) -> dict:
+    """Accuracy top-1/top-3 y recall top-1 por carrera para listas ordenadas de carreras."""
+    top1 = np.array([bool(r) and r[0] == e for r, e in zip(rankings, y)])
+    top3 = np.array([e in r[:3] for r, e in zip(rankings, y)])
+    recall = {}
+    for carrera in carreras:
+        filas = y == carrera
+        if filas.any():
+            recall[carrera] = float(top1[filas].mean())
+    return {
+        "top1_accuracy": float(top1.mean()) if len(y) else 0.0,
+        "top3_accuracy": float(top3.mean()) if len(y) else 0.0,
+        "recall_por_carrera": recall,
+    }
+
+
+def evaluar(X: np.ndarray, y: np.ndarray, modelo, top: int = 3, muestras_latencia: int = 200, seed: int = 0) -> dict:
+    """Calidad y latencia del clasificador solo y del pipeline completo sobre (X, y)."""
+    from models.recomendador import rankear_perfiles
+
+    y = np.asarray(y).astype(str)
+    n = X.shape[0]
+    carreras = sorted(set(y.tolist()) | set(modelo.classes_.tolist()))
+
+    # Clasificador solo: top sobre todas las carreras
+    inicio = time.perf_counter()
+    proba = modelo.predict_proba(X)
+    orden = np.argsort(-proba, axis=1, kind="stable")[:, :top]
+    segundos_clasificador = time.perf_counter() - inicio
+    ranking_clasificador = [modelo.classes_[fila].tolist() for fila in orden]
+
+    # Pipeline completo por lotes
+    inicio = time.perf_counter()
+    ranking = rankear_perfiles(X, top, modelo=modelo)
+    segundos_pipeline = time.perf_counter() - inicio
+    ranking_pipeline = [[c for c, _ in r] for r in ranking.recomendadas]
+
+    fuera_de_eje = np.array([e not in c for e, c in zip(y, ranking.candidatas)])
+    por_requisitos = np.array([e in x for e, x in zip(y, ranking.excluidas)])
+    sin_recomendacion = np.array([not r for r in ranking.recomendadas])
+
+    # Latencia de a una fila (como un request) sobre una muestra fija
+    rng = np.random.default_rng(seed)
+    muestra = rng.choice(n, size=min(muestras_latencia, n), replace=False) if n else np.empty(0, dtype=int)
+    lat_clasificador, lat_pipeline = [], []
+    for i in muestra:
+        fila = X[i:i + 1]
+        t0 = time.perf_counter()
+        modelo.predict_proba(fila)
+        t1 = time.perf_counter()
+        rankear_perfiles(fila, top, modelo=modelo)
+        t2 = time.perf_counter()
+        lat_clasificador.append(t1 - t0)
+        lat_pipeline.append(t2 - t1)
+
+    por_fila_us = 1e6 / n if n else 0.0
+    return {
+        "filas": int(n),
+        "top": top,
+        "clasificador": {
+            **_calidad(y, ranking_clasificador, carreras),
+            "latencia": {
+                "lote_us_por_fila": segundos_clasificador * por_fila_us,
+                "fila_ms": _percentiles_ms(lat_clasificador) if len(muestra) else {},
+            },
+        },
+        "pipeline": {
+            **_calidad(y, ranking_pipeline, carreras),
+            "rechazo_eje": float(fuera_de_eje.mean()) if n else 0.0,
+            "rechazo_requisitos": float(por_requisitos.mean()) if n else 0.0,
+            "sin_recomendacion": float(sin_recomendacion.mean()) if n else 0.0,
+            "candidatas_promedio": float(np.mean([len(c) for c in ranking.candidatas])) if n else 0.0,
+            "latencia": {
+                "lote_us_por_fila": segundos_pipeline * por_fila_us,
+                "etapas_us_por_fila": {etapa: s * por_fila_us for etapa, s in ranking.tiempos.items()},
+                "fila_ms": _percentiles_ms(lat_pipeline) if len(muestra) else {},
+            },
+        },
+    }
+
+
+def ejecutar(proporcion: float = 0.2, seed: int = 42, modelo: str = "particion", muestras_latencia: int = 200) -> dict:
+    from models.entrenamiento import cargar_matriz_datos
+    from models.modelo_ml import _active_dir, _load_meta, get_active_model
+
+    datos = cargar_matriz_datos()
+    X = np.asarray(datos.X, dtype=float)
+    y = datos.etiquetas()
+    entrenamiento, evaluacion = separar(y, proporcion, seed)
+
+    inicio = time.perf_counter()
+    if modelo == "activo":
+        activo = get_active_model()
+    else:
+        hiperparametros = _load_meta(_active_dir()).get("hyperparameters")
+        activo = entrenar_modelo(X[entrenamiento], y[entrenamiento], hiperparametros)
+    segundos_modelo = time.perf_counter() - inicio
+
+    resultado = evaluar(X[evaluacion], y[evaluacion], activo, muestras_latencia=muestras_latencia, seed=seed)
+    resultado.update(
+        {
+            "modelo": modelo,
+            "version_modelo": activo.version,
+            "proporcion": proporcion,
+            "seed": seed,
+            "segundos_modelo": segundos_modelo,
+        }
+    )
+    return resultado
+
+
+def formatear(resultado: dict) -> str:
+    c, p = resultado["clasificador"], resultado["pipeline"]
+    lineas = [
+        f"{resultado['filas']} filas de evaluación (modelo: {resultado['modelo']})",
+        "",
+        f"{'':<24}{'clasificador':>14}{'pipeline':>14}",
+        f"{'top-1 accuracy':<24}{c['top1_accuracy']:>14.4f}{p['top1_accuracy']:>14.4f}",
+        f"{'top-3 accuracy':<24}{c['top3_accuracy']:>14.4f}{p['top3_accuracy']:>14.4f}",
+        f"{'lote (µs/fila)':<24}{c['latencia']['lote_us_por_fila']:>14.1f}{p['latencia']['lote_us_por_fila']:>14.1f}",
+    ]
+    for q in PERCENTILES:
+        clave = f"p{q}"
+        if clave in p["latencia"]["fila_ms"]:
+            lineas.append(
+                f"{'fila ' + clave + ' (ms)':<24}{c['latencia']['fila_ms'][clave]:>14.3f}"
+                f"{p['latencia']['fila_ms'][clave]:>14.3f}"
+            )
+    lineas += [
+        "",
+        f"Correcta fuera del eje:        {p['rechazo_eje']:.2%}  (candidatas promedio: {p['candidatas_promedio']:.1f})",
+        f"Correcta excluida por mínimos: {p['rechazo_requisitos']:.2%}",
+        f"Sin recomendación:             {p['sin_recomendacion']:.2%}",
+        "Etapas (µs/fila): "
+        + ", ".join(f"{e} {s:.1f}" for e, s in p["latencia"]["etapas_us_por_fila"].items()),
+        "",
+        f"{'recall top-1':<34}{'clasificador':>14}{'pipeline':>14}",
+    ]
+    for carrera in sorted(p["recall_por_carrera"]):
+        lineas.append(
+            f"{carrera:<34}{c['recall_por_carrera'].get(carrera, 0.0):>14.4f}{p['recall_por_carrera'][carrera]:>14.4f}"
+        )
+    return "\n".join(lineas)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluación offline de calidad y latencia del pipeline")
+    parser.add_argument("--proporcion", type=float, default=0.2, help="Fracción del dataset para evaluar")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--modelo", choices=["particion", "activo"], default="particion",
+        help="Entrenar con la partición de entrenamiento o usar el modelo servido",
+    )
+    parser.add_argument("--muestras-latencia", type=int, default=200, help="Filas medidas de a una")
+    parser.add_argument("--salida", help="Guardar el resultado en un JSON")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args.proporcion, args.seed, args.modelo, args.muestras_latencia)
+    print(formatear(resultado))
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
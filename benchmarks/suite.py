@@ -0,0 +1,281 @@
+"""
+Benchmarks reproducibles del pipeline de recomendación.
+
+Escenarios (todos con semilla fija):
+
+- ``latencia``: ``recomendar_carreras`` de a un cuestionario, sin cache y con
+  cache (p50/p95/p99 en ms)
+- ``lote``: ``recomendar_carreras_batch`` sobre N cuestionarios (filas/s)
+- ``arranque``: proceso nuevo hasta la primera recomendación (import + carga)
+- ``historial``: costo de agregar y paginar con 10k/100k(/1M) tests previos
+- ``reentrenamiento``: reajuste completo del modelo en un directorio temporal
+
+Los resultados se escriben como JSON (commit, entorno y métricas) para
+comparar entre commits:
+
+    python -m benchmarks --salida benchmarks/resultados/base.json
+    python -m benchmarks --comparar benchmarks/resultados/base.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_ROOT = Path(__file__).resolve().parents[1]
+
+ESCENARIOS = ("latencia", "lote", "arranque", "historial", "reentrenamiento")
+TAMANOS_HISTORIAL = (10_000, 100_000)
+
+
+def generar_respuestas(n: int, seed: int = 0) -> List[List[Tuple[int, int]]]:
+    """Cuestionarios completos con opciones uniformes sobre ``obtener_todas_preguntas``."""
+    from models.preguntas import obtener_todas_preguntas
+
+    rng = np.random.default_rng(seed)
+    n_opciones = np.array([len(p["opciones"]) for p in obtener_todas_preguntas()])
+    opciones = (rng.random((n, len(n_opciones))) * n_opciones).astype(int)
+    preguntas = range(len(n_opciones))
+    return [list(zip(preguntas, fila.tolist())) for fila in opciones]
+
+
+def _percentiles_ms(tiempos: List[float]) -> dict:
+    t = np.asarray(tiempos) * 1e3
+    return {
+        "n": int(t.size),
+        "media_ms": float(t.mean()),
+        "p50_ms": float(np.percentile(t, 50)),
+        "p95_ms": float(np.percentile(t, 95)),
+        "p99_ms": float(np.percentile(t, 99)),
+    }
+
+
+def _cronometrar(fn: Callable, argumentos: list) -> List[float]:
+    tiempos = []
+    for a in argumentos:
+        inicio = time.perf_counter()
+        fn(a)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def bench_latencia(n: int, seed: int) -> dict:
+    from models import recomendador
+
+    cuestionarios = generar_respuestas(n, seed)
+    recomendador.recomendar_carreras(cuestionarios[0])  # carga del modelo fuera de la medición
+
+    cache = recomendador.CACHE_RECOMENDACIONES
+    capacidad = cache.capacidad
+    try:
+        cache.capacidad = 0
+        sin_cache = _cronometrar(recomendador.recomendar_carreras, cuestionarios)
+        cache.capacidad = max(capacidad, n)
+        cache.limpiar()
+        for c in cuestionarios:
+            recomendador.recomendar_carreras(c)
+        con_cache = _cronometrar(recomendador.recomendar_carreras, cuestionarios)
+    finally:
+        cache.capacidad = capacidad
+        cache.limpiar()
+    return {"sin_cache": _percentiles_ms(sin_cache), "con_cache": _percentiles_ms(con_cache)}
+
+
+def bench_lote(n: int, seed: int) -> dict:
+    from models.recomendador import recomendar_carreras_batch
+
+    cuestionarios = generar_respuestas(n, seed)
+    recomendar_carreras_batch(cuestionarios[:10])
+    inicio = time.perf_counter()
+    recomendar_carreras_batch(cuestionarios)
+    total = time.perf_counter() - inicio
+    return {"n": n, "segundos": total, "filas_por_segundo": n / total}
+
+
+def bench_arranque(repeticiones: int) -> dict:
+    codigo = (
+        "import time\n"
+        "t0 = time.perf_counter()\n"
+        "from models.recomendador import recomendar_carreras\n"
+        "t1 = time.perf_counter()\n"
+        "recomendar_carreras([(i, 2) for i in range(30)])\n"
+        "t2 = time.perf_counter()\n"
+        "print(t1 - t0, t2 - t1)\n"
+    )
+    imports, primeras = [], []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, "-c", codigo], cwd=_ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        imports.append(float(salida[0]))
+        primeras.append(float(salida[1]))
+    return {
+        "import_ms": float(np.median(imports) * 1e3),
+        "primera_recomendacion_ms": float(np.median(primeras) * 1e3),
+        "total_ms": float(np.median(np.add(imports, primeras)) * 1e3),
+    }
+
+
+def bench_historial(tamanos: List[int], agregados: int, seed: int) -> dict:
+    from utils.historial_db import HistorialDB
+
+    rng = np.random.default_rng(seed)
+    features = rng.uniform(0.0, 8.0, size=30).tolist()
+    carreras = ["Software Developer", "API Specialist", "Helpdesk Engineer"]
+    resultados = {}
+    for tamano in tamanos:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = HistorialDB(Path(tmp) / "historial.db")
+            inicio = time.perf_counter()
+            for desde in range(0, tamano, 50_000):
+                db.agregar_muchos([
+                    {"fecha": f"2024-01-01T00:00:{i % 60:02d}", "carreras": carreras, "compatibilidades": [80, 70, 60], "features": features}
+                    for i in range(desde, min(tamano, desde + 50_000))
+                ])
+            carga = time.perf_counter() - inicio
+
+            tiempos = _cronometrar(lambda _: db.agregar(carreras, [80, 70, 60], features), range(agregados))
+            pagina = _cronometrar(lambda p: db.pagina(p, 50), [1, 2, 10, 100])
+            filtro = _cronometrar(lambda _: db.contar(carrera="Helpdesk Engineer"), range(3))
+            db.cerrar()
+        resultados[str(tamano)] = {
+            "carga_inicial_s": carga,
+            "agregar": _percentiles_ms(tiempos),
+            "pagina_ms": float(np.median(pagina) * 1e3),
+            "contar_filtrado_ms": float(np.median(filtro) * 1e3),
+        }
+    return resultados
+
+
+def bench_reentrenamiento() -> dict:
+    from models.entrenamiento import _csv_por_defecto
+    from models.modelo_ml import train_and_save
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inicio = time.perf_counter()
+        # Con el CSV explícito train_and_save no reescribe el dataset_meta.json real
+        train_and_save(csv_path=str(_csv_por_defecto()), artifact_dir=Path(tmp))
+        return {"segundos": time.perf_counter() - inicio}
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar(
+    escenarios: Sequence[str] = ESCENARIOS,
+    n_latencia: int = 500,
+    n_lote: int = 20_000,
+    tamanos_historial: Sequence[int] = TAMANOS_HISTORIAL,
+    agregados_historial: int = 200,
+    repeticiones_arranque: int = 3,
+    seed: int = 0,
+) -> dict:
+    """Corre los escenarios pedidos y retorna el documento de resultados."""
+    from models.modelo_ml import load_or_train
+
+    tamanos_historial = list(tamanos_historial)
+
+    load_or_train()
+    resultados: Dict[str, dict] = {}
+    for escenario in escenarios:
+        if escenario == "latencia":
+            resultados[escenario] = bench_latencia(n_latencia, seed)
+        elif escenario == "lote":
+            resultados[escenario] = bench_lote(n_lote, seed)
+        elif escenario == "arranque":
+            resultados[escenario] = bench_arranque(repeticiones_arranque)
+        elif escenario == "historial":
+            resultados[escenario] = bench_historial(tamanos_historial, agregados_historial, seed)
+        elif escenario == "reentrenamiento":
+            resultados[escenario] = bench_reentrenamiento()
+        else:
+            raise ValueError(f"Escenario desconocido: {escenario}")
+
+    return {
+        "commit": _commit(),
+        "fecha": datetime.now(timezone.utc).isoformat(),
+        "entorno": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+            "procesador": platform.processor() or platform.machine(),
+        },
+        "parametros": {
+            "n_latencia": n_latencia,
+            "n_lote": n_lote,
+            "tamanos_historial": tamanos_historial,
+            "seed": seed,
+        },
+        "resultados": resultados,
+    }
+
+
+def _aplanar(d: dict, prefijo: str = "") -> Dict[str, float]:
+    plano: Dict[str, float] = {}
+    for clave, valor in d.items():
+        ruta = f"{prefijo}.{clave}" if prefijo else clave
+        if isinstance(valor, dict):
+            plano.update(_aplanar(valor, ruta))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            plano[ruta] = float(valor)
+    return plano
+
+
+def comparar(base: dict, actual: dict) -> List[Tuple[str, float, float, float]]:
+    """(métrica, base, actual, actual/base) para las métricas presentes en ambos resultados."""
+    a, b = _aplanar(base["resultados"]), _aplanar(actual["resultados"])
+    return [(k, a[k], b[k], b[k] / a[k] if a[k] else float("nan")) for k in sorted(a.keys() & b.keys())]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline de recomendación")
+    parser.add_argument("--escenarios", default=",".join(ESCENARIOS), help="Lista separada por comas")
+    parser.add_argument("--latencia", type=int, default=500, help="Cuestionarios para la latencia individual")
+    parser.add_argument("--lote", type=int, default=20_000, help="Cuestionarios para el throughput por lotes")
+    parser.add_argument("--historial", default=",".join(map(str, TAMANOS_HISTORIAL)), help="Tamaños previos del historial")
+    parser.add_argument("--completo", action="store_true", help="Incluye el historial con 1M de tests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", help="Resultados JSON anteriores para comparar")
+    args = parser.parse_args(argv)
+
+    tamanos = [int(t) for t in args.historial.split(",") if t]
+    if args.completo and 1_000_000 not in tamanos:
+        tamanos.append(1_000_000)
+
+    documento = ejecutar(
+        escenarios=[e.strip() for e in args.escenarios.split(",") if e.strip()],
+        n_latencia=args.latencia,
+        n_lote=args.lote,
+        tamanos_historial=tamanos,
+        seed=args.seed,
+    )
+
+    texto = json.dumps(documento, indent=2, ensure_ascii=False)
+    if args.salida:
+        salida = Path(args.salida)
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        salida.write_text(texto + "\n", encoding="utf-8")
+    print(texto)
+
+    if args.comparar:
+        base = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        print(f"\nComparación con {base.get('commit')} ({args.comparar}):")
+        for metrica, antes, ahora, razon in comparar(base, documento):
+            print(f"  {metrica:55s} {antes:12.4g} -> {ahora:12.4g}  ({razon:.2f}x)")
+    return 0
@@ -0,0 +1,199 @@
+"""
+Actualización incremental del modelo con ``partial_fit``.
+
+En lugar de reajustar scaler y SGD sobre todo el dataset, cada lote del
+buffer se incorpora al modelo activo:
+
+1. ``StandardScaler.partial_fit`` actualiza media y desvío; los coeficientes
+   de cada fold se reexpresan en la nueva escala para que la función de
+   decisión sobre las features crudas no cambie por el solo hecho de reescalar.
+2. Cada ``SGDClassifier`` de los folds calibrados hace ``partial_fit`` con
+   las filas nuevas.
+3. Cada ``RECALIBRAR_CADA`` lotes se reajustan los calibradores sigmoides
+   (``FrozenEstimator``) sobre una muestra del dataset más el buffer acumulado.
+4. La deriva respecto del último reajuste completo se mide sobre un conjunto
+   fijo de sondeo (acuerdo del top-1 y distancia de variación total media).
+
+El resultado se publica como versión nueva igual que un reentrenamiento.
+"""
+from __future__ import annotations
+
+import copy
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+from models.buffer import claim_buffer, release_claim
+from models.entrenamiento import cargar_matriz_datos
+from models.inferencia_lineal import LinearCalibratedModel, export_linear_model, load_linear_model
+from models.modelo_ml import (
+    _active_dir,
+    _export_linear,
+    _load_meta,
+    _meta_version,
+    _paths,
+    buffer_rows,
+    load_or_train,
+    load_samples,
+    publish_version,
+)
+
+logger = logging.getLogger(__name__)
+
+RECALIBRAR_CADA = int(os.getenv("INCREMENTAL_RECALIBRAR_CADA", "10"))
+# Submuestreo del dataset base para recalibrar y para medir la deriva
+PASO_CALIBRACION = 5
+PASO_SONDEO = 10
+
+REFIT_LINEAR = "refit_linear.bin"
+
+
+def _reescalar_coeficientes(clf, media_ant, escala_ant, media_nueva, escala_nueva) -> None:
+    """
+    Mantiene ``((x - m0) / s0) @ w0 + b0 == ((x - m1) / s1) @ w1 + b1``:
+    ``w1 = w0 * s1 / s0`` y ``b1 = b0 + ((m1 - m0) / s0) @ w0``.
+    """
+    for fold in clf.calibrated_classifiers_:
+        est = fold.estimator
+        w0 = est.coef_ / escala_ant
+        est.intercept_ = est.intercept_ + w0 @ (media_nueva - media_ant)
+        est.coef_ = w0 * escala_nueva
+
+
+def _recalibrar(clf, Xs: np.ndarray, y: np.ndarray) -> None:
+    """Reajusta solo los calibradores sigmoides de cada fold (estimadores congelados)."""
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.frozen import FrozenEstimator
+
+    for fold in clf.calibrated_classifiers_:
+        cal = CalibratedClassifierCV(FrozenEstimator(fold.estimator), method="sigmoid")
+        cal.fit(Xs, y)
+        fold.calibrators = cal.calibrated_classifiers_[0].calibrators
+
+
+def _ruta_referencia(directorio: Path) -> Path:
+    """Modelo lineal del último reajuste completo del que desciende ``directorio``."""
+    ps = _paths(directorio)
+    ref = ps["dir"] / REFIT_LINEAR
+    return ref if ref.exists() else ps["linear"]
+
+
+def medir_deriva(modelo: LinearCalibratedModel, referencia: LinearCalibratedModel, X: np.ndarray) -> dict:
+    """Acuerdo del top-1 y distancia de variación total media entre dos modelos."""
+    p = modelo.predict_proba(X)
+    q = referencia.predict_proba(X)
+    return {
+        "top1_agreement": float(np.mean(p.argmax(axis=1) == q.argmax(axis=1))),
+        "mean_tv_distance": float(0.5 * np.abs(p - q).sum(axis=1).mean()),
+        "probe_rows": int(X.shape[0]),
+    }
+
+
+def admite_incremental(artifact_dir: Path | None = None) -> bool:
+    """
+    True si el modelo activo usa calibración sigmoide (según el meta, sin
+    cargar los joblib); con otra calibración solo hay reajustes completos.
+    """
+    hiperparametros = _load_meta(_active_dir(artifact_dir)).get("hyperparameters") or {}
+    return hiperparametros.get("method", "sigmoid") == "sigmoid"
+
+
+def actualizar_incremental(artifact_dir: Path | None = None, recalibrar: bool | None = None) -> dict | None:
+    """
+    Incorpora el buffer pendiente al modelo activo y publica una versión nueva.
+
+    Retorna el resumen de la actualización (incluida la deriva) o None si no
+    había muestras utilizables. Falla sin tocar el buffer si el modelo activo
+    no admite la actualización incremental (``admite_incremental``).
+    """
+    if not admite_incremental(artifact_dir):
+        raise ValueError("La actualización incremental requiere calibración sigmoide; usar el reajuste completo")
+
+    claim = claim_buffer()
+    if claim is None:
+        return None
+
+    buffer_data, claim_path = claim
+    try:
+        resumen = _actualizar(buffer_data, artifact_dir, recalibrar)
+    except Exception:
+        release_claim(claim_path, restore=True)
+        raise
+    release_claim(claim_path)
+    return resumen
+
+
+def _actualizar(buffer_data: list, artifact_dir: Path | None, recalibrar: bool | None) -> dict | None:
+    X_nuevo, y_nuevo = buffer_rows(buffer_data)
+    if not len(X_nuevo):
+        return None
+
+    activa = _active_dir(artifact_dir)
+    meta = _load_meta(activa)
+    art = load_or_train(artifact_dir=activa)
+    referencia = _ruta_referencia(activa)
+    if not referencia.exists():
+        _export_linear(art.scaler, art.classifier, _meta_version(meta), activa)
+
+    scaler = copy.deepcopy(art.scaler)
+    clf = copy.deepcopy(art.classifier)
+
+    # partial_fit no admite clases nuevas: esas filas solo se guardan con las
+    # muestras acumuladas y entran en el próximo reajuste completo
+    conocidas = np.isin(y_nuevo, clf.classes_.astype(str))
+    if not conocidas.all():
+        logger.warning("Filas con carreras desconocidas fuera del ajuste incremental: %d", int((~conocidas).sum()))
+    X_fit, y_fit = X_nuevo[conocidas], y_nuevo[conocidas]
+
+    if len(X_fit):
+        media_ant, escala_ant = scaler.mean_.copy(), scaler.scale_.copy()
+        scaler.partial_fit(X_fit)
+        _reescalar_coeficientes(clf, media_ant, escala_ant, scaler.mean_, scaler.scale_)
+
+        Xs_fit = scaler.transform(X_fit)
+        for fold in clf.calibrated_classifiers_:
+            fold.estimator.partial_fit(Xs_fit, y_fit)
+
+    X_prev, y_prev = load_samples(activa)
+    X_muestras = np.vstack([X_prev, X_nuevo])
+    y_muestras = np.concatenate([y_prev, y_nuevo])
+
+    lotes = int(meta.get("incremental_batches") or 0) + 1
+    if recalibrar is None:
+        recalibrar = lotes % RECALIBRAR_CADA == 0
+
+    datos = cargar_matriz_datos()
+    if recalibrar:
+        validas = np.isin(y_muestras, clf.classes_.astype(str))
+        X_cal = np.vstack([datos.X[::PASO_CALIBRACION], X_muestras[validas]])
+        y_cal = np.concatenate([datos.etiquetas()[::PASO_CALIBRACION], y_muestras[validas]])
+        _recalibrar(clf, scaler.transform(X_cal), y_cal)
+
+    deriva = medir_deriva(
+        export_linear_model(scaler, clf), load_linear_model(referencia), np.asarray(datos.X[::PASO_SONDEO])
+    )
+
+    version = publish_version(
+        scaler,
+        clf,
+        {
+            "n_samples": int(meta.get("n_samples", 0)) + int(len(X_fit)),
+            "n_buffer_samples": int(X_muestras.shape[0]),
+            "refit_version": meta.get("refit_version") or meta.get("version"),
+            "incremental_batches": lotes,
+            "drift": deriva,
+        },
+        artifact_dir,
+        samples=(X_muestras, y_muestras),
+        extra_files={REFIT_LINEAR: referencia},
+    )
+
+    return {
+        "version": version,
+        "filas": int(len(X_fit)),
+        "lotes": lotes,
+        "recalibrado": bool(recalibrar),
+        "deriva": deriva,
+    }
@@ -1,32 +1,100 @@
-import json
+import os
+import time
 from pathlib import Path
-from datetime import datetime
-from typing import List
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Tuple
 
-BUFFER_FILE = Path("models/artifacts/buffer.jsonl")
+from utils.bitacora import Bitacora, LoteRegistros, contar_registros, iterar_lotes, longitud_valida, migrar_jsonl
+from utils.metricas import medir
+
+# Bitácora binaria (utils.bitacora): un registro por perfil, textos = etiquetas
+BUFFER_FILE = Path("models/artifacts/buffer.bin")
+
+_WRITERS: Dict[str, Bitacora] = {}
+# Último (BUFFER_FILE, writer) usado: evita resolve() y la revisión del JSONL en cada muestra
+_ACTUAL: Tuple[Path, Bitacora] | None = None
+
+
+def _writer() -> Bitacora:
+    """Bitácora de ``BUFFER_FILE``; el ``buffer.jsonl`` heredado se migra al crearla."""
+    global _ACTUAL
+    actual = _ACTUAL
+    if actual is not None and actual[0] is BUFFER_FILE:
+        return actual[1]
+
+    clave = str(BUFFER_FILE.resolve())
+    writer = _WRITERS.get(clave)
+    if writer is None:
+        writer = _WRITERS[clave] = Bitacora(BUFFER_FILE)
+        _migrate_legacy(writer)
+    _ACTUAL = (BUFFER_FILE, writer)
+    return writer
+
+
+def _migrate_legacy(writer: Bitacora) -> None:
+    """Pasa las muestras del ``buffer.jsonl`` heredado a la bitácora binaria (ver ``migrar_jsonl``)."""
+    migrar_jsonl(BUFFER_FILE.with_suffix(".jsonl"), writer, lambda e: (e["features"], e["labels"], None))
 
 
 def add_to_buffer(features: List[float], labels: List[str]) -> None:
-    BUFFER_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with medir("buffer_escritura"):
+        _writer().agregar(features, labels)
 
-    entry = {
-        "ts": datetime.utcnow().isoformat() + "Z",
-        "features": [float(x) for x in features],
-        "labels": labels,
-    }
 
-    with BUFFER_FILE.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry) + "\n")
+def iter_buffer(batch_size: int = 1024, path: Path | None = None) -> Iterator[LoteRegistros]:
+    """Recorre el buffer (o un archivo reclamado) en lotes NumPy."""
+    if path is None:
+        _writer()
+    return iterar_lotes(BUFFER_FILE if path is None else path, batch_size)
 
 
-def load_buffer():
-    if not BUFFER_FILE.exists():
-        return []
+def _entries(path: Path) -> list:
+    return [
+        {
+            "ts": datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z"),
+            "features": x.tolist(),
+            "labels": list(labels),
+        }
+        for lote in iterar_lotes(path)
+        for x, ts, labels in zip(lote.X, lote.ts.tolist(), lote.textos)
+    ]
 
-    with BUFFER_FILE.open("r", encoding="utf-8") as f:
-        return [json.loads(line) for line in f if line.strip()]
+
+def load_buffer():
+    _writer()
+    return _entries(BUFFER_FILE)
 
 
 def clear_buffer():
     if BUFFER_FILE.exists():
-        BUFFER_FILE.unlink()
\ No newline at end of file
+        BUFFER_FILE.unlink()
+
+
+def buffer_size() -> int:
+    """Cantidad de muestras que esperan en el buffer."""
+    _writer()
+    return contar_registros(BUFFER_FILE)
+
+
+def claim_buffer() -> Tuple[list, Path] | None:
+    """
+    Toma el buffer actual para reentrenar, de forma atómica.
+
+    El archivo se renombra con el lock de escritura tomado: las muestras que
+    lleguen durante el entrenamiento van a un buffer nuevo y ningún registro
+    queda cortado. Un archivo solo lo puede reclamar un proceso. Retorna
+    (entries, claim_path) o None si el buffer está vacío.
+    """
+    writer = _writer()
+    claim = BUFFER_FILE.with_name(f"{BUFFER_FILE.name}.{os.getpid()}.{time.time_ns()}.claim")
+    if not writer.reclamar(claim):
+        return None
+    return _entries(claim), claim
+
+
+def release_claim(claim: Path, restore: bool = False) -> None:
+    """Descarta un buffer reclamado, o devuelve sus muestras si el entrenamiento falló."""
+    if restore and claim.exists():
+        datos = claim.read_bytes()
+        _writer().agregar_bytes(datos[:longitud_valida(datos)])
+    claim.unlink(missing_ok=True)
\ No newline at end of file
@@ -0,0 +1,310 @@
+"""
+Búsqueda de hiperparámetros del clasificador en paralelo.
+
+Evalúa configuraciones de ``SGDClassifier`` (loss, alpha, penalty) y de la
+calibración (método y cantidad de folds) sobre una partición fija
+entrenamiento/validación estratificada. Las particiones se calculan una sola
+vez en el proceso principal —la de validación y las de calibración para
+cada cantidad de folds— y viajan a cada worker del pool junto con los datos
+al iniciarlo, así todas las configuraciones se comparan sobre los mismos
+cortes. Por configuración se reporta accuracy, accuracy top-3, log-loss y
+tiempo de ajuste.
+
+La mejor configuración se reentrena con todos los datos y se publica como
+versión nueva en ``models/artifacts`` (``publish_version``); el meta guarda
+los hiperparámetros elegidos y el resumen de la búsqueda, y los
+reentrenamientos posteriores los reutilizan.
+
+Por defecto solo se busca con calibración sigmoide, la única que se exporta
+al modelo lineal mapeable. ``--incluir-isotonica`` agrega la isotónica; si
+gana, esa versión se sirve con el pipeline sklearn y el reentrenamiento
+incremental pasa a reajustes completos.
+
+    python -m models.busqueda_hiperparametros --n-jobs 4 [--modo aleatoria --n-iter 20] [--sin-promover]
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from models.modelo_ml import (
+    HIPERPARAMETROS_BASE,
+    _active_dir,
+    construir_clasificador,
+    load_samples,
+    publish_version,
+)
+
+logger = logging.getLogger(__name__)
+
+ESPACIO_BUSQUEDA: Dict[str, list] = {
+    "loss": ["log_loss", "modified_huber"],
+    "alpha": [1e-5, 5e-5, 1e-4, 5e-4],
+    "penalty": ["l2", "elasticnet"],
+    "method": ["sigmoid"],
+    "cv": [3, 5],
+}
+
+# Métodos de calibración fuera del camino lineal (solo con --incluir-isotonica)
+METODOS_NO_LINEALES = ["isotonic"]
+
+# Rango log-uniforme de alpha en la búsqueda aleatoria
+RANGO_ALPHA = (1e-6, 1e-3)
+
+METRICAS = {"log_loss": False, "accuracy": True, "top3_accuracy": True}  # nombre -> mayor es mejor
+
+PROPORCION_VALIDACION = 0.2
+
+
+@dataclass(frozen=True)
+class Particiones:
+    """Índices de entrenamiento/validación y folds de calibración (relativos a ``entrenamiento``)."""
+
+    entrenamiento: np.ndarray
+    validacion: np.ndarray
+    folds: Dict[int, List[Tuple[np.ndarray, np.ndarray]]]
+
+
+def generar_configuraciones(
+    espacio: Dict[str, list] | None = None, modo: str = "grilla", n_iter: int = 20, seed: int = 42
+) -> List[dict]:
+    """
+    ``modo="grilla"``: producto cartesiano del espacio. ``modo="aleatoria"``:
+    ``n_iter`` configuraciones distintas con alpha log-uniforme en ``RANGO_ALPHA``.
+    """
+    espacio = espacio or ESPACIO_BUSQUEDA
+    claves = list(espacio)
+    if modo == "grilla":
+        return [dict(zip(claves, valores)) for valores in itertools.product(*(espacio[c] for c in claves))]
+    if modo != "aleatoria":
+        raise ValueError(f"Modo de búsqueda desconocido: {modo}")
+
+    rng = np.random.default_rng(seed)
+    configuraciones: List[dict] = []
+    vistas = set()
+    for _ in range(n_iter * 20):
+        if len(configuraciones) >= n_iter:
+            break
+        config = {c: espacio[c][rng.integers(len(espacio[c]))] for c in claves}
+        config["alpha"] = float(10 ** rng.uniform(*np.log10(RANGO_ALPHA)))
+        firma = tuple(sorted((k, v if k != "alpha" else round(np.log10(v), 2)) for k, v in config.items()))
+        if firma not in vistas:
+            vistas.add(firma)
+            configuraciones.append(config)
+    return configuraciones
+
+
+def preparar_particiones(y: np.ndarray, folds: Sequence[int], seed: int = 42) -> Particiones:
+    from sklearn.model_selection import StratifiedKFold, StratifiedShuffleSplit
+
+    y = np.asarray(y)
+    corte = StratifiedShuffleSplit(n_splits=1, test_size=PROPORCION_VALIDACION, random_state=seed)
+    entrenamiento, validacion = next(corte.split(np.zeros(len(y)), y))
+    y_ent = y[entrenamiento]
+    # Mismos cortes que CalibratedClassifierCV(cv=k), calculados una sola vez
+    return Particiones(
+        entrenamiento=entrenamiento,
+        validacion=validacion,
+        folds={k: list(StratifiedKFold(n_splits=k).split(np.zeros(len(y_ent)), y_ent)) for k in sorted(set(folds))},
+    )
+
+
+# Estado de cada worker (o del proceso principal con n_jobs=1)
+_DATOS: dict = {}
+
+
+def _inicializar(X: np.ndarray, y: np.ndarray, particiones: Particiones) -> None:
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler().fit(X[particiones.entrenamiento])
+    _DATOS.update(
+        X_ent=scaler.transform(X[particiones.entrenamiento]),
+        y_ent=np.asarray(y)[particiones.entrenamiento],
+        X_val=scaler.transform(X[particiones.validacion]),
+        y_val=np.asarray(y)[particiones.validacion],
+        folds=particiones.folds,
+    )
+
+
+def evaluar_configuracion(indice: int, config: dict) -> dict:
+    """Ajusta ``config`` sobre la partición de entrenamiento y la mide en validación."""
+    from sklearn.metrics import accuracy_score, log_loss, top_k_accuracy_score
+
+    hiper = {**HIPERPARAMETROS_BASE, **config}
+    fila = {"indice": indice, "hiperparametros": hiper}
+    inicio = time.perf_counter()
+    try:
+        clf = construir_clasificador(hiper, cv=_DATOS["folds"][int(hiper["cv"])])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            clf.fit(_DATOS["X_ent"], _DATOS["y_ent"])
+        fila["fit_seconds"] = time.perf_counter() - inicio
+
+        proba = clf.predict_proba(_DATOS["X_val"])
+        y_val = _DATOS["y_val"]
+        fila.update(
+            accuracy=float(accuracy_score(y_val, clf.classes_[proba.argmax(axis=1)])),
+            top3_accuracy=float(top_k_accuracy_score(y_val, proba, k=3, labels=clf.classes_)),
+            log_loss=float(log_loss(y_val, proba, labels=clf.classes_)),
+        )
+    except Exception as e:
+        fila["fit_seconds"] = time.perf_counter() - inicio
+        fila["error"] = repr(e)
+    return fila
+
+
+def buscar(
+    X: np.ndarray, y: np.ndarray, configuraciones: List[dict], n_jobs: int | None = None, seed: int = 42
+) -> List[dict]:
+    """Evalúa todas las configuraciones; retorna una fila por configuración, en orden."""
+    folds = [int({**HIPERPARAMETROS_BASE, **c}["cv"]) for c in configuraciones]
+    particiones = preparar_particiones(y, folds, seed)
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    if n_jobs == 1:
+        _inicializar(X, y, particiones)
+        return [evaluar_configuracion(i, c) for i, c in enumerate(configuraciones)]
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_inicializar, initargs=(X, y, particiones)) as pool:
+        futuros = [pool.submit(evaluar_configuracion, i, c) for i, c in enumerate(configuraciones)]
+        resultados = []
+        for futuro in futuros:
+            fila = futuro.result()
+            logger.info("Configuración %d/%d evaluada", fila["indice"] + 1, len(configuraciones))
+            resultados.append(fila)
+        return resultados
+
+
+def elegir_mejor(resultados: List[dict], metrica: str = "log_loss") -> dict:
+    if metrica not in METRICAS:
+        raise ValueError(f"Métrica desconocida: {metrica}")
+    validas = [r for r in resultados if "error" not in r and np.isfinite(r[metrica])]
+    if not validas:
+        raise RuntimeError("Ninguna configuración pudo ajustarse")
+    signo = -1.0 if METRICAS[metrica] else 1.0
+    return min(validas, key=lambda r: (signo * r[metrica], r["fit_seconds"]))
+
+
+def promover(
+    X: np.ndarray,
+    y: np.ndarray,
+    mejor: dict,
+    resultados: List[dict],
+    metrica: str,
+    artifact_dir: Path | None = None,
+    samples: Tuple[np.ndarray, np.ndarray] | None = None,
+) -> str:
+    """Reentrena la mejor configuración con todos los datos y la publica. Retorna la versión."""
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    Xs = scaler.fit_transform(X)
+    clf = construir_clasificador(mejor["hiperparametros"])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        clf.fit(Xs, y)
+
+    return publish_version(
+        scaler,
+        clf,
+        {
+            "n_samples": int(X.shape[0]),
+            "hyperparameters": mejor["hiperparametros"],
+            "search": {
+                "searched_at": datetime.utcnow().isoformat() + "Z",
+                "metric": metrica,
+                "n_configurations": len(resultados),
+                "validation_fraction": PROPORCION_VALIDACION,
+                "best": {k: v for k, v in mejor.items() if k != "hiperparametros"},
+                "results": resultados,
+            },
+            "refit_version": None,
+            "incremental_batches": 0,
+            "drift": None,
+        },
+        artifact_dir,
+        samples=samples,
+    )
+
+
+def cargar_datos_entrenamiento(
+    artifact_dir: Path | None = None,
+) -> Tuple[np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """Dataset base más las muestras acumuladas por la versión activa (como un reajuste completo)."""
+    from models.entrenamiento import cargar_matriz_datos
+
+    X_muestras, y_muestras = load_samples(_active_dir(artifact_dir))
+    datos = cargar_matriz_datos()
+    X = np.vstack([datos.X, X_muestras])
+    y = np.concatenate([datos.etiquetas(), y_muestras])
+    return X, y, (X_muestras, y_muestras)
+
+
+def formatear_resultados(resultados: List[dict], metrica: str) -> str:
+    signo = -1.0 if METRICAS[metrica] else 1.0
+    ordenados = sorted(resultados, key=lambda r: signo * r[metrica] if "error" not in r else float("inf"))
+    lineas = [f"{'loss':<15}{'alpha':>9} {'penalty':<11}{'method':<10}{'cv':>3}{'acc':>8}{'top3':>8}{'logloss':>9}{'fit s':>8}"]
+    for r in ordenados:
+        h = r["hiperparametros"]
+        prefijo = f"{h['loss']:<15}{h['alpha']:>9.1e} {h['penalty']:<11}{h['method']:<10}{h['cv']:>3}"
+        if "error" in r:
+            lineas.append(f"{prefijo}  error: {r['error']}")
+        else:
+            lineas.append(
+                f"{prefijo}{r['accuracy']:>8.4f}{r['top3_accuracy']:>8.4f}{r['log_loss']:>9.4f}{r['fit_seconds']:>8.2f}"
+            )
+    return "\n".join(lineas)
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Búsqueda de hiperparámetros del clasificador")
+    parser.add_argument("--modo", choices=["grilla", "aleatoria"], default="grilla")
+    parser.add_argument("--n-iter", type=int, default=20, help="Configuraciones en modo aleatorio")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--metrica", choices=sorted(METRICAS), default="log_loss", help="Criterio para elegir el mejor")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--incluir-isotonica", action="store_true",
+        help="Buscar también con calibración isotónica (si gana, se sirve sin la inferencia lineal)",
+    )
+    parser.add_argument("--sin-promover", action="store_true", help="Solo reportar, sin publicar el mejor modelo")
+    parser.add_argument("--salida", help="Guardar los resultados en un JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    espacio = None
+    if args.incluir_isotonica:
+        espacio = dict(ESPACIO_BUSQUEDA, method=ESPACIO_BUSQUEDA["method"] + METODOS_NO_LINEALES)
+    configuraciones = generar_configuraciones(espacio, modo=args.modo, n_iter=args.n_iter, seed=args.seed)
+    X, y, samples = cargar_datos_entrenamiento()
+
+    inicio = time.perf_counter()
+    resultados = buscar(X, y, configuraciones, n_jobs=args.n_jobs, seed=args.seed)
+    print(formatear_resultados(resultados, args.metrica))
+    print(f"\n{len(resultados)} configuraciones en {time.perf_counter() - inicio:.1f}s")
+
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(resultados, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    mejor = elegir_mejor(resultados, args.metrica)
+    print(f"Mejor ({args.metrica}): {mejor['hiperparametros']}")
+    if not args.sin_promover:
+        print(f"Versión publicada: {promover(X, y, mejor, resultados, args.metrica, samples=samples)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+"""
+Cache de recomendaciones por conjunto de respuestas.
+
+El espacio de respuestas del cuestionario es finito y muchos estudiantes
+envían exactamente las mismas (p. ej. todo "Neutral"). La clave es un hash
+canónico de los pares ``(pregunta, opción)`` válidos —ordenados, porque el
+perfil solo depende de la suma— junto con ``top`` y la versión del modelo
+activo. Cuando el registro adopta una versión nueva el cache se vacía.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+import numpy as np
+
+CACHE_TAMANO = int(os.getenv("RECOMENDACION_CACHE_TAMANO", "4096"))
+CACHE_TTL = float(os.getenv("RECOMENDACION_CACHE_TTL", "3600"))
+
+
+def clave_respuestas(pares: np.ndarray) -> str:
+    """Hash de los pares ``(pregunta, opción)`` válidos ordenados: el orden de envío no cambia el perfil."""
+    pares = np.asarray(pares, dtype=np.int64).reshape(-1, 2)
+    orden = np.lexsort((pares[:, 1], pares[:, 0]))
+    return hashlib.blake2b(np.ascontiguousarray(pares[orden]).tobytes(), digest_size=16).hexdigest()
+
+
+class CacheRespuestas:
+    """LRU con vencimiento por TTL, seguro entre hilos. ``capacidad=0`` lo desactiva."""
+
+    def __init__(self, capacidad: int = CACHE_TAMANO, ttl: float = CACHE_TTL):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._datos: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._version: str | None = None
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.vencidos = 0
+        self.invalidaciones = 0
+
+    def _sincronizar_version(self, version: str) -> None:
+        if version != self._version:
+            if self._datos:
+                self.invalidaciones += 1
+            self._datos.clear()
+            self._version = version
+
+    def obtener(self, clave: Hashable, version: str, calcular: Callable[[], Any]) -> Any:
+        """Valor en cache para ``clave`` o el resultado de ``calcular()`` (copia profunda en ambos casos)."""
+        if self.capacidad <= 0:
+            return calcular()
+
+        ahora = time.monotonic()
+        with self._lock:
+            self._sincronizar_version(version)
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                if self.ttl <= 0 or ahora - entrada[0] < self.ttl:
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return copy.deepcopy(entrada[1])
+                del self._datos[clave]
+                self.vencidos += 1
+            self.fallos += 1
+
+        valor = calcular()
+
+        with self._lock:
+            # Si la versión cambió mientras se calculaba, el valor ya no sirve
+            if version == self._version:
+                self._datos[clave] = (ahora, copy.deepcopy(valor))
+                self._datos.move_to_end(clave)
+                while len(self._datos) > self.capacidad:
+                    self._datos.popitem(last=False)
+                    self.desalojos += 1
+        return valor
+
+    def limpiar(self) -> None:
+        with self._lock:
+            if self._datos:
+                self.invalidaciones += 1
+            self._datos.clear()
+
+    def stats(self) -> dict:
+        consultas = self.aciertos + self.fallos
+        return {
+            "tamano": len(self._datos),
+            "capacidad": self.capacidad,
+            "ttl": self.ttl,
+            "version": self._version,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "desalojos": self.desalojos,
+            "vencidos": self.vencidos,
+            "invalidaciones": self.invalidaciones,
+        }
@@ -171,6 +171,47 @@ def construir_mapeo_features_ejes() -> Dict[str, List[Tuple[str, float]]]:
 
 FEATURE_TO_EJES = construir_mapeo_features_ejes()
 
+EJE_IDS: Tuple[str, ...] = tuple(EJES_PROFESIONALES)
+
+
+def construir_matriz_ejes() -> np.ndarray:
+    """
+    Matriz de pesos (n_ejes, n_features) derivada de EJES_PROFESIONALES:
+    1.0 para features primarias, 0.5 para secundarias y 0 en el resto.
+    Las features que no existen en FEATURE_COLUMNS se ignoran.
+    """
+    indice = {f: j for j, f in enumerate(FEATURE_COLUMNS)}
+    pesos = np.zeros((len(EJE_IDS), len(FEATURE_COLUMNS)), dtype=float)
+    for i, eje_id in enumerate(EJE_IDS):
+        eje = EJES_PROFESIONALES[eje_id]
+        for feat in eje.features_primarias:
+            if feat in indice:
+                pesos[i, indice[feat]] += 1.0
+        for feat in eje.features_secundarias:
+            if feat in indice:
+                pesos[i, indice[feat]] += 0.5
+    pesos.setflags(write=False)
+    return pesos
+
+
+MATRIZ_EJES = construir_matriz_ejes()
+_SUMA_PESOS_EJES = np.where(MATRIZ_EJES.sum(axis=1) > 0, MATRIZ_EJES.sum(axis=1), 1.0)
+
+# (feature, columna, peso) por eje, en el orden primarias → secundarias
+_FEATURES_EJE: Tuple[Tuple[Tuple[str, int, float], ...], ...] = tuple(
+    tuple(
+        [(f, FEATURE_COLUMNS.index(f), 1.0) for f in EJES_PROFESIONALES[e].features_primarias if f in FEATURE_COLUMNS]
+        + [(f, FEATURE_COLUMNS.index(f), 0.5) for f in EJES_PROFESIONALES[e].features_secundarias if f in FEATURE_COLUMNS]
+    )
+    for e in EJE_IDS
+)
+_FEATURES_FUERA_DE_COLUMNAS = {
+    f
+    for eje in EJES_PROFESIONALES.values()
+    for f in eje.features_primarias + eje.features_secundarias
+    if f not in FEATURE_COLUMNS
+}
+
 
 @dataclass
 class ScoreEje:
@@ -262,6 +303,11 @@ def seleccionar_eje(perfil: Dict[str, float], umbral_hibrido: float = 0.15) -> R
     Returns:
         ResultadoEje con el eje principal, posible secundario, y explicación
     """
+    if all(col in perfil for col in FEATURE_COLUMNS) and not _FEATURES_FUERA_DE_COLUMNAS.intersection(perfil):
+        vector = np.array([[perfil[col] for col in FEATURE_COLUMNS]], dtype=float)
+        return seleccionar_eje_batch(vector, umbral_hibrido).resultado(0)
+
+    # Perfiles parciales: el score de cada eje solo promedia las features presentes
     scores = calcular_scores_ejes(perfil)
     
     # Ordenar por score normalizado
@@ -287,30 +333,139 @@ def seleccionar_eje(perfil: Dict[str, float], umbral_hibrido: float = 0.15) -> R
     # Calcular confianza basada en el margen
     confianza = min(1.0, margen / 0.3)  # 0.3 = margen para confianza máxima
     
-    # Construir explicación
+    return ResultadoEje(
+        eje_principal=top1.eje_id,
+        eje_secundario=top2.eje_id if es_hibrido else None,
+        es_hibrido=es_hibrido,
+        confianza=confianza,
+        margen=margen,
+        scores=scores,
+        explicacion=_explicar_eje(top1, top2, es_hibrido, confianza)
+    )
+
+
+def _explicar_eje(top1: ScoreEje, top2: ScoreEje, es_hibrido: bool, confianza: float) -> str:
     eje_info = EJES_PROFESIONALES[top1.eje_id]
     top_features = [f[0] for f in top1.features_contribuyentes[:3]]
-    
+
     if es_hibrido:
         eje2_info = EJES_PROFESIONALES[top2.eje_id]
-        explicacion = (
+        return (
             f"Perfil híbrido: {eje_info.nombre} + {eje2_info.nombre}. "
             f"Features dominantes: {', '.join(top_features)}"
         )
-    else:
-        explicacion = (
-            f"Eje dominante: {eje_info.nombre} (confianza: {confianza:.0%}). "
-            f"Features dominantes: {', '.join(top_features)}"
+    return (
+        f"Eje dominante: {eje_info.nombre} (confianza: {confianza:.0%}). "
+        f"Features dominantes: {', '.join(top_features)}"
+    )
+
+
+def _primer_maximo(scores: np.ndarray, tolerancia: float = 1e-9) -> np.ndarray:
+    """Índice del primer eje cuyo score está a ``tolerancia`` del máximo de su fila."""
+    return np.argmax(scores >= scores.max(axis=1, keepdims=True) - tolerancia, axis=1)
+
+
+_CANDIDATAS_POR_EJES: Dict[Tuple[int, int], List[str]] = {}
+
+
+@dataclass(frozen=True)
+class ResultadoEjeBatch:
+    """
+    Detección de eje para N perfiles (filas de X), solo con arrays.
+    Los ResultadoEje con scores por eje y explicación se construyen bajo
+    demanda con ``resultado(i)``.
+    """
+    X: np.ndarray
+    scores_raw: np.ndarray             # (N, n_ejes)
+    scores_normalizados: np.ndarray    # (N, n_ejes)
+    principal: np.ndarray              # (N,) índices en EJE_IDS
+    secundario: np.ndarray             # (N,) índices en EJE_IDS (segundo del ranking)
+    margen: np.ndarray                 # (N,)
+    confianza: np.ndarray              # (N,)
+    es_hibrido: np.ndarray             # (N,) bool
+
+    def __len__(self) -> int:
+        return int(self.principal.shape[0])
+
+    def eje_principal(self, i: int) -> str:
+        return EJE_IDS[self.principal[i]]
+
+    def eje_secundario(self, i: int) -> Optional[str]:
+        return EJE_IDS[self.secundario[i]] if self.es_hibrido[i] else None
+
+    def carreras_candidatas(self, i: int) -> List[str]:
+        """Equivalente a ``obtener_carreras_candidatas`` (lista compartida, no mutar)."""
+        key = (int(self.principal[i]), int(self.secundario[i]) if self.es_hibrido[i] else -1)
+        carreras = _CANDIDATAS_POR_EJES.get(key)
+        if carreras is None:
+            carreras = list(EJES_PROFESIONALES[EJE_IDS[key[0]]].carreras)
+            if key[1] >= 0:
+                carreras += [c for c in EJES_PROFESIONALES[EJE_IDS[key[1]]].carreras if c not in carreras]
+            _CANDIDATAS_POR_EJES[key] = carreras
+        return carreras
+
+    def resultado(self, i: int) -> ResultadoEje:
+        """Construye el ResultadoEje completo (scores, contribuyentes y explicación) de la fila i."""
+        fila = self.X[i]
+        scores: Dict[str, ScoreEje] = {}
+        for k, eje_id in enumerate(EJE_IDS):
+            contribuciones = [(feat, float(fila[j]) * peso) for feat, j, peso in _FEATURES_EJE[k]]
+            contribuciones.sort(key=lambda x: x[1], reverse=True)
+            scores[eje_id] = ScoreEje(
+                eje_id=eje_id,
+                score_raw=float(self.scores_raw[i, k]),
+                score_normalizado=float(self.scores_normalizados[i, k]),
+                features_contribuyentes=contribuciones[:5],
+            )
+
+        top1 = scores[EJE_IDS[self.principal[i]]]
+        top2 = scores[EJE_IDS[self.secundario[i]]]
+        es_hibrido = bool(self.es_hibrido[i])
+        confianza = float(self.confianza[i])
+
+        return ResultadoEje(
+            eje_principal=top1.eje_id,
+            eje_secundario=top2.eje_id if es_hibrido else None,
+            es_hibrido=es_hibrido,
+            confianza=confianza,
+            margen=float(self.margen[i]),
+            scores=scores,
+            explicacion=_explicar_eje(top1, top2, es_hibrido, confianza),
         )
-    
-    return ResultadoEje(
-        eje_principal=top1.eje_id,
-        eje_secundario=top2.eje_id if es_hibrido else None,
-        es_hibrido=es_hibrido,
-        confianza=confianza,
+
+
+def seleccionar_eje_batch(X: np.ndarray, umbral_hibrido: float = 0.15) -> ResultadoEjeBatch:
+    """
+    ``seleccionar_eje`` para N perfiles completos (filas en orden FEATURE_COLUMNS)
+    con un único producto matricial contra ``MATRIZ_EJES``.
+
+    Los empates (a tolerancia numérica) se resuelven por el orden de
+    EJES_PROFESIONALES, igual que el ordenamiento estable de la versión por dict.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    raw = (X @ MATRIZ_EJES.T) / _SUMA_PESOS_EJES
+
+    min_score = raw.min(axis=1, keepdims=True)
+    max_score = raw.max(axis=1, keepdims=True)
+    rango = np.where(max_score > min_score, max_score - min_score, 1.0)
+    normalizados = (raw - min_score) / rango
+
+    filas = np.arange(X.shape[0])
+    principal = _primer_maximo(normalizados)
+    resto = normalizados.copy()
+    resto[filas, principal] = -np.inf
+    secundario = _primer_maximo(resto)
+
+    margen = normalizados[filas, principal] - normalizados[filas, secundario]
+    return ResultadoEjeBatch(
+        X=X,
+        scores_raw=raw,
+        scores_normalizados=normalizados,
+        principal=principal,
+        secundario=secundario,
         margen=margen,
-        scores=scores,
-        explicacion=explicacion
+        confianza=np.minimum(1.0, margen / 0.3),
+        es_hibrido=margen < umbral_hibrido,
     )
 
 
@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import shutil
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-import pandas as pd
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 FEATURE_COLUMNS = [
     "Database Fundamentals",
@@ -38,6 +46,11 @@ FEATURE_COLUMNS = [
 TARGET_COLUMN = "Role"
 _ALT_TARGET_COLUMNS = ("Role", "career")
 _BOUNDS_CACHE: dict[str, tuple[float, float]] | None = None
+_FEATURE_SPACE: "FeatureSpace | None" = None
+
+# Metadatos precalculados del dataset (límites, clases, esquema). Permiten que
+# el proceso web arranque sin importar pandas ni parsear CareerMap.csv.
+DATASET_META_VERSION = 1
 
 
 def _get_base_dir() -> Path:
@@ -51,10 +64,23 @@ def _resolve_target_column(df: pd.DataFrame) -> str:
     raise ValueError(f"No se encontró columna objetivo. Se esperaba una de: {_ALT_TARGET_COLUMNS}")
 
 
+def _csv_por_defecto() -> Path:
+    return _get_base_dir() / "CareerMap.csv"
+
+
+def _metadatos_path() -> Path:
+    return Path(__file__).resolve().parent / "artifacts" / "dataset_meta.json"
+
+
+def _cache_matriz_dir() -> Path:
+    return Path(__file__).resolve().parent / "artifacts" / "dataset_cache"
+
+
 def cargar_datos(csv_path: str | os.PathLike | None = None) -> pd.DataFrame:
-    base_dir = _get_base_dir()
+    import pandas as pd
+
     if csv_path is None:
-        csv_path = base_dir / "CareerMap.csv"
+        csv_path = _csv_por_defecto()
 
     csv_path = Path(csv_path)
     if not csv_path.exists():
@@ -73,17 +99,279 @@ def cargar_datos(csv_path: str | os.PathLike | None = None) -> pd.DataFrame:
     return df
 
 
-def obtener_limites_features(csv_path: str | os.PathLike | None = None) -> dict[str, tuple[float, float]]:
-    global _BOUNDS_CACHE
-    if _BOUNDS_CACHE is not None and csv_path is None:
-        return _BOUNDS_CACHE
+def _huella_csv(csv_path: Path, con_hash: bool = True) -> dict:
+    st = csv_path.stat()
+    huella = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if con_hash:
+        h = hashlib.sha256()
+        with csv_path.open("rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloque)
+        huella["sha256"] = h.hexdigest()
+    return huella
+
+
+def _escribir_json_atomico(p: Path, datos: Any, **opciones) -> None:
+    """Escribe ``datos`` como JSON en un tmp y lo publica con ``os.replace``."""
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f"{p.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(datos, ensure_ascii=False, **opciones), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def _sha256_csv(csv_path: Path, cache_dir: Path) -> str:
+    """
+    sha256 del CSV. Como en ``cargar_metadatos_dataset``, primero se comparan
+    tamaño y mtime con la huella guardada en ``cache_dir/huellas.json`` y solo
+    si difieren se vuelve a leer el archivo.
+    """
+    indice = cache_dir / "huellas.json"
+    clave = str(csv_path.resolve())
+    try:
+        huellas = json.loads(indice.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        huellas = {}
+
+    guardada = huellas.get(clave) or {}
+    actual = _huella_csv(csv_path, con_hash=False)
+    if guardada.get("sha256") and all(guardada.get(k) == v for k, v in actual.items()):
+        return guardada["sha256"]
 
-    df = cargar_datos(csv_path)
+    huellas[clave] = huella = _huella_csv(csv_path)
+    try:
+        _escribir_json_atomico(indice, huellas)
+    except OSError:
+        # Caché de solo lectura: se recalcula el hash en cada carga
+        pass
+    return huella["sha256"]
+
+
+def _limites_desde_df(df: pd.DataFrame) -> dict[str, tuple[float, float]]:
     bounds: dict[str, tuple[float, float]] = {}
     for c in FEATURE_COLUMNS:
         s = df[c]
         bounds[c] = (float(s.min()), float(s.max()))
-
-    if csv_path is None:
-        _BOUNDS_CACHE = bounds
     return bounds
+
+
+def construir_metadatos_dataset(
+    datos: DatasetMatriz | None = None,
+    csv_path: str | os.PathLike | None = None,
+    destino: str | os.PathLike | None = None,
+) -> dict:
+    """
+    Calcula límites por feature, clases y esquema del dataset y los escribe en
+    ``dataset_meta.json`` (junto a los artefactos del modelo). Si se pasan
+    ``datos`` ya cargados se reutilizan en lugar de volver a leer el CSV.
+    """
+    csv = Path(csv_path) if csv_path is not None else _csv_por_defecto()
+    if datos is None:
+        datos = cargar_matriz_datos(csv)
+
+    mins = datos.X.min(axis=0)
+    maxs = datos.X.max(axis=0)
+    meta = {
+        "version": DATASET_META_VERSION,
+        "csv": csv.name,
+        "csv_huella": _huella_csv(csv),
+        "n_samples": int(datos.X.shape[0]),
+        "feature_columns": list(FEATURE_COLUMNS),
+        "target_column": TARGET_COLUMN,
+        "classes": datos.classes.tolist(),
+        "bounds": {c: [float(mins[i]), float(maxs[i])] for i, c in enumerate(FEATURE_COLUMNS)},
+    }
+
+    _escribir_json_atomico(Path(destino) if destino is not None else _metadatos_path(), meta, indent=2)
+    return meta
+
+
+def cargar_metadatos_dataset(
+    csv_path: str | os.PathLike | None = None,
+    origen: str | os.PathLike | None = None,
+) -> dict | None:
+    """
+    Lee ``dataset_meta.json`` si existe y corresponde al CSV actual.
+
+    La validación compara tamaño y mtime del CSV; solo si el mtime difiere
+    (p. ej. tras un checkout) se recalcula el sha256 y, si coincide, se guarda
+    la huella con el mtime nuevo para que los arranques siguientes no vuelvan
+    a leer el CSV. Si el CSV no está presente se confía en los metadatos.
+    Retorna None si faltan o están desactualizados.
+    """
+    p = Path(origen) if origen is not None else _metadatos_path()
+    if not p.exists():
+        return None
+    try:
+        meta = json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("version") != DATASET_META_VERSION or meta.get("feature_columns") != FEATURE_COLUMNS:
+        return None
+
+    csv = Path(csv_path) if csv_path is not None else _csv_por_defecto()
+    if not csv.exists():
+        return meta
+
+    guardada = meta.get("csv_huella", {})
+    actual = _huella_csv(csv, con_hash=False)
+    if actual["size"] != guardada.get("size"):
+        return None
+    if actual["mtime_ns"] != guardada.get("mtime_ns"):
+        huella = _huella_csv(csv)
+        if huella["sha256"] != guardada.get("sha256"):
+            return None
+        meta["csv_huella"] = huella
+        try:
+            _escribir_json_atomico(p, meta, indent=2)
+        except OSError:
+            # Artefactos de solo lectura: se rehashea en el próximo arranque
+            pass
+    return meta
+
+
+def obtener_limites_features(csv_path: str | os.PathLike | None = None) -> dict[str, tuple[float, float]]:
+    global _BOUNDS_CACHE
+    if _BOUNDS_CACHE is not None and csv_path is None:
+        return _BOUNDS_CACHE
+
+    if csv_path is not None:
+        return _limites_desde_df(cargar_datos(csv_path))
+
+    meta = cargar_metadatos_dataset()
+    if meta is None:
+        try:
+            meta = construir_metadatos_dataset()
+        except OSError:
+            # Directorio de artefactos de solo lectura: calcular sin persistir
+            return _limites_desde_df(cargar_datos())
+
+    _BOUNDS_CACHE = {c: (float(lo), float(hi)) for c, (lo, hi) in meta["bounds"].items()}
+    return _BOUNDS_CACHE
+
+
+@dataclass(frozen=True)
+class DatasetMatriz:
+    """
+    Dataset como arrays: ``X`` (N × features, float64), ``y`` con el índice de
+    clase de cada fila y ``classes`` (tabla de clases ordenada).
+    Cargado desde caché, ``X`` e ``y`` son memmaps de solo lectura.
+    """
+
+    X: np.ndarray
+    y: np.ndarray
+    classes: np.ndarray
+
+    def etiquetas(self) -> np.ndarray:
+        """Etiquetas de texto por fila (``classes[y]``)."""
+        return self.classes[self.y]
+
+
+def _escribir_cache_matriz(df: pd.DataFrame, destino: Path) -> None:
+    classes, y = np.unique(df[TARGET_COLUMN].astype(str).to_numpy(), return_inverse=True)
+    X = np.ascontiguousarray(df[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    np.save(tmp / "X.npy", X)
+    np.save(tmp / "y.npy", y.astype(np.int32))
+    np.save(tmp / "classes.npy", classes.astype(str))
+    (tmp / "columnas.json").write_text(json.dumps(list(FEATURE_COLUMNS), ensure_ascii=False), encoding="utf-8")
+    try:
+        os.replace(tmp, destino)
+    except OSError:
+        # Otro proceso publicó la misma caché primero
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def cargar_matriz_datos(
+    csv_path: str | os.PathLike | None = None,
+    cache_dir: str | os.PathLike | None = None,
+    mmap: bool = True,
+) -> DatasetMatriz:
+    """
+    Carga el dataset como arrays NumPy usando una caché binaria (.npy)
+    identificada por el sha256 del CSV (recalculado solo si cambian tamaño o
+    mtime, ver ``_sha256_csv``).
+
+    La primera vez parsea el CSV con pandas y escribe la caché; las siguientes
+    solo mapean los .npy en memoria (sin copia si ``mmap``), sin importar pandas.
+    """
+    csv = Path(csv_path) if csv_path is not None else _csv_por_defecto()
+    if not csv.exists():
+        raise FileNotFoundError(f"No se encontró el dataset CSV en: {csv}")
+
+    base = Path(cache_dir) if cache_dir is not None else _cache_matriz_dir()
+    destino = base / _sha256_csv(csv, base)[:16]
+
+    columnas = destino / "columnas.json"
+    if not (columnas.exists() and json.loads(columnas.read_text(encoding="utf-8")) == FEATURE_COLUMNS):
+        shutil.rmtree(destino, ignore_errors=True)
+        base.mkdir(parents=True, exist_ok=True)
+        _escribir_cache_matriz(cargar_datos(csv), destino)
+
+    modo = "r" if mmap else None
+    return DatasetMatriz(
+        X=np.load(destino / "X.npy", mmap_mode=modo),
+        y=np.load(destino / "y.npy", mmap_mode=modo),
+        classes=np.load(destino / "classes.npy"),
+    )
+
+
+class FeatureSpace:
+    """
+    Límites de las features como arrays de solo lectura, construidos una vez.
+
+    ``normalize``/``denormalize``/``clip`` aceptan ``out=`` para operar sobre un
+    buffer existente (puede ser la misma entrada) sin arrays intermedios.
+    """
+
+    def __init__(self, columns: list[str], bounds: dict[str, tuple[float, float]]):
+        self.columns = tuple(columns)
+        self.index = {c: i for i, c in enumerate(self.columns)}
+        self.mins = np.array([bounds[c][0] for c in self.columns], dtype=float)
+        self.maxs = np.array([bounds[c][1] for c in self.columns], dtype=float)
+        self.range = self.maxs - self.mins
+        # Rango usado para normalizar: features constantes no se escalan
+        self.safe_range = np.where(self.range < 1e-6, 1.0, self.range)
+        for arr in (self.mins, self.maxs, self.range, self.safe_range):
+            arr.setflags(write=False)
+
+    def normalize(self, X: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """(X - mins) / rango → [0, 1]."""
+        out = np.subtract(X, self.mins, out=out)
+        return np.divide(out, self.safe_range, out=out)
+
+    def denormalize(self, X: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Inversa de la normalización min-max."""
+        out = np.multiply(X, self.range, out=out)
+        return np.add(out, self.mins, out=out)
+
+    def clip(self, X: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        return np.clip(X, self.mins, self.maxs, out=out)
+
+
+def obtener_feature_space() -> FeatureSpace:
+    """FeatureSpace del dataset por defecto (se construye una sola vez por proceso)."""
+    global _FEATURE_SPACE
+    if _FEATURE_SPACE is None:
+        _FEATURE_SPACE = FeatureSpace(FEATURE_COLUMNS, obtener_limites_features())
+    return _FEATURE_SPACE
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precalcula los metadatos del dataset (límites, clases, esquema)")
+    parser.add_argument("--csv", default=None, help="Ruta del dataset (por defecto CareerMap.csv)")
+    parser.add_argument("--salida", default=None, help="Ruta del JSON (por defecto models/artifacts/dataset_meta.json)")
+    args = parser.parse_args(argv)
+
+    meta = construir_metadatos_dataset(csv_path=args.csv, destino=args.salida)
+    print(f"Metadatos escritos: {meta['n_samples']} muestras, {len(meta['classes'])} clases")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
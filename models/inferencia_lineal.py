@@ -0,0 +1,226 @@
+"""
+Inferencia lineal calibrada en NumPy puro.
+
+``CalibratedClassifierCV(SGDClassifier, method="sigmoid", cv=3)`` equivale a:
+por cada fold k, scores lineales ``T = Xs @ W_k.T + b_k``, calibración sigmoide
+por clase ``p = 1 / (1 + exp(a_kc * T + b_kc))``, normalización por fila y
+promedio de los folds. Aquí el ``StandardScaler`` se pliega en los
+coeficientes de cada fold, así que una predicción es un producto matricial,
+una sigmoide y dos reducciones; no se importa scikit-learn en el worker web.
+
+En disco el modelo es un archivo plano (``MAGIA``, cabecera JSON y arrays
+float64 alineados a 64 bytes) que se abre con ``mmap`` de solo lectura: los
+workers de un servidor prefork comparten las mismas páginas del page cache
+en lugar de tener cada uno su copia. El archivo nunca se reescribe en el
+lugar; una versión nueva es otro archivo que se publica con ``os.replace``,
+así los mapeos existentes siguen viendo el inodo anterior hasta soltarlo.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+MAGIA = b"CMLINEAL"
+FORMATO_VERSION = 1
+ALINEACION = 64
+
+# Arrays float64 del archivo plano, en orden
+_ARRAYS = ("coef", "intercept", "sig_a", "sig_b", "valid")
+_CABECERA = struct.Struct("<8sHI")  # magia, versión del formato, largo del JSON
+
+
+@dataclass(frozen=True)
+class LinearCalibratedModel:
+    """
+    Modelo exportado. Con K folds, C clases y F features:
+
+    - ``coef``: (F, K*C) coeficientes con el scaler plegado
+    - ``intercept``: (K*C,)
+    - ``sig_a``/``sig_b``: (K*C,) parámetros de la sigmoide de cada calibrador
+    - ``valid``: (K*C,) False si el fold no vio la clase (probabilidad 0)
+    """
+
+    classes_: np.ndarray
+    coef: np.ndarray
+    intercept: np.ndarray
+    sig_a: np.ndarray
+    sig_b: np.ndarray
+    valid: np.ndarray
+    n_folds: int
+    version: str = ""
+
+    @property
+    def n_classes(self) -> int:
+        return len(self.classes_)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilidades calibradas (N, C), iguales a ``CalibratedClassifierCV.predict_proba``."""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n, k, c = X.shape[0], self.n_folds, self.n_classes
+
+        z = X @ self.coef
+        z += self.intercept
+        z *= self.sig_a
+        z += self.sig_b
+        with np.errstate(over="ignore"):
+            np.exp(z, out=z)
+        z += 1.0
+        proba = np.reciprocal(z, out=z)
+        proba *= self.valid
+
+        proba = proba.reshape(n, k, c)
+        denominador = proba.sum(axis=2, keepdims=True)
+        # Si todos los calibradores dan 0 se usa la distribución uniforme (como sklearn)
+        proba = np.divide(proba, denominador, out=np.full_like(proba, 1.0 / c), where=denominador != 0)
+        proba[(proba > 1.0) & (proba <= 1.0 + 1e-5)] = 1.0
+        return proba.mean(axis=1)
+
+
+def export_linear_model(scaler, classifier, version: str = "") -> LinearCalibratedModel:
+    """
+    Aplana un ``StandardScaler`` + ``CalibratedClassifierCV`` (sigmoide,
+    estimador lineal multiclase) ya entrenados en arrays NumPy.
+    """
+    if getattr(classifier, "method", None) != "sigmoid":
+        raise ValueError("Solo se puede exportar una calibración sigmoide")
+
+    classes = np.asarray(classifier.classes_)
+    n_classes = len(classes)
+    if n_classes < 3:
+        raise ValueError("La exportación lineal requiere un problema multiclase (>= 3 clases)")
+
+    mean = np.zeros(scaler.n_features_in_) if scaler.mean_ is None else np.asarray(scaler.mean_, dtype=float)
+    scale = np.ones(scaler.n_features_in_) if scaler.scale_ is None else np.asarray(scaler.scale_, dtype=float)
+    index = {c: i for i, c in enumerate(classes.tolist())}
+
+    folds = classifier.calibrated_classifiers_
+    n_features = mean.shape[0]
+    coef = np.zeros((len(folds), n_classes, n_features))
+    intercept = np.zeros((len(folds), n_classes))
+    sig_a = np.zeros((len(folds), n_classes))
+    sig_b = np.zeros((len(folds), n_classes))
+    valid = np.zeros((len(folds), n_classes))
+
+    for k, fold in enumerate(folds):
+        estimator = fold.estimator
+        # Plegado del scaler: ((x - mean) / scale) @ w + b = x @ (w / scale) + (b - mean @ (w / scale))
+        w = np.asarray(estimator.coef_, dtype=float) / scale
+        b = np.asarray(estimator.intercept_, dtype=float) - w @ mean
+        for j, (clase, calibrator) in enumerate(zip(estimator.classes_.tolist(), fold.calibrators)):
+            i = index[clase]
+            coef[k, i] = w[j]
+            intercept[k, i] = b[j]
+            sig_a[k, i] = calibrator.a_
+            sig_b[k, i] = calibrator.b_
+            valid[k, i] = 1.0
+
+    k_c = len(folds) * n_classes
+    return LinearCalibratedModel(
+        classes_=classes.astype(str),
+        coef=np.ascontiguousarray(coef.reshape(k_c, n_features).T),
+        intercept=intercept.reshape(k_c),
+        sig_a=sig_a.reshape(k_c),
+        sig_b=sig_b.reshape(k_c),
+        valid=valid.reshape(k_c),
+        n_folds=len(folds),
+        version=version,
+    )
+
+
+def _alinear(n: int) -> int:
+    return -(-n // ALINEACION) * ALINEACION
+
+
+def save_linear_model(model: LinearCalibratedModel, path: str | os.PathLike) -> None:
+    """
+    Guarda el modelo en el formato plano mapeable (escritura atómica: archivo
+    temporal, ``fsync`` y ``os.replace``).
+    """
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+
+    arrays = {nombre: np.ascontiguousarray(getattr(model, nombre), dtype="<f8") for nombre in _ARRAYS}
+    descriptor = {
+        "formato": FORMATO_VERSION,
+        "version": model.version,
+        "n_folds": int(model.n_folds),
+        "classes": [str(c) for c in model.classes_.tolist()],
+        "arrays": {},
+    }
+    # Los offsets dependen del largo de la cabecera: se reservan con ceros y se fijan después
+    for nombre, a in arrays.items():
+        descriptor["arrays"][nombre] = {"offset": 0, "shape": list(a.shape)}
+    largo = len(json.dumps(descriptor, ensure_ascii=False).encode("utf-8")) + 16 * len(_ARRAYS)
+    offset = _alinear(_CABECERA.size + largo)
+    for nombre, a in arrays.items():
+        descriptor["arrays"][nombre]["offset"] = offset
+        offset = _alinear(offset + a.nbytes)
+    cabecera = json.dumps(descriptor, ensure_ascii=False).encode("utf-8").ljust(largo)
+
+    tmp = p.with_name(f"{p.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(_CABECERA.pack(MAGIA, FORMATO_VERSION, len(cabecera)))
+        f.write(cabecera)
+        for nombre, a in arrays.items():
+            f.seek(descriptor["arrays"][nombre]["offset"])
+            f.write(a.tobytes())
+        f.truncate(offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, p)
+
+
+def _load_mapped(path: Path) -> LinearCalibratedModel:
+    with open(path, "rb") as f:
+        magia, formato, largo = _CABECERA.unpack(f.read(_CABECERA.size))
+        if magia != MAGIA or formato != FORMATO_VERSION:
+            raise ValueError(f"{path} no es un modelo lineal en formato plano v{FORMATO_VERSION}")
+        descriptor = json.loads(f.read(largo).decode("utf-8"))
+        datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    arrays = {}
+    for nombre in _ARRAYS:
+        info = descriptor["arrays"][nombre]
+        forma = tuple(info["shape"])
+        n = int(np.prod(forma))
+        if info["offset"] + 8 * n > len(datos):
+            raise ValueError(f"{path} está truncado")
+        # Vista de solo lectura sobre el mapeo: sin copia por proceso
+        arrays[nombre] = np.frombuffer(datos, dtype="<f8", count=n, offset=info["offset"]).reshape(forma)
+
+    return LinearCalibratedModel(
+        classes_=np.asarray(descriptor["classes"], dtype=str),
+        n_folds=int(descriptor["n_folds"]),
+        version=str(descriptor["version"]),
+        **arrays,
+    )
+
+
+def _load_npz(path: Path) -> LinearCalibratedModel:
+    with np.load(path, allow_pickle=False) as data:
+        return LinearCalibratedModel(
+            classes_=data["classes_"],
+            coef=data["coef"],
+            intercept=data["intercept"],
+            sig_a=data["sig_a"],
+            sig_b=data["sig_b"],
+            valid=data["valid"],
+            n_folds=int(data["n_folds"]),
+            version=str(data["version"]),
+        )
+
+
+def load_linear_model(path: str | os.PathLike) -> LinearCalibratedModel:
+    """Mapea un modelo en formato plano; los ``.npz`` de versiones anteriores se leen en memoria."""
+    p = Path(path)
+    with open(p, "rb") as f:
+        magia = f.read(len(MAGIA))
+    return _load_mapped(p) if magia == MAGIA else _load_npz(p)
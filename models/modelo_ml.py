@@ -1,19 +1,28 @@
 from __future__ import annotations
 
 import json
+import os
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Sequence, Tuple
 
 import numpy as np
-from joblib import dump, load
-from sklearn.linear_model import SGDClassifier
-from sklearn.preprocessing import StandardScaler
-from sklearn.calibration import CalibratedClassifierCV
 
-from models.entrenamiento import FEATURE_COLUMNS, TARGET_COLUMN, cargar_datos
-from models.buffer import load_buffer, clear_buffer
+from models.entrenamiento import FEATURE_COLUMNS, TARGET_COLUMN, cargar_matriz_datos, construir_metadatos_dataset
+from models.buffer import claim_buffer, release_claim
+from models.inferencia_lineal import LinearCalibratedModel, export_linear_model, load_linear_model, save_linear_model
+from utils.metricas import medir
+
+if TYPE_CHECKING:
+    # scikit-learn y joblib solo se importan al entrenar o si falta el modelo lineal
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.preprocessing import StandardScaler
+
+# Con el modelo lineal exportado, las predicciones no pasan por scikit-learn
+USE_LINEAR_INFERENCE = os.getenv("CAREERMATE_LINEAR_INFERENCE", "1") != "0"
 
 
 @dataclass(frozen=True)
@@ -27,31 +36,113 @@ def _artifact_dir() -> Path:
     return Path(__file__).resolve().parent / "artifacts"
 
 
-def _paths() -> dict[str, Path]:
-    d = _artifact_dir()
+def _paths(artifact_dir: Path | None = None) -> dict[str, Path]:
+    d = artifact_dir if artifact_dir is not None else _artifact_dir()
     return {
         "dir": d,
         "scaler": d / "career_scaler.joblib",
         "model": d / "career_model.joblib",
         "meta": d / "career_meta.json",
+        "linear": d / "career_linear.bin",
+        "samples": d / "buffer_samples.npz",
+        "versions": d / "versions",
+        "active": d / "ACTIVE",
     }
 
 
-def _load_meta() -> dict:
-    p = _paths()["meta"]
+# Versiones publicadas por el reentrenamiento que se conservan en disco
+KEEP_VERSIONS = 3
+
+
+def _active_dir(artifact_dir: Path | None = None) -> Path:
+    """
+    Directorio con los artefactos activos.
+
+    Los reentrenamientos publican cada modelo en ``versions/<version>/`` y
+    luego reemplazan atómicamente el puntero ``ACTIVE``; sin puntero se usan
+    los artefactos del directorio base (entrenamiento inicial).
+    """
+    ps = _paths(artifact_dir)
+    try:
+        nombre = ps["active"].read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return ps["dir"]
+    d = ps["versions"] / nombre
+    return d if nombre and d.is_dir() else ps["dir"]
+
+
+def _set_active_version(version: str, artifact_dir: Path | None = None) -> None:
+    ps = _paths(artifact_dir)
+    tmp = ps["active"].with_name(f"ACTIVE.{os.getpid()}.tmp")
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, ps["active"])
+
+
+def _prune_versions(artifact_dir: Path | None = None, keep: int = KEEP_VERSIONS) -> None:
+    """Borra versiones antiguas; nunca la activa ni las ``keep`` más recientes."""
+    import shutil
+
+    ps = _paths(artifact_dir)
+    if not ps["versions"].is_dir():
+        return
+    activa = _active_dir(artifact_dir)
+    versiones = sorted(d for d in ps["versions"].iterdir() if d.is_dir() and not d.name.startswith("."))
+    for d in versiones[:-keep] if keep > 0 else versiones:
+        if d != activa:
+            shutil.rmtree(d, ignore_errors=True)
+
+
+def _load_meta(artifact_dir: Path | None = None) -> dict:
+    p = _paths(artifact_dir)["meta"]
     if not p.exists():
         return {}
     return json.loads(p.read_text(encoding="utf-8"))
 
 
-def _save_meta(meta: dict) -> None:
-    p = _paths()["meta"]
+def _save_meta(meta: dict, artifact_dir: Path | None = None) -> None:
+    p = _paths(artifact_dir)["meta"]
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
-def artifacts_exist() -> bool:
-    ps = _paths()
+def _new_version() -> str:
+    return datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def _meta_version(meta: dict) -> str:
+    return str(meta.get("version") or meta.get("trained_at") or "unknown")
+
+
+def _export_linear(
+    scaler: StandardScaler, clf: CalibratedClassifierCV, version: str, artifact_dir: Path | None = None
+) -> LinearCalibratedModel | None:
+    """
+    Exporta el modelo lineal mapeable junto a los joblib (misma versión que el
+    meta). Retorna None si la calibración no es sigmoide: ese modelo se sirve
+    con el pipeline sklearn.
+    """
+    if getattr(clf, "method", None) != "sigmoid":
+        return None
+    linear = export_linear_model(scaler, clf, version=version)
+    save_linear_model(linear, _paths(artifact_dir)["linear"])
+    return linear
+
+
+def _load_current_linear(artifact_dir: Path | None = None) -> LinearCalibratedModel | None:
+    """
+    Mapea el modelo lineal si existe y corresponde a la versión del meta. Las
+    páginas del archivo son compartidas entre todos los workers que lo mapean.
+    """
+    p = _paths(artifact_dir)["linear"]
+    meta = _load_meta(artifact_dir)
+    if not p.exists() or not meta.get("calibrated", False):
+        return None
+    linear = load_linear_model(p)
+    return linear if linear.version == _meta_version(meta) else None
+
+
+def artifacts_exist(artifact_dir: Path | None = None) -> bool:
+    ps = _paths(artifact_dir)
     return ps["scaler"].exists() and ps["model"].exists() and ps["meta"].exists()
 
 
@@ -59,55 +150,85 @@ def artifacts_exist() -> bool:
 # TRAINING
 # =========================
 
-def train_and_save(csv_path: str | None = None) -> ModelArtifacts:
-    df = cargar_datos(csv_path)
+# Hiperparámetros del entrenamiento inicial. La búsqueda
+# (``models.busqueda_hiperparametros``) guarda los elegidos en el meta y los
+# reentrenamientos posteriores los reutilizan.
+HIPERPARAMETROS_BASE = {"loss": "log_loss", "penalty": "l2", "alpha": 5e-5, "tol": 1e-4, "method": "sigmoid", "cv": 3}
 
-    X = df[FEATURE_COLUMNS].to_numpy(dtype=float)
-    y = df[TARGET_COLUMN].astype(str).to_numpy()
 
-    scaler = StandardScaler()
-    Xs = scaler.fit_transform(X)
+def construir_clasificador(hiperparametros: dict | None = None, cv=None) -> CalibratedClassifierCV:
+    """
+    SGD calibrado con ``hiperparametros`` sobre ``HIPERPARAMETROS_BASE``.
+    ``cv`` reemplaza la cantidad de folds (p. ej. particiones precalculadas).
+    """
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.linear_model import SGDClassifier
 
+    h = {**HIPERPARAMETROS_BASE, **(hiperparametros or {})}
     base_clf = SGDClassifier(
-        loss="log_loss",
-        penalty="l2",
-        alpha=5e-5,
+        loss=h["loss"],
+        penalty=h["penalty"],
+        alpha=float(h["alpha"]),
         max_iter=5000,
-        tol=1e-4,
+        tol=float(h["tol"]),
         random_state=42,
     )
+    return CalibratedClassifierCV(base_clf, method=h["method"], cv=int(h["cv"]) if cv is None else cv)
+
+
+def train_and_save(csv_path: str | None = None, artifact_dir: Path | None = None) -> ModelArtifacts:
+    from joblib import dump
+    from sklearn.preprocessing import StandardScaler
+
+    datos = cargar_matriz_datos(csv_path)
 
-    clf = CalibratedClassifierCV(base_clf, method="sigmoid", cv=3)
+    X = datos.X
+    y = datos.etiquetas()
+
+    scaler = StandardScaler()
+    Xs = scaler.fit_transform(X)
+
+    clf = construir_clasificador()
     clf.fit(Xs, y)
 
-    ps = _paths()
+    ps = _paths(artifact_dir)
     ps["dir"].mkdir(parents=True, exist_ok=True)
     dump(scaler, ps["scaler"])
     dump(clf, ps["model"])
 
+    version = _new_version()
+    _export_linear(scaler, clf, version, artifact_dir)
     _save_meta(
         {
+            "version": version,
             "trained_at": datetime.utcnow().isoformat() + "Z",
             "n_samples": int(X.shape[0]),
             "feature_columns": list(FEATURE_COLUMNS),
             "target_column": TARGET_COLUMN,
             "classes": clf.classes_.tolist(),
             "calibrated": True,
-        }
+        },
+        artifact_dir,
     )
 
+    if csv_path is None:
+        # Reutiliza la matriz ya cargada para dejar listos los metadatos de arranque
+        construir_metadatos_dataset(datos)
+
     return ModelArtifacts(scaler=scaler, classifier=clf, classes_=clf.classes_)
 
 
-def load_or_train(csv_path: str | None = None) -> ModelArtifacts:
-    if not artifacts_exist():
-        return train_and_save(csv_path)
+def load_or_train(csv_path: str | None = None, artifact_dir: Path | None = None) -> ModelArtifacts:
+    if not artifacts_exist(artifact_dir):
+        return train_and_save(csv_path, artifact_dir)
 
-    meta = _load_meta()
+    meta = _load_meta(artifact_dir)
     if not meta.get("calibrated", False):
-        return train_and_save(csv_path)
+        return train_and_save(csv_path, artifact_dir)
+
+    from joblib import load
 
-    ps = _paths()
+    ps = _paths(artifact_dir)
     scaler: StandardScaler = load(ps["scaler"])
     clf: CalibratedClassifierCV = load(ps["model"])
     classes_ = np.array(meta.get("classes", []), dtype=str)
@@ -115,6 +236,153 @@ def load_or_train(csv_path: str | None = None) -> ModelArtifacts:
     return ModelArtifacts(scaler=scaler, classifier=clf, classes_=classes_)
 
 
+# =========================
+# MODEL REGISTRY
+# =========================
+
+REGISTRY_CHECK_INTERVAL = float(os.getenv("CAREERMATE_MODEL_CHECK_INTERVAL", "2.0"))
+
+
+@dataclass(frozen=True)
+class ActiveModel:
+    artifacts: ModelArtifacts | None
+    version: str
+    signature: tuple
+    loaded_at: float
+    linear: LinearCalibratedModel | None = None
+
+    @property
+    def classes_(self) -> np.ndarray:
+        if self.linear is not None:
+            return self.linear.classes_
+        return self.artifacts.classifier.classes_.astype(str)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilidades calibradas; usa el modelo lineal en NumPy si está disponible."""
+        if self.linear is not None:
+            return self.linear.predict_proba(X)
+        return self.artifacts.classifier.predict_proba(self.artifacts.scaler.transform(X))
+
+
+def _artifact_signature(artifact_dir: Path | None = None) -> tuple:
+    """
+    Huella barata de los artefactos en disco: directorio activo y
+    (mtime_ns, tamaño) de cada archivo. Cambia cuando se publica una versión
+    nueva o un entrenamiento reescribe cualquiera de ellos. El inodo entra en
+    la huella porque los archivos se reemplazan con ``os.replace``.
+    """
+    d = _active_dir(artifact_dir)
+    ps = _paths(d)
+    firma: list = [str(d)]
+    for key in ("scaler", "model", "meta", "linear"):
+        try:
+            st = ps[key].stat()
+            firma.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            firma.append(None)
+    return tuple(firma)
+
+
+class ModelRegistry:
+    """
+    Mantiene los artefactos del modelo residentes en el proceso.
+
+    Los joblib se cargan una sola vez; como máximo cada ``check_interval``
+    segundos se compara la huella de los archivos en disco y, si cambió, se
+    carga la nueva versión completa antes de reemplazar la referencia activa
+    (las predicciones en curso siguen usando la versión anterior).
+    """
+
+    def __init__(self, artifact_dir: Path | None = None, check_interval: float = REGISTRY_CHECK_INTERVAL):
+        self.artifact_dir = artifact_dir
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # Contador propio: _lock se sostiene durante una carga y get() no debe esperarla
+        self._lock_contadores = threading.Lock()
+        self._active: ActiveModel | None = None
+        self._last_check = float("-inf")
+        self._load_count = 0
+        self._load_seconds_total = 0.0
+        self._last_load_seconds = 0.0
+        self._requests = 0
+
+    def get(self) -> ActiveModel:
+        with self._lock_contadores:
+            self._requests += 1
+        active = self._active
+        if active is not None and time.monotonic() - self._last_check < self.check_interval:
+            return active
+
+        with self._lock:
+            firma = _artifact_signature(self.artifact_dir)
+            active = self._active
+            if active is None or firma != active.signature:
+                active = self._load(firma)
+                self._active = active
+            self._last_check = time.monotonic()
+            return active
+
+    def _load(self, firma: tuple) -> ActiveModel:
+        """Carga la versión activa; ``firma`` es la huella ya calculada en ``get``."""
+        inicio = time.perf_counter()
+        d = _active_dir(self.artifact_dir)
+        art = None
+        linear = _load_current_linear(d) if USE_LINEAR_INFERENCE else None
+        if linear is None:
+            art = load_or_train(artifact_dir=d)
+            if USE_LINEAR_INFERENCE:
+                # Artefactos anteriores al modelo lineal: exportarlo una vez
+                version = _meta_version(_load_meta(d))
+                try:
+                    linear = _export_linear(art.scaler, art.classifier, version, d)
+                    # Se escribió el .bin: la huella calculada en get() ya no vale
+                    firma = _artifact_signature(self.artifact_dir)
+                except OSError:
+                    linear = export_linear_model(art.scaler, art.classifier, version=version)
+        meta = _load_meta(d)
+        elapsed = time.perf_counter() - inicio
+
+        self._load_count += 1
+        self._load_seconds_total += elapsed
+        self._last_load_seconds = elapsed
+
+        return ActiveModel(
+            artifacts=art,
+            version=_meta_version(meta),
+            signature=firma,
+            loaded_at=time.time(),
+            linear=linear,
+        )
+
+    def invalidate(self) -> None:
+        """Fuerza la verificación de artefactos en la próxima llamada a ``get``."""
+        with self._lock:
+            self._last_check = float("-inf")
+
+    def stats(self) -> dict:
+        active = self._active
+        return {
+            "version": active.version if active else None,
+            "load_count": self._load_count,
+            "load_seconds_total": self._load_seconds_total,
+            "last_load_seconds": self._last_load_seconds,
+            "requests": self._requests,
+        }
+
+
+_REGISTRY = ModelRegistry()
+
+
+def get_active_model() -> ActiveModel:
+    """Modelo activo del proceso; solo toca disco cuando cambian los artefactos."""
+    return _REGISTRY.get()
+
+
+def registry_stats() -> dict:
+    """Contadores de carga del registro (cantidad de cargas y latencia)."""
+    return _REGISTRY.stats()
+
+
 # =========================
 # PREDICTION
 # =========================
@@ -131,11 +399,12 @@ def predict_top(X: np.ndarray, top: int = 3, carreras_permitidas: List[str] | No
     Returns:
         Lista de tuplas (carrera, probabilidad)
     """
-    art = load_or_train()
+    with medir("carga_modelo"):
+        active = get_active_model()
 
-    Xs = art.scaler.transform(X)
-    proba = art.classifier.predict_proba(Xs)[0]
-    labels = art.classifier.classes_.astype(str)
+    with medir("predict_proba"):
+        proba = active.predict_proba(X)[0]
+    labels = active.classes_
 
     # Aplicar filtro de carreras antes de cualquier ranking
     if carreras_permitidas is not None:
@@ -164,48 +433,213 @@ def predict_top(X: np.ndarray, top: int = 3, carreras_permitidas: List[str] | No
     return pairs[:top]
 
 
+def predict_top_batch(
+    X: np.ndarray,
+    top: int | Sequence[int] = 3,
+    carreras_permitidas: Sequence[Sequence[str] | None] | None = None,
+    modelo: ActiveModel | None = None,
+) -> List[List[Tuple[str, float]]]:
+    """
+    Versión por lotes de ``predict_top``: una sola llamada a ``predict_proba``
+    para las N filas y ranking enmascarado vectorizado.
+
+    Args:
+        X: Matriz de features (N, n_features)
+        top: Número de recomendaciones (global o una por fila)
+        carreras_permitidas: Lista opcional de carreras permitidas por fila
+        modelo: Modelo a usar en lugar del activo (p. ej. evaluación offline)
+
+    Returns:
+        Por cada fila, la misma lista de tuplas que retornaría ``predict_top``
+    """
+    active = modelo if modelo is not None else get_active_model()
+
+    n = X.shape[0]
+    if n == 0:
+        return []
+
+    proba = active.predict_proba(X)
+    labels = active.classes_
+    tops = np.broadcast_to(np.asarray(top, dtype=int), (n,))
+
+    # Máscara (N, n_clases): filtro por fila o umbral 0.05 si no hay filtro
+    mask = proba >= 0.05
+    if carreras_permitidas is not None:
+        cache: dict[tuple, np.ndarray] = {}
+        for i, permitidas in enumerate(carreras_permitidas):
+            if permitidas is None:
+                continue
+            key = tuple(permitidas)
+            fila = cache.get(key)
+            if fila is None:
+                fila = np.isin(labels, np.array(permitidas, dtype=str))
+                cache[key] = fila
+            mask[i] = fila
+
+    masked = np.where(mask, proba, -np.inf)
+    orden = np.argsort(-masked, axis=1, kind="stable")
+    ordenadas = np.take_along_axis(masked, orden, axis=1)
+    n_validas = mask.sum(axis=1)
+
+    # Regla de híbridos: si top-1 y top-2 están a menos de 0.25, se renormalizan
+    hibrido = np.zeros(n, dtype=bool)
+    if ordenadas.shape[1] >= 2:
+        p1, p2 = ordenadas[:, 0], ordenadas[:, 1]
+        with np.errstate(invalid="ignore"):
+            hibrido = (n_validas >= 2) & (np.abs(p1 - p2) < 0.25) & (p1 + p2 > 0)
+
+    resultados: List[List[Tuple[str, float]]] = []
+    for i in range(n):
+        if hibrido[i]:
+            p1, p2 = float(ordenadas[i, 0]), float(ordenadas[i, 1])
+            total = p1 + p2
+            resultados.append([
+                (labels[orden[i, 0]], p1 / total),
+                (labels[orden[i, 1]], p2 / total),
+            ])
+            continue
+
+        k = min(int(n_validas[i]), int(tops[i]))
+        resultados.append([(labels[orden[i, j]], float(ordenadas[i, j])) for j in range(k)])
+
+    return resultados
+
+
 # =========================
 # BUFFER RETRAINING
 # =========================
 
-def retrain_from_buffer() -> bool:
-    buffer_data = load_buffer()
-    if not buffer_data:
-        return False
-
-    df = cargar_datos()
-    X_base = df[FEATURE_COLUMNS].to_numpy(dtype=float)
-    y_base = df[TARGET_COLUMN].astype(str).to_numpy()
+def retrain_from_buffer(artifact_dir: Path | None = None, force: bool = False) -> bool:
+    """
+    Reentrena con el dataset base más las muestras del buffer y publica el
+    resultado como una versión nueva. Pensado para correr fuera del request
+    (ver ``models.reentrenamiento``); las predicciones en curso siguen usando
+    la versión anterior hasta que el registro detecta el nuevo puntero.
 
+    Con ``force`` se hace un reajuste completo aunque el buffer esté vacío
+    (p. ej. cuando el modelo incremental se alejó demasiado).
+    """
+    claim = claim_buffer()
+    if claim is None:
+        return _retrain_version([], artifact_dir, force=True) if force else False
+
+    buffer_data, claim_path = claim
+    try:
+        trained = _retrain_version(buffer_data, artifact_dir)
+    except Exception:
+        release_claim(claim_path, restore=True)
+        raise
+    release_claim(claim_path)
+    return trained
+
+
+def buffer_rows(buffer_data: list) -> Tuple[np.ndarray, np.ndarray]:
+    """Filas de entrenamiento del buffer: cada muestra se repite por etiqueta."""
     X_extra, y_extra = [], []
-
     for item in buffer_data:
         for label in item["labels"]:
             X_extra.append(item["features"])
             y_extra.append(label)
+    return np.array(X_extra, dtype=float).reshape(-1, len(FEATURE_COLUMNS)), np.array(y_extra, dtype=str)
+
+
+def load_samples(artifact_dir: Path | None = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Muestras del buffer acumuladas en una versión publicada (vacías si no hay)."""
+    p = _paths(artifact_dir)["samples"]
+    if not p.exists():
+        return np.empty((0, len(FEATURE_COLUMNS))), np.empty(0, dtype=str)
+    with np.load(p, allow_pickle=False) as prev:
+        return prev["X"], prev["y"]
 
-    if not X_extra:
+
+def _retrain_version(buffer_data: list, artifact_dir: Path | None = None, force: bool = False) -> bool:
+    X_extra, y_extra = buffer_rows(buffer_data)
+    if not len(X_extra) and not force:
         return False
 
-    X = np.vstack([X_base, np.array(X_extra)])
-    y = np.concatenate([y_base, np.array(y_extra)])
+    from sklearn.preprocessing import StandardScaler
+
+    # Las muestras de reentrenamientos anteriores viajan con cada versión
+    activa = _active_dir(artifact_dir)
+    X_prev, y_prev = load_samples(activa)
+    X_muestras = np.vstack([X_prev, X_extra])
+    y_muestras = np.concatenate([y_prev, y_extra])
+
+    datos = cargar_matriz_datos()
+    X = np.vstack([datos.X, X_muestras])
+    y = np.concatenate([datos.etiquetas(), y_muestras])
 
     scaler = StandardScaler()
     Xs = scaler.fit_transform(X)
 
-    base_clf = SGDClassifier(
-        loss="log_loss",
-        alpha=5e-5,
-        max_iter=5000,
-        random_state=42,
+    # Sin búsqueda previa se usa la tolerancia por defecto de SGD (reajuste más rápido)
+    clf = construir_clasificador({"tol": 1e-3, **(_load_meta(activa).get("hyperparameters") or {})})
+    clf.fit(Xs, y)
+
+    publish_version(
+        scaler,
+        clf,
+        {
+            "n_samples": int(X.shape[0]),
+            "n_buffer_samples": int(X_muestras.shape[0]),
+            # Reajuste completo: reinicia el estado del modo incremental
+            "refit_version": None,
+            "incremental_batches": 0,
+            "drift": None,
+        },
+        artifact_dir,
+        samples=(X_muestras, y_muestras),
     )
+    return True
 
-    clf = CalibratedClassifierCV(base_clf, method="sigmoid", cv=3)
-    clf.fit(Xs, y)
 
-    ps = _paths()
+def publish_version(
+    scaler: StandardScaler,
+    clf: CalibratedClassifierCV,
+    meta_updates: dict,
+    artifact_dir: Path | None = None,
+    samples: Tuple[np.ndarray, np.ndarray] | None = None,
+    extra_files: dict[str, Path] | None = None,
+) -> str:
+    """
+    Publica un modelo entrenado como versión nueva y lo activa.
+
+    Todo se escribe en un directorio temporal y se publica con dos renombres
+    atómicos (el directorio de la versión y luego el puntero ``ACTIVE``), así
+    ningún lector ve archivos a medio escribir. ``extra_files`` se copian al
+    directorio de la versión con el nombre indicado. Retorna la versión.
+    """
+    import shutil
+
+    from joblib import dump
+
+    version = _new_version()
+    versions_dir = _paths(artifact_dir)["versions"]
+    tmp_dir = versions_dir / f".{version}.tmp"
+    ps = _paths(tmp_dir)
+    ps["dir"].mkdir(parents=True, exist_ok=True)
     dump(scaler, ps["scaler"])
     dump(clf, ps["model"])
+    if samples is not None:
+        np.savez(ps["samples"], X=samples[0], y=samples[1])
+    _export_linear(scaler, clf, version, tmp_dir)
+    for nombre, origen in (extra_files or {}).items():
+        shutil.copy2(origen, tmp_dir / nombre)
+
+    meta = _load_meta(_active_dir(artifact_dir))
+    meta.update(meta_updates)
+    meta.update(
+        {
+            "version": version,
+            "trained_at": datetime.utcnow().isoformat() + "Z",
+            "classes": clf.classes_.tolist(),
+            "calibrated": True,
+        }
+    )
+    _save_meta(meta, tmp_dir)
 
-    clear_buffer()
-    return True
+    os.replace(tmp_dir, versions_dir / version)
+    _set_active_version(version, artifact_dir)
+    _prune_versions(artifact_dir)
+    _REGISTRY.invalidate()
+    return version
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict, List, Tuple, cast
+import time
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import TYPE_CHECKING, Dict, List, Tuple, cast
 
 import numpy as np
 
+from models.cache_respuestas import CacheRespuestas, clave_respuestas
 from models.carreras import CARRERAS_OBJETIVO
-from models.entrenamiento import FEATURE_COLUMNS, obtener_limites_features
+from models.entrenamiento import FEATURE_COLUMNS, obtener_feature_space
+from utils.metricas import medir
+
+if TYPE_CHECKING:
+    from models.ejes_profesionales import ResultadoEjeBatch
 
 SOFT_FEATURES = {
     "Openness", "Conscientousness", "Extraversion", "Agreeableness",
@@ -95,6 +103,114 @@ MACRO_CARRERAS = {
     },
 }
 
+# Índices de columnas para las rutas por lotes
+_IDX_TECNICAS = np.array([i for i, c in enumerate(FEATURE_COLUMNS) if c in TECHNICAL_FEATURES], dtype=int)
+_IDX_BLANDAS = np.array([i for i, c in enumerate(FEATURE_COLUMNS) if c in SOFT_FEATURES], dtype=int)
+
+# Requisitos mínimos compilados: una fila por carrera y una columna por feature
+CARRERAS_REQUISITOS: Tuple[str, ...] = tuple(CARRERAS_OBJETIVO) + tuple(
+    c for c in REQUISITOS_MINIMOS if c not in CARRERAS_OBJETIVO
+)
+INDICE_CARRERAS_REQUISITOS = {c: i for i, c in enumerate(CARRERAS_REQUISITOS)}
+
+
+def compilar_requisitos(requisitos: Dict[str, Dict[str, float]] | None = None) -> np.ndarray:
+    """
+    Matriz de umbrales (``CARRERAS_REQUISITOS``, n_features); -inf donde la
+    carrera no exige mínimo, así esa columna siempre se cumple.
+    """
+    if requisitos is None:
+        requisitos = REQUISITOS_MINIMOS
+    umbrales = np.full((len(CARRERAS_REQUISITOS), len(FEATURE_COLUMNS)), -np.inf)
+    for carrera, minimos in requisitos.items():
+        for feature, minimo in minimos.items():
+            umbrales[INDICE_CARRERAS_REQUISITOS[carrera], FEATURE_COLUMNS.index(feature)] = minimo
+    umbrales.setflags(write=False)
+    return umbrales
+
+
+MATRIZ_REQUISITOS = compilar_requisitos()
+
+# Solo las features con algún mínimo participan de la comparación
+_COLUMNAS_REQUISITOS = np.flatnonzero(np.isfinite(MATRIZ_REQUISITOS).any(axis=0))
+_UMBRALES_REQUISITOS = np.ascontiguousarray(MATRIZ_REQUISITOS[:, _COLUMNAS_REQUISITOS])
+
+LAPLACE_ALPHA = 0.1
+
+
+@dataclass(frozen=True)
+class TensorPreguntas:
+    """
+    Cuestionario compilado para construir vectores con gathers de NumPy.
+    La opción ``opcion_vacia`` de cada pregunta es todo ceros (sin responder).
+    """
+    pesos: np.ndarray            # (preguntas, opciones + 1, features): delta * informatividad
+    cobertura: np.ndarray        # (preguntas, opciones + 1, features): informatividad aportada
+    informatividad: np.ndarray   # (preguntas,)
+    mascara_tipo: np.ndarray     # (preguntas, features): features permitidas por el tipo
+    n_opciones: np.ndarray       # (preguntas,)
+    base: np.ndarray             # (features,): valor base por feature
+    opcion_vacia: int
+
+
+def compilar_tensor_preguntas(preguntas: List[dict] | None = None) -> TensorPreguntas:
+    """
+    Compila las preguntas (por defecto ``PREGUNTAS_BASE``) en tensores densos.
+    Solo se consideran las features permitidas por el tipo de pregunta:
+    técnicas → features técnicas, blandas → features de personalidad.
+    """
+    from models.preguntas import PREGUNTAS_BASE
+
+    if preguntas is None:
+        preguntas = PREGUNTAS_BASE
+
+    indice = {col: j for j, col in enumerate(FEATURE_COLUMNS)}
+    n_preguntas = len(preguntas)
+    n_opciones = np.array([len(p.get("opciones", [])) for p in preguntas], dtype=np.int64)
+    opcion_vacia = int(n_opciones.max()) if n_preguntas else 0
+
+    pesos = np.zeros((n_preguntas, opcion_vacia + 1, len(FEATURE_COLUMNS)))
+    cobertura = np.zeros_like(pesos)
+    informatividad = np.zeros(n_preguntas)
+    mascara_tipo = np.zeros((n_preguntas, len(FEATURE_COLUMNS)), dtype=bool)
+
+    for q, pregunta in enumerate(preguntas):
+        informatividad[q] = float(pregunta.get("informatividad", 0.5))
+        tipo = cast(str, pregunta.get("tipo", ""))
+        if tipo == "tecnica":
+            permitidas = TECHNICAL_FEATURES
+        elif tipo == "blanda":
+            permitidas = SOFT_FEATURES
+        else:
+            permitidas = set(FEATURE_COLUMNS)
+        for col in permitidas:
+            mascara_tipo[q, indice[col]] = True
+
+        for o, opcion in enumerate(pregunta.get("opciones", [])):
+            for feature_name, delta in cast(Dict[str, float], opcion.get("pesos", {})).items():
+                j = indice.get(feature_name)
+                if j is not None and mascara_tipo[q, j]:
+                    pesos[q, o, j] += float(delta) * informatividad[q]
+                    cobertura[q, o, j] += informatividad[q]
+
+    base = np.array([0.8 if col in SOFT_FEATURES else 1.5 for col in FEATURE_COLUMNS])
+
+    for arr in (pesos, cobertura, informatividad, mascara_tipo, n_opciones, base):
+        arr.setflags(write=False)
+
+    return TensorPreguntas(
+        pesos=pesos,
+        cobertura=cobertura,
+        informatividad=informatividad,
+        mascara_tipo=mascara_tipo,
+        n_opciones=n_opciones,
+        base=base,
+        opcion_vacia=opcion_vacia,
+    )
+
+
+TENSOR_PREGUNTAS = compilar_tensor_preguntas()
+
 CREATIVE_CAREERS = MACRO_CARRERAS["creativo"]
 SUPPORT_CAREERS = MACRO_CARRERAS["soporte"] | {"Application Support Engineer", "Helpdesk Engineer"}
 logger = logging.getLogger(__name__)
@@ -170,31 +286,23 @@ def clasificar_macro_perfil(perfil: Dict[str, float]) -> str:
     return "tecnico_operativo"
 
 
-def normalizar_minmax(vector: np.ndarray) -> np.ndarray:
+def normalizar_minmax(vector: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
     """
     Normaliza el vector al rango [0,1] usando límites del CSV.
     Esto reduce el ruido de escala y mejora la compatibilidad con el modelo.
     """
     try:
-        bounds = obtener_limites_features()
-        mins = np.array([bounds[col][0] for col in FEATURE_COLUMNS], dtype=float)
-        maxs = np.array([bounds[col][1] for col in FEATURE_COLUMNS], dtype=float)
-        rango = maxs - mins
-        rango[rango < 1e-6] = 1.0
-        return (vector - mins) / rango
+        return obtener_feature_space().normalize(vector, out=out)
     except Exception:
         return vector
 
 
-def desnormalizar_minmax(vector: np.ndarray) -> np.ndarray:
+def desnormalizar_minmax(vector: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
     """
     Revierte la normalización min-max al rango original.
     """
     try:
-        bounds = obtener_limites_features()
-        mins = np.array([bounds[col][0] for col in FEATURE_COLUMNS], dtype=float)
-        maxs = np.array([bounds[col][1] for col in FEATURE_COLUMNS], dtype=float)
-        return vector * (maxs - mins) + mins
+        return obtener_feature_space().denormalize(vector, out=out)
     except Exception:
         return vector
 
@@ -208,19 +316,61 @@ def normalizar_por_especializacion(vector: np.ndarray, perfil: Dict[str, float])
     if dominancia < 0.35:
         return vector
 
-    vector_norm = normalizar_minmax(vector)
+    try:
+        espacio = obtener_feature_space()
+    except Exception:
+        return vector
+
+    # Todas las operaciones reutilizan dos buffers: resultado y factor
+    vector_norm = espacio.normalize(vector)
     mean_val = np.mean(vector_norm)
 
     if mean_val < 0.01:
         return vector
 
-    above_mean = np.maximum(0.0, vector_norm - mean_val)
-    relative = above_mean / (mean_val + 1e-6)
-    factor_amplificacion = 1.0 + 0.3 * dominancia * relative
-    vector_ajustado = vector_norm * factor_amplificacion
-    vector_ajustado = np.clip(vector_ajustado, 0.0, 1.0)
+    factor_amplificacion = _factor_amplificacion(vector_norm, mean_val, 0.3 * dominancia)
+    np.multiply(vector_norm, factor_amplificacion, out=vector_norm)
+    np.clip(vector_norm, 0.0, 1.0, out=vector_norm)
+
+    return espacio.denormalize(vector_norm, out=vector_norm)
+
+
+def _factor_amplificacion(vector_norm: np.ndarray, mean_val, intensidad) -> np.ndarray:
+    """1 + intensidad * max(0, v - media) / media, calculado en un solo buffer."""
+    factor = np.subtract(vector_norm, mean_val)
+    np.maximum(factor, 0.0, out=factor)
+    np.divide(factor, mean_val + 1e-6, out=factor)
+    np.multiply(factor, intensidad, out=factor)
+    return np.add(factor, 1.0, out=factor)
+
+
+def _dominancia_tecnica_batch(X: np.ndarray) -> np.ndarray:
+    """``calcular_dominancia_tecnica`` para cada fila de X."""
+    tech = X[:, _IDX_TECNICAS]
+    tech_mean = tech.mean(axis=1)
+    soft_mean = X[:, _IDX_BLANDAS].mean(axis=1)
+    tech_std = tech.std(axis=1)
+
+    ratio = tech_mean / (soft_mean + 0.1)
+    spread = np.minimum(1.0, tech_std / 1.0)
+    return np.clip(ratio * 0.6 + spread * 0.4, 0.0, 1.0)
+
+
+def _normalizar_por_especializacion_batch(X: np.ndarray) -> np.ndarray:
+    """``normalizar_por_especializacion`` aplicado a N perfiles a la vez."""
+    dominancia = _dominancia_tecnica_batch(X)
 
-    return desnormalizar_minmax(vector_ajustado)
+    espacio = obtener_feature_space()
+    X_norm = espacio.normalize(X)
+    mean_val = X_norm.mean(axis=1, keepdims=True)
+
+    factor_amplificacion = _factor_amplificacion(X_norm, mean_val, 0.3 * dominancia[:, None])
+    np.multiply(X_norm, factor_amplificacion, out=X_norm)
+    np.clip(X_norm, 0.0, 1.0, out=X_norm)
+    ajustado = espacio.denormalize(X_norm, out=X_norm)
+
+    aplicar = (dominancia >= 0.35) & (mean_val[:, 0] >= 0.01)
+    return np.where(aplicar[:, None], ajustado, X)
 
 
 def filtrar_carreras_por_perfil(macro_perfil: str, dominancia: float) -> List[str]:
@@ -263,6 +413,48 @@ def cumple_requisitos_minimos(carrera: str, perfil: Dict[str, float]) -> Tuple[b
     return True, None
 
 
+def factibilidad_requisitos(X: np.ndarray) -> np.ndarray:
+    """
+    Factibilidad (N, carreras) de N perfiles en una sola comparación
+    contra ``MATRIZ_REQUISITOS``, con la misma regla que
+    ``cumple_requisitos_minimos``: se excluye la carrera si alguna feature
+    queda por debajo de su mínimo (``valor < minimo``, así un NaN no excluye).
+    Las columnas siguen el orden de ``CARRERAS_REQUISITOS``; con un solo
+    vector 1-D retorna (carreras,).
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        return ~(X[_COLUMNAS_REQUISITOS] < _UMBRALES_REQUISITOS).any(axis=1)
+    return ~(X[:, None, _COLUMNAS_REQUISITOS] < _UMBRALES_REQUISITOS[None, :, :]).any(axis=2)
+
+
+def _filtrar_por_requisitos(
+    pred: List[Tuple[str, float]], factible: np.ndarray, top: int
+) -> Tuple[List[Tuple[str, float]], List[str]]:
+    """Primeras ``top`` carreras factibles de ``pred`` y las excluidas antes de llegar a ellas."""
+    candidatos_filtrados: List[Tuple[str, float]] = []
+    excluidas: List[str] = []
+    for carrera, prob in pred:
+        col = INDICE_CARRERAS_REQUISITOS.get(carrera)
+        if col is None or factible[col]:
+            candidatos_filtrados.append((carrera, prob))
+            if len(candidatos_filtrados) >= top:
+                break
+        else:
+            excluidas.append(carrera)
+    return candidatos_filtrados, excluidas
+
+
+def _registrar_exclusiones(perfil: Dict[str, float] | np.ndarray, excluidas: List[str]) -> None:
+    """Loguea los motivos de exclusión; solo se formatean si INFO está habilitado."""
+    if not excluidas or not logger.isEnabledFor(logging.INFO):
+        return
+    if not isinstance(perfil, dict):
+        perfil = dict(zip(FEATURE_COLUMNS, np.asarray(perfil, dtype=float).ravel().tolist()))
+    motivos = [f"Excluida {c}: {cumple_requisitos_minimos(c, perfil)[1]}" for c in excluidas]
+    logger.info("Carreras filtradas por requisitos mínimos: %s", "; ".join(motivos))
+
+
 def construir_vector_usuario(respuestas: List[Tuple[int, int]]) -> np.ndarray:
     """
     Construye el vector de usuario con:
@@ -270,80 +462,107 @@ def construir_vector_usuario(respuestas: List[Tuple[int, int]]) -> np.ndarray:
     - Suavizado Laplace para evitar valores extremos
     - Filtrado z-score para reducir ruido/outliers
     """
-    from models.preguntas import obtener_pregunta
+    return _suavizar_y_acotar(_perfil_crudo(respuestas).reshape(1, -1))
 
-    personality_features = {
-        "Openness", "Conscientousness", "Extraversion", "Agreeableness",
-        "Emotional_Range", "Conversation", "Openness to Change",
-        "Hedonism", "Self-enhancement", "Self-transcendence"
-    }
 
-    soft_features = set(personality_features)
-    technical_features = set(FEATURE_COLUMNS) - soft_features
+def _perfil_crudo(respuestas: List[Tuple[int, int]]) -> np.ndarray:
+    """Perfil ponderado por informatividad + Laplace, antes del post-proceso."""
+    if not respuestas:
+        return _perfil_desde_acumulados(np.zeros(len(FEATURE_COLUMNS)), np.zeros(len(FEATURE_COLUMNS)))
 
-    # Inicializar acumuladores con suavizado Laplace (prior débil)
-    perfil_sum: Dict[str, float] = {col: 0.0 for col in FEATURE_COLUMNS}
-    perfil_weight: Dict[str, float] = {col: 0.0 for col in FEATURE_COLUMNS}
-    LAPLACE_ALPHA = 0.1
+    pares = np.asarray(respuestas, dtype=np.int64).reshape(-1, 2)
+    validas = _respuestas_validas(pares[:, 0], pares[:, 1])
+    q, o = pares[validas, 0], pares[validas, 1]
+    suma = TENSOR_PREGUNTAS.pesos[q, o].sum(axis=0)
+    peso = TENSOR_PREGUNTAS.cobertura[q, o].sum(axis=0)
+    return _perfil_desde_acumulados(suma, peso)
 
-    for idx_pregunta, idx_opcion in respuestas:
-        pregunta = obtener_pregunta(idx_pregunta)
-        if not pregunta:
-            continue
 
-        opciones = pregunta.get("opciones", [])
-        if not (0 <= idx_opcion < len(opciones)):
-            continue
+def _respuestas_validas(q: np.ndarray, o: np.ndarray) -> np.ndarray:
+    """Máscara de pares (pregunta, opción) dentro de rango; el resto se ignora."""
+    n_preguntas = TENSOR_PREGUNTAS.n_opciones.shape[0]
+    validas = (q >= 0) & (q < n_preguntas)
+    validas[validas] &= (o[validas] >= 0) & (o[validas] < TENSOR_PREGUNTAS.n_opciones[q[validas]])
+    return validas
 
-        opcion = opciones[idx_opcion]
-        pesos = cast(Dict[str, float], opcion.get("pesos", {}))
-        informatividad = float(pregunta.get("informatividad", 0.5))
 
-        tipo = cast(str, pregunta.get("tipo", ""))
-        if tipo == "tecnica":
-            allowed_features = technical_features
-        elif tipo == "blanda":
-            allowed_features = soft_features
-        else:
-            allowed_features = set(FEATURE_COLUMNS)
+def _perfil_desde_acumulados(suma: np.ndarray, peso: np.ndarray) -> np.ndarray:
+    # Suavizado Laplace (prior débil centrado en 0 sobre el valor base)
+    return TENSOR_PREGUNTAS.base + suma / (peso + LAPLACE_ALPHA)
 
-        for feature_name, delta in pesos.items():
-            if feature_name in perfil_sum and feature_name in allowed_features:
-                perfil_sum[feature_name] += float(delta) * informatividad
-                perfil_weight[feature_name] += informatividad
 
-    # Calcular perfil base ponderado por informatividad + Laplace
-    perfil: Dict[str, float] = {}
-    for col in FEATURE_COLUMNS:
-        base = 0.8 if col in personality_features else 1.5
-        total_weight = perfil_weight[col] + LAPLACE_ALPHA
-        perfil[col] = base + (perfil_sum[col] + LAPLACE_ALPHA * 0.0) / total_weight
+def _perfiles_crudos(lista_respuestas: List[List[Tuple[int, int]]]) -> np.ndarray:
+    """``_perfil_crudo`` para N cuestionarios con un único gather + suma por fila."""
+    n = len(lista_respuestas)
+    n_features = len(FEATURE_COLUMNS)
+    largos = np.fromiter((len(r) for r in lista_respuestas), dtype=np.int64, count=n)
+    suma = np.zeros((n, n_features))
+    peso = np.zeros((n, n_features))
 
-    # Construir vector crudo
-    vector = np.array([perfil[col] for col in FEATURE_COLUMNS], dtype=float)
+    total = int(largos.sum())
+    if total > 0:
+        planos = chain.from_iterable(chain.from_iterable(lista_respuestas))
+        pares = np.fromiter(planos, dtype=np.int64, count=2 * total).reshape(-1, 2)
+        validas = _respuestas_validas(pares[:, 0], pares[:, 1])
+        filas = np.repeat(np.arange(n), largos)[validas]
+        q, o = pares[validas, 0], pares[validas, 1]
 
-    # Reducción de ruido: amortiguar outliers con z-score clipping
-    mean_v = np.mean(vector)
-    std_v = np.std(vector)
-    if std_v > 0.01:
-        z_scores = (vector - mean_v) / std_v
-        Z_THRESHOLD = 2.5
-        vector = np.where(
-            np.abs(z_scores) > Z_THRESHOLD,
-            mean_v + np.sign(z_scores) * Z_THRESHOLD * std_v,
-            vector
-        )
+        # Las respuestas de cada fila son contiguas: suma segmentada con reduceat
+        if filas.size:
+            inicios = np.flatnonzero(np.r_[True, filas[1:] != filas[:-1]])
+            destino = filas[inicios]
+            suma[destino] = np.add.reduceat(TENSOR_PREGUNTAS.pesos[q, o], inicios, axis=0)
+            peso[destino] = np.add.reduceat(TENSOR_PREGUNTAS.cobertura[q, o], inicios, axis=0)
 
-    # Aplicar límites del CSV
+    return _perfil_desde_acumulados(suma, peso)
+
+
+def construir_matriz_desde_opciones(opciones: np.ndarray) -> np.ndarray:
+    """
+    Matriz de usuarios a partir de una matriz densa (N, n_preguntas) con el
+    índice de opción elegido por pregunta (-1 = sin responder).
+    """
+    opciones = np.asarray(opciones, dtype=np.int64)
+    n_preguntas = TENSOR_PREGUNTAS.n_opciones.shape[0]
+    q = np.broadcast_to(np.arange(n_preguntas), opciones.shape)
+    fuera_de_rango = (opciones < 0) | (opciones >= TENSOR_PREGUNTAS.n_opciones[None, :])
+    o = np.where(fuera_de_rango, TENSOR_PREGUNTAS.opcion_vacia, opciones)
+    suma = TENSOR_PREGUNTAS.pesos[q, o].sum(axis=1)
+    peso = TENSOR_PREGUNTAS.cobertura[q, o].sum(axis=1)
+    return _suavizar_y_acotar(_perfil_desde_acumulados(suma, peso))
+
+
+def _suavizar_y_acotar(M: np.ndarray) -> np.ndarray:
+    """
+    Post-proceso común a uno o N perfiles crudos (filas de M):
+    z-score clipping por fila y recorte a los límites del CSV.
+    """
+    # Reducción de ruido: amortiguar outliers con z-score clipping
+    mean_v = np.mean(M, axis=1, keepdims=True)
+    std_v = np.std(M, axis=1, keepdims=True)
+    Z_THRESHOLD = 2.5
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_scores = (M - mean_v) / std_v
+    recortar = (std_v > 0.01) & (np.abs(z_scores) > Z_THRESHOLD)
+    M = np.where(recortar, mean_v + np.sign(z_scores) * Z_THRESHOLD * std_v, M)
+
+    # Aplicar límites del CSV (M ya es un array nuevo: se recorta en sitio)
     try:
-        bounds = obtener_limites_features()
-        mins = np.array([bounds[col][0] for col in FEATURE_COLUMNS], dtype=float)
-        maxs = np.array([bounds[col][1] for col in FEATURE_COLUMNS], dtype=float)
-        vector = np.clip(vector, mins, maxs)
+        obtener_feature_space().clip(M, out=M)
     except Exception:
         pass
 
-    return vector.reshape(1, -1)
+    return M
+
+
+def construir_matriz_usuarios(lista_respuestas: List[List[Tuple[int, int]]]) -> np.ndarray:
+    """
+    Construye la matriz (N, n_features) de vectores de usuario para N cuestionarios.
+    Equivale a apilar ``construir_vector_usuario`` fila por fila.
+    """
+    if not lista_respuestas:
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=float)
+    return _suavizar_y_acotar(_perfiles_crudos(lista_respuestas))
 
 
 def generar_razones_recomendacion(perfil: Dict[str, float], carrera: str, macro_perfil: str) -> List[str]:
@@ -400,6 +619,9 @@ def generar_razones_recomendacion(perfil: Dict[str, float], carrera: str, macro_
     return razones[:4]  # Limitar a 4 razones máximo
 
 
+CACHE_RECOMENDACIONES = CacheRespuestas()
+
+
 def recomendar_carreras(respuestas: List[Tuple[int, int]], top: int = 3):
     """
     Sistema de recomendación jerárquico de dos etapas:
@@ -408,12 +630,34 @@ def recomendar_carreras(respuestas: List[Tuple[int, int]], top: int = 3):
     2. Ranking de carreras dentro del eje (scoring + ML refinado)
     
     Esto elimina la contaminación cruzada entre dominios incompatibles.
+    Los resultados se guardan en ``CACHE_RECOMENDACIONES`` por conjunto de
+    respuestas y versión del modelo.
     """
+    from models.modelo_ml import get_active_model
+
+    if not respuestas:
+        return []
+
+    with medir("recomendacion_total"):
+        pares = np.asarray(respuestas, dtype=np.int64).reshape(-1, 2)
+        pares = pares[_respuestas_validas(pares[:, 0], pares[:, 1])]
+        return CACHE_RECOMENDACIONES.obtener(
+            (clave_respuestas(pares), top),
+            get_active_model().version,
+            lambda: _recomendar_carreras(respuestas, top),
+        )
+
+
+def cache_stats() -> dict:
+    """Aciertos, fallos, desalojos e invalidaciones del cache de recomendaciones."""
+    return CACHE_RECOMENDACIONES.stats()
+
+
+def _recomendar_carreras(respuestas: List[Tuple[int, int]], top: int) -> List[dict]:
     from models.carreras import DESCRIPCIONES, obtener_imagen_carrera
     from models.modelo_ml import predict_top
     from models.ejes_profesionales import (
-        seleccionar_eje,
-        obtener_carreras_candidatas,
+        seleccionar_eje_batch,
         EJES_PROFESIONALES,
     )
 
@@ -421,50 +665,45 @@ def recomendar_carreras(respuestas: List[Tuple[int, int]], top: int = 3):
         return []
 
     # 1. Construir vector y perfil
-    vector_usuario = construir_vector_usuario(respuestas)
-    perfil: Dict[str, float] = {}
-    for i, col in enumerate(FEATURE_COLUMNS):
-        perfil[col] = float(vector_usuario[0, i])
+    with medir("vector"):
+        vector_usuario = construir_vector_usuario(respuestas)
+        perfil: Dict[str, float] = {}
+        for i, col in enumerate(FEATURE_COLUMNS):
+            perfil[col] = float(vector_usuario[0, i])
 
     # 2. ETAPA 1: Detección del eje profesional (matemática, NO ML)
-    resultado_eje = seleccionar_eje(perfil)
-    eje_info = EJES_PROFESIONALES.get(resultado_eje.eje_principal)
+    with medir("eje"):
+        ejes = seleccionar_eje_batch(vector_usuario)
+    eje_principal = ejes.eje_principal(0)
+    eje_secundario = ejes.eje_secundario(0)
+    es_hibrido = bool(ejes.es_hibrido[0])
+    confianza = float(ejes.confianza[0])
+    eje_info = EJES_PROFESIONALES.get(eje_principal)
 
     # 3. Obtener carreras candidatas (sin contaminación cruzada)
-    carreras_candidatas = obtener_carreras_candidatas(resultado_eje)
+    carreras_candidatas = ejes.carreras_candidatas(0)
 
     if not carreras_candidatas:
         carreras_candidatas = list(EJES_PROFESIONALES["soporte_gestion"].carreras)
 
     # 4. Normalizar vector para ML
-    vector_ajustado = normalizar_por_especializacion(vector_usuario, perfil)
+    with medir("normalizacion"):
+        vector_ajustado = normalizar_por_especializacion(vector_usuario, perfil)
 
     # 5. ETAPA 2: Ranking fino dentro del eje usando ML
     top_k = min(len(carreras_candidatas), max(top * 4, top))
-    pred = predict_top(
-        vector_ajustado,
-        top=top_k,
-        carreras_permitidas=carreras_candidatas
-    )
-
-    candidatos_filtrados: List[Tuple[str, float]] = []
-    exclusiones_internas: List[str] = []
-
-    for carrera, prob in pred:
-        cumple, motivo = cumple_requisitos_minimos(carrera, perfil)
-        if cumple:
-            candidatos_filtrados.append((carrera, prob))
-            if len(candidatos_filtrados) >= top:
-                break
-        else:
-            if motivo:
-                exclusiones_internas.append(f"Excluida {carrera}: {motivo}")
+    with medir("prediccion"):
+        pred = predict_top(
+            vector_ajustado,
+            top=top_k,
+            carreras_permitidas=carreras_candidatas
+        )
 
-    if exclusiones_internas:
-        logger.info(
-            "Carreras filtradas por requisitos mínimos: %s",
-            "; ".join(exclusiones_internas),
+    with medir("requisitos"):
+        candidatos_filtrados, excluidas = _filtrar_por_requisitos(
+            pred, factibilidad_requisitos(vector_usuario[0]), top
         )
+    _registrar_exclusiones(perfil, excluidas)
 
     # 6. Construir resultados con explicabilidad
     resultados = []
@@ -472,14 +711,14 @@ def recomendar_carreras(respuestas: List[Tuple[int, int]], top: int = 3):
         compatibilidad = int(round(max(0.0, min(1.0, prob)) * 100))
 
         # Generar razones explicativas
-        razones = generar_razones_recomendacion(perfil, carrera, resultado_eje.eje_principal)
+        razones = generar_razones_recomendacion(perfil, carrera, eje_principal)
         
         # Agregar explicación del eje
-        razones.append(f"Eje profesional: {eje_info.nombre if eje_info else resultado_eje.eje_principal}")
-        if resultado_eje.es_hibrido and resultado_eje.eje_secundario:
-            eje_sec = EJES_PROFESIONALES.get(resultado_eje.eje_secundario)
-            razones.append(f"Perfil híbrido con: {eje_sec.nombre if eje_sec else resultado_eje.eje_secundario}")
-        razones.append(f"Confianza del eje: {resultado_eje.confianza:.0%}")
+        razones.append(f"Eje profesional: {eje_info.nombre if eje_info else eje_principal}")
+        if es_hibrido and eje_secundario:
+            eje_sec = EJES_PROFESIONALES.get(eje_secundario)
+            razones.append(f"Perfil híbrido con: {eje_sec.nombre if eje_sec else eje_secundario}")
+        razones.append(f"Confianza del eje: {confianza:.0%}")
 
         resultados.append(
             {
@@ -490,9 +729,9 @@ def recomendar_carreras(respuestas: List[Tuple[int, int]], top: int = 3):
                 "indice": CARRERAS_OBJETIVO.index(carrera) if carrera in CARRERAS_OBJETIVO else -1,
                 "probabilidad": float(prob),
                 "razones": razones,
-                "eje_profesional": resultado_eje.eje_principal,
-                "eje_nombre": eje_info.nombre if eje_info else resultado_eje.eje_principal,
-                "es_hibrido": resultado_eje.es_hibrido,
+                "eje_profesional": eje_principal,
+                "eje_nombre": eje_info.nombre if eje_info else eje_principal,
+                "es_hibrido": es_hibrido,
             }
         )
 
@@ -500,6 +739,139 @@ def recomendar_carreras(respuestas: List[Tuple[int, int]], top: int = 3):
     return resultados[:top]
 
 
+def recomendar_carreras_batch(
+    lista_respuestas: List[List[Tuple[int, int]]],
+    top: int = 3,
+    tamano_lote: int = 4096,
+) -> List[List[dict]]:
+    """
+    Versión por lotes de ``recomendar_carreras`` para N cuestionarios.
+
+    Construye la matriz (N, n_features) y ejecuta detección de eje,
+    normalización, ``predict_proba`` enmascarado y requisitos mínimos de forma
+    vectorizada; los requisitos aplican la regla de ``cumple_requisitos_minimos``
+    (vía ``factibilidad_requisitos``). Retorna, por cada cuestionario, la misma
+    lista de dicts que ``recomendar_carreras``. Procesa de a ``tamano_lote`` filas para acotar memoria.
+    """
+    resultados: List[List[dict]] = []
+    for inicio in range(0, len(lista_respuestas), tamano_lote):
+        resultados.extend(_recomendar_lote(lista_respuestas[inicio:inicio + tamano_lote], top))
+    return resultados
+
+
+@dataclass
+class RankingPerfiles:
+    """
+    Resultado de las etapas de ranking para N perfiles: candidatas del eje,
+    predicciones del modelo dentro de ellas, recomendadas tras los requisitos
+    mínimos y excluidas por requisitos. ``tiempos`` acumula segundos por etapa.
+    """
+    ejes: ResultadoEjeBatch
+    candidatas: List[List[str]]
+    predicciones: List[List[Tuple[str, float]]]
+    recomendadas: List[List[Tuple[str, float]]]
+    excluidas: List[List[str]]
+    tiempos: Dict[str, float] = field(default_factory=dict)
+
+
+def rankear_perfiles(X: np.ndarray, top: int = 3, modelo=None) -> RankingPerfiles:
+    """
+    Etapas 1-2 del pipeline por lotes sobre una matriz de perfiles (N, n_features):
+    eje profesional, normalización, ranking ML enmascarado y requisitos mínimos.
+    ``modelo`` reemplaza al modelo activo (evaluación offline).
+    """
+    from models.modelo_ml import predict_top_batch
+    from models.ejes_profesionales import EJES_PROFESIONALES, seleccionar_eje_batch
+
+    tiempos: Dict[str, float] = {}
+    inicio = time.perf_counter()
+
+    # ETAPA 1: Detección del eje y carreras candidatas (una lista por combinación de ejes)
+    ejes = seleccionar_eje_batch(X)
+    candidatas = [
+        ejes.carreras_candidatas(fila) or list(EJES_PROFESIONALES["soporte_gestion"].carreras)
+        for fila in range(X.shape[0])
+    ]
+    tiempos["eje"], inicio = time.perf_counter() - inicio, time.perf_counter()
+
+    # ETAPA 2: Normalización y ranking ML enmascarado
+    X_ajustado = _normalizar_por_especializacion_batch(X)
+    tiempos["normalizacion"], inicio = time.perf_counter() - inicio, time.perf_counter()
+    top_k = [min(len(c), max(top * 4, top)) for c in candidatas]
+    predicciones = predict_top_batch(X_ajustado, top=top_k, carreras_permitidas=candidatas, modelo=modelo)
+    tiempos["prediccion"], inicio = time.perf_counter() - inicio, time.perf_counter()
+
+    # Requisitos mínimos para todas las filas en una comparación
+    factible = factibilidad_requisitos(X)
+    recomendadas: List[List[Tuple[str, float]]] = []
+    excluidas: List[List[str]] = []
+    for fila, pred in enumerate(predicciones):
+        candidatos_filtrados, fuera = _filtrar_por_requisitos(pred, factible[fila], top)
+        recomendadas.append(candidatos_filtrados)
+        excluidas.append(fuera)
+    tiempos["requisitos"] = time.perf_counter() - inicio
+
+    return RankingPerfiles(ejes, candidatas, predicciones, recomendadas, excluidas, tiempos)
+
+
+def _recomendar_lote(lote: List[List[Tuple[int, int]]], top: int) -> List[List[dict]]:
+    from models.carreras import DESCRIPCIONES, obtener_imagen_carrera
+    from models.ejes_profesionales import EJES_PROFESIONALES
+
+    salida: List[List[dict]] = [[] for _ in lote]
+    activos = [i for i, respuestas in enumerate(lote) if respuestas]
+    if not activos:
+        return salida
+
+    # 1. Matriz de perfiles
+    X = construir_matriz_usuarios([lote[i] for i in activos])
+
+    # 2-5. Eje, normalización, ranking ML y requisitos mínimos
+    ranking = rankear_perfiles(X, top)
+    ejes = ranking.ejes
+
+    # Razones base (top features) para todas las filas
+    top_features = np.argsort(-X, axis=1, kind="stable")[:, :5]
+
+    for fila, i in enumerate(activos):
+        eje_id = ejes.eje_principal(fila)
+        eje_info = EJES_PROFESIONALES[eje_id]
+        hibrido = bool(ejes.es_hibrido[fila])
+        eje_sec = EJES_PROFESIONALES[ejes.eje_secundario(fila)] if hibrido else None
+
+        candidatos_filtrados = ranking.recomendadas[fila]
+        _registrar_exclusiones(X[fila], ranking.excluidas[fila])
+
+        perfil_top = {FEATURE_COLUMNS[j]: float(X[fila, j]) for j in top_features[fila]}
+        resultados = []
+        for carrera, prob in candidatos_filtrados:
+            razones = generar_razones_recomendacion(perfil_top, carrera, eje_id)
+            razones.append(f"Eje profesional: {eje_info.nombre}")
+            if hibrido and eje_sec is not None:
+                razones.append(f"Perfil híbrido con: {eje_sec.nombre}")
+            razones.append(f"Confianza del eje: {float(ejes.confianza[fila]):.0%}")
+
+            resultados.append(
+                {
+                    "carrera": carrera,
+                    "compatibilidad": int(round(max(0.0, min(1.0, prob)) * 100)),
+                    "descripcion": DESCRIPCIONES.get(carrera, "Sin descripción disponible."),
+                    "imagen": obtener_imagen_carrera(carrera),
+                    "indice": CARRERAS_OBJETIVO.index(carrera) if carrera in CARRERAS_OBJETIVO else -1,
+                    "probabilidad": float(prob),
+                    "razones": razones,
+                    "eje_profesional": eje_id,
+                    "eje_nombre": eje_info.nombre,
+                    "es_hibrido": hibrido,
+                }
+            )
+
+        resultados.sort(key=lambda x: x["probabilidad"], reverse=True)
+        salida[i] = resultados[:top]
+
+    return salida
+
+
 def calcular_estadisticas(historial):
     if not historial:
         return {
@@ -510,36 +882,53 @@ def calcular_estadisticas(historial):
             "por_carrera": {}
         }
     
-    total_tests = len(historial)
-    compatibilidad_total = 0
-    conteo_carreras = {carrera: 0 for carrera in CARRERAS_OBJETIVO}
-    compatibilidad_carrera = {carrera: [] for carrera in CARRERAS_OBJETIVO}
-    
-    total_recomendaciones = 0
+    conteos: Dict[str, int] = {}
+    sumas: Dict[str, float] = {}
     for test in historial:
         carreras = test.get('carreras', [])
         compatibilidades = test.get('compatibilidades', [])
         for i, carrera in enumerate(carreras):
             if i >= len(compatibilidades):
                 continue
-            compatibilidad = compatibilidades[i]
-            if carrera not in conteo_carreras:
-                conteo_carreras[carrera] = 0
-                compatibilidad_carrera[carrera] = []
-            conteo_carreras[carrera] += 1
-            compatibilidad_carrera[carrera].append(compatibilidad)
-            compatibilidad_total += compatibilidad
-            total_recomendaciones += 1
+            conteos[carrera] = conteos.get(carrera, 0) + 1
+            sumas[carrera] = sumas.get(carrera, 0) + compatibilidades[i]
+
+    return construir_estadisticas(len(historial), conteos, sumas)
+
+
+def construir_estadisticas(total_tests: int, conteos: Dict[str, int], sumas: Dict[str, float]):
+    """
+    Arma el diccionario de estadísticas a partir de agregados por carrera
+    (cantidad de recomendaciones y suma de compatibilidad).
+    Costo O(número de carreras), independiente del tamaño del historial.
+    """
+    if not total_tests:
+        return {
+            "total_tests": 0,
+            "compatibilidad_promedio": 0,
+            "carrera_popular": None,
+            "tasa_completacion": 0,
+            "por_carrera": {}
+        }
+
+    conteo_carreras = {carrera: 0 for carrera in CARRERAS_OBJETIVO}
+    suma_carrera = {carrera: 0 for carrera in CARRERAS_OBJETIVO}
+    for carrera, count in conteos.items():
+        conteo_carreras[carrera] = conteo_carreras.get(carrera, 0) + count
+        suma_carrera[carrera] = suma_carrera.get(carrera, 0) + sumas.get(carrera, 0)
+
+    total_recomendaciones = sum(conteo_carreras.values())
+    compatibilidad_total = sum(suma_carrera.values())
 
     compatibilidad_promedio = int(compatibilidad_total / total_recomendaciones) if total_recomendaciones > 0 else 0
     carrera_popular = max(conteo_carreras.items(), key=lambda item: item[1])[0] if conteo_carreras else None
 
     por_carrera = {}
-    for carrera, compatibilidades in compatibilidad_carrera.items():
-        if compatibilidades:
+    for carrera, count in conteo_carreras.items():
+        if count:
             por_carrera[carrera] = {
-                "count": conteo_carreras[carrera],
-                "promedio": int(sum(compatibilidades) / len(compatibilidades))
+                "count": count,
+                "promedio": int(suma_carrera[carrera] / count)
             }
         else:
             por_carrera[carrera] = {"count": 0, "promedio": 0}
@@ -0,0 +1,192 @@
+"""
+Servicio de reentrenamiento en segundo plano.
+
+Revisa periódicamente el buffer de perfiles híbridos y, cuando acumula
+``umbral_muestras`` o pasó ``intervalo_max`` segundos desde el último
+reentrenamiento con muestras pendientes, llama a ``retrain_from_buffer``
+fuera del request. El modelo nuevo se publica como versión aparte y el
+registro lo adopta al detectar el cambio del puntero ``ACTIVE``.
+
+En modo ``"incremental"`` cada lote se incorpora con ``partial_fit``
+(``models.aprendizaje_incremental``) y solo se hace un reajuste completo
+cuando el acuerdo del top-1 con el último reajuste cae bajo
+``umbral_acuerdo``. Si el modelo activo no usa calibración sigmoide (p. ej.
+la búsqueda promovió uno isotónico) cada lote va directo al reajuste completo.
+
+Puede correr como hilo dentro del proceso web o como proceso separado:
+
+    python -m models.reentrenamiento --umbral 50 --intervalo 3600 [--modo incremental]
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from pathlib import Path
+
+from models.buffer import buffer_size
+
+logger = logging.getLogger(__name__)
+
+
+class ServicioReentrenamiento:
+    def __init__(
+        self,
+        umbral_muestras: int = 50,
+        intervalo_max: float = 3600.0,
+        intervalo_sondeo: float = 30.0,
+        artifact_dir: Path | None = None,
+        modo: str = "completo",
+        umbral_acuerdo: float = 0.9,
+    ):
+        if modo not in ("completo", "incremental"):
+            raise ValueError(f"Modo de reentrenamiento desconocido: {modo}")
+        self.umbral_muestras = umbral_muestras
+        self.intervalo_max = intervalo_max
+        self.intervalo_sondeo = intervalo_sondeo
+        self.artifact_dir = artifact_dir
+        self.modo = modo
+        self.umbral_acuerdo = umbral_acuerdo
+
+        self._hilo: threading.Thread | None = None
+        self._detener = threading.Event()
+        self._despertar = threading.Event()
+        self._forzar = False
+        self._ultimo_reentrenamiento = time.monotonic()
+
+        self.reentrenamientos = 0
+        self.reajustes_completos = 0
+        self.errores = 0
+        self.ultima_deriva: dict | None = None
+        self.ultima_duracion = 0.0
+        self.ultimo_error: str | None = None
+
+    # -------------------------
+    # Ciclo de vida
+    # -------------------------
+
+    def iniciar(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="reentrenamiento", daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout: float | None = None) -> None:
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+    def solicitar(self) -> None:
+        """Pide un reentrenamiento en la próxima vuelta si hay muestras pendientes."""
+        self._forzar = True
+        self._despertar.set()
+
+    def _ciclo(self) -> None:
+        while not self._detener.is_set():
+            self.ejecutar_una_vez()
+            self._despertar.wait(self.intervalo_sondeo)
+            self._despertar.clear()
+
+    # -------------------------
+    # Disparo
+    # -------------------------
+
+    def debe_reentrenar(self) -> bool:
+        pendientes = buffer_size()
+        if pendientes == 0:
+            return False
+        if self._forzar or pendientes >= self.umbral_muestras:
+            return True
+        return time.monotonic() - self._ultimo_reentrenamiento >= self.intervalo_max
+
+    def ejecutar_una_vez(self) -> bool:
+        """Reentrena si corresponde. Retorna True si se publicó una versión nueva."""
+        from models.modelo_ml import retrain_from_buffer
+
+        if not self.debe_reentrenar():
+            self._forzar = False
+            return False
+
+        self._forzar = False
+        inicio = time.perf_counter()
+        try:
+            publicado = self._incremental() if self.modo == "incremental" else retrain_from_buffer(self.artifact_dir)
+        except Exception as e:
+            self.errores += 1
+            self.ultimo_error = repr(e)
+            logger.exception("Error en el reentrenamiento en segundo plano")
+            return False
+        finally:
+            self.ultima_duracion = time.perf_counter() - inicio
+            self._ultimo_reentrenamiento = time.monotonic()
+
+        if publicado:
+            self.reentrenamientos += 1
+            logger.info("Modelo reentrenado en %.1fs", self.ultima_duracion)
+        return publicado
+
+    def _incremental(self) -> bool:
+        from models.aprendizaje_incremental import actualizar_incremental, admite_incremental
+        from models.modelo_ml import retrain_from_buffer
+
+        if not admite_incremental(self.artifact_dir):
+            logger.info("El modelo activo no admite actualización incremental: reajuste completo")
+            publicado = retrain_from_buffer(self.artifact_dir)
+            if publicado:
+                self.reajustes_completos += 1
+            return publicado
+
+        resumen = actualizar_incremental(self.artifact_dir)
+        if resumen is None:
+            return False
+
+        self.ultima_deriva = resumen["deriva"]
+        if resumen["deriva"]["top1_agreement"] < self.umbral_acuerdo:
+            logger.info("Deriva del modelo incremental %s: reajuste completo", resumen["deriva"])
+            retrain_from_buffer(self.artifact_dir, force=True)
+            self.reajustes_completos += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "activo": self._hilo is not None and self._hilo.is_alive(),
+            "modo": self.modo,
+            "pendientes": buffer_size(),
+            "reentrenamientos": self.reentrenamientos,
+            "reajustes_completos": self.reajustes_completos,
+            "ultima_deriva": self.ultima_deriva,
+            "errores": self.errores,
+            "ultima_duracion": self.ultima_duracion,
+            "ultimo_error": self.ultimo_error,
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reentrenamiento del modelo a partir del buffer")
+    parser.add_argument("--umbral", type=int, default=50, help="Muestras pendientes que disparan el reentrenamiento")
+    parser.add_argument("--intervalo", type=float, default=3600.0, help="Segundos máximos entre reentrenamientos")
+    parser.add_argument("--sondeo", type=float, default=30.0, help="Segundos entre revisiones del buffer")
+    parser.add_argument("--modo", choices=["completo", "incremental"], default="completo")
+    parser.add_argument("--una-vez", action="store_true", help="Reentrenar ahora si hay muestras y salir")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    servicio = ServicioReentrenamiento(args.umbral, args.intervalo, args.sondeo, modo=args.modo)
+    if args.una_vez:
+        servicio.solicitar()
+        print("Versión nueva publicada" if servicio.ejecutar_una_vez() else "Sin muestras pendientes")
+        return 0
+
+    try:
+        servicio._ciclo()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""
+Validación de la API JSON de recomendación.
+
+Verifica que:
+- /api/v1/recommend devuelve lo mismo que recomendar_carreras y guarda el test
+- Las entradas inválidas responden 400 con un mensaje
+- /api/v1/recommend/bulk emite una línea NDJSON por entrada, en orden, igual al camino por lotes
+- Las líneas inválidas del bulk se reportan sin cortar el stream
+- /estadisticas pagina por id (siguiente/anterior) y filtra el historial, y la
+  exportación CSV/NDJSON respeta los filtros
+"""
+from __future__ import annotations
+
+import html as html_lib
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+import app as app_module  # noqa: E402
+from models import buffer  # noqa: E402
+from models.recomendador import recomendar_carreras, recomendar_carreras_batch  # noqa: E402
+from tests.test_recomendacion_batch import generar_cuestionarios  # noqa: E402
+from utils import storage  # noqa: E402
+
+
+@pytest.fixture
+def cliente(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(storage, "HISTORIAL_DB", str(tmp_path / "historial.db"))
+    monkeypatch.setattr(storage, "HISTORIAL_FILE", str(tmp_path / "historial.json"))
+    monkeypatch.setattr(buffer, "BUFFER_FILE", tmp_path / "buffer.bin")
+    yield app_module.app.test_client()
+    app_module.cola_escritura.vaciar()
+
+
+def test_recommend(cliente):
+    respuestas = generar_cuestionarios(1)[0]
+    r = cliente.post("/api/v1/recommend", json={"respuestas": respuestas, "top": 2})
+    assert r.status_code == 200
+    assert r.get_json()["recomendaciones"] == json.loads(json.dumps(recomendar_carreras(respuestas, top=2)))
+    app_module.cola_escritura.vaciar()
+    assert storage.obtener_historial_db().contar() == 1
+
+    como_dict = cliente.post("/api/v1/recommend", json={"respuestas": {str(q): o for q, o in respuestas}})
+    assert como_dict.get_json() == cliente.post("/api/v1/recommend", json=respuestas).get_json()
+
+
+@pytest.mark.parametrize("cuerpo", [{"respuestas": []}, {"respuestas": [[0]]}, {"respuestas": [[999, 1]]}, {"respuestas": [[0, 1]], "top": 0}])
+def test_recommend_invalido(cliente, cuerpo):
+    r = cliente.post("/api/v1/recommend", json=cuerpo)
+    assert r.status_code == 400 and r.get_json()["error"]
+    assert cliente.post("/api/v1/recommend", data="no es json").status_code == 400
+
+
+def test_bulk_ndjson(cliente, monkeypatch):
+    monkeypatch.setattr(app_module, "API_LOTE", 4)
+    cuestionarios = [c for c in generar_cuestionarios(10) if c]
+    lineas = [json.dumps({"id": f"c{i}", "respuestas": c}) for i, c in enumerate(cuestionarios)]
+    lineas.insert(3, "{roto")
+    lineas.insert(5, "")
+
+    r = cliente.post("/api/v1/recommend/bulk?top=3", data="\n".join(lineas) + "\n", content_type="application/x-ndjson")
+    assert r.status_code == 200 and r.mimetype == "application/x-ndjson"
+    salida = [json.loads(l) for l in r.get_data(as_text=True).splitlines()]
+
+    assert len(salida) == len(cuestionarios) + 1
+    assert salida[3]["linea"] == 4 and "error" in salida[3]
+    correctas = [s for s in salida if "error" not in s]
+    assert [s["id"] for s in correctas] == [f"c{i}" for i in range(len(cuestionarios))]
+    esperado = json.loads(json.dumps(recomendar_carreras_batch(cuestionarios, top=3)))
+    assert [s["recomendaciones"] for s in correctas] == esperado
+
+
+def _enlace(html: str, texto: str) -> str:
+    """href del enlace de paginación con ``texto``."""
+    for href, etiqueta in re.findall(r'<a href="([^"]+)"[^>]*>([^<]+)</a>', html):
+        if texto in etiqueta:
+            return html_lib.unescape(href)
+    raise AssertionError(f"Sin enlace {texto!r}")
+
+
+def test_estadisticas_paginadas_y_exportacion(cliente, monkeypatch):
+    monkeypatch.setattr(app_module, "HISTORIAL_POR_PAGINA", 4)
+    db = storage.obtener_historial_db()
+    for dia in range(1, 11):
+        db.agregar(["Software Developer" if dia <= 6 else "Hardware Engineer", "API Specialist"], [80, 60], fecha=f"2024-05-{dia:02d}T09:30:00")
+
+    assert cliente.get("/estadisticas").status_code == 302
+    with cliente.session_transaction() as sesion:
+        sesion["auth"] = True
+
+    html = cliente.get("/estadisticas").get_data(as_text=True)
+    assert "10 tests · página 1 de 3" in html and "Anterior" not in html
+    html = cliente.get(_enlace(html, "Siguiente")).get_data(as_text=True)
+    assert "10 tests · página 2 de 3" in html and "2024-05-06" in html and "2024-05-10" not in html
+    html = cliente.get(_enlace(html, "Siguiente")).get_data(as_text=True)
+    assert "página 3 de 3" in html and "2024-05-02" in html and "Siguiente" not in html
+    html = cliente.get(_enlace(cliente.get(_enlace(html, "Anterior")).get_data(as_text=True), "Anterior")).get_data(as_text=True)
+    assert "página 1 de 3" in html and "2024-05-10" in html and "Anterior" not in html
+
+    html = cliente.get("/estadisticas?carrera=Hardware+Engineer&desde=2024-05-08").get_data(as_text=True)
+    assert "3 tests · página 1 de 1" in html
+
+    csv_texto = cliente.get("/estadisticas/exportar?formato=csv&carrera=Hardware+Engineer").get_data(as_text=True)
+    filas = csv_texto.strip().splitlines()
+    assert filas[0].startswith("id,fecha,carrera_1") and len(filas) == 5
+
+    ndjson = cliente.get("/estadisticas/exportar?formato=ndjson&hasta=2024-05-02").get_data(as_text=True)
+    assert [json.loads(l)["fecha"][:10] for l in ndjson.splitlines()] == ["2024-05-01", "2024-05-02"]
+    assert cliente.get("/estadisticas/exportar?formato=xml").status_code == 400
+
+
+def main() -> int:
+    return pytest.main([__file__, "-q"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Validación de la suite de benchmarks (en tamaño mínimo).
+
+Verifica que:
+- Los cuestionarios generados son completos, válidos y reproducibles
+- ``ejecutar`` produce el documento JSON con entorno y métricas por escenario
+- ``comparar`` alinea las métricas de dos corridas
+- ``agregar_muchos`` del historial mantiene índice y agregados
+- El generador de carga produce cuestionarios válidos y la curva de historial reporta cada tamaño
+  sin dejar rutas redirigidas ni stores abiertos al terminar
+- La evaluación offline compara clasificador y pipeline con tasas y latencias coherentes
+- ``rankear_perfiles`` da las mismas carreras que ``recomendar_carreras_batch``
+"""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from benchmarks.carga import _RUTAS_STORAGE, DISTRIBUCIONES, GeneradorRespuestas, curva_historial  # noqa: E402
+from benchmarks.evaluacion import entrenar_modelo, evaluar, separar  # noqa: E402
+from benchmarks.suite import comparar, ejecutar, generar_respuestas  # noqa: E402
+from models import buffer  # noqa: E402
+from models.entrenamiento import cargar_matriz_datos  # noqa: E402
+from models.recomendador import construir_matriz_usuarios, rankear_perfiles, recomendar_carreras_batch  # noqa: E402
+from models.preguntas import obtener_todas_preguntas  # noqa: E402
+from utils import storage  # noqa: E402
+from utils.historial_db import HistorialDB  # noqa: E402
+
+
+def test_generar_respuestas():
+    preguntas = obtener_todas_preguntas()
+    cuestionarios = generar_respuestas(50, seed=1)
+    assert cuestionarios == generar_respuestas(50, seed=1)
+    for respuestas in cuestionarios:
+        assert [q for q, _ in respuestas] == list(range(len(preguntas)))
+        assert all(0 <= o < len(preguntas[q]["opciones"]) for q, o in respuestas)
+
+
+def test_ejecutar_y_comparar():
+    documento = ejecutar(["latencia", "lote", "historial"], n_latencia=20, n_lote=50, tamanos_historial=[300], agregados_historial=10)
+    json.dumps(documento)
+    resultados = documento["resultados"]
+    assert resultados["latencia"]["sin_cache"]["n"] == 20
+    assert resultados["lote"]["filas_por_segundo"] > 0
+    assert resultados["historial"]["300"]["agregar"]["n"] == 10
+    assert documento["entorno"]["numpy"]
+
+    filas = comparar(documento, documento)
+    assert filas and all(razon == 1.0 for _, a, _, razon in filas if a)
+
+
+def test_agregar_muchos(tmp_path: Path):
+    db = HistorialDB(tmp_path / "historial.db")
+    db.agregar(["API Specialist"], [90])
+    assert db.agregar_muchos([{"carreras": ["Hardware Engineer", "API Specialist"], "compatibilidades": [70, 30]}] * 5) == 5
+    assert db.contar() == 6 and db.contar(carrera="API Specialist") == 6
+    assert db.agregados()["total_tests"] == 6
+
+
+def test_distribuciones_de_carga():
+    preguntas = obtener_todas_preguntas()
+    for distribucion in DISTRIBUCIONES:
+        generador = GeneradorRespuestas(distribucion, seed=2)
+        muestras = [generador.siguiente() for _ in range(30)]
+        for respuestas in muestras:
+            assert all(0 <= o < len(preguntas[q]["opciones"]) for q, o in respuestas)
+        distintas = len({tuple(r) for r in muestras})
+        assert distintas == 1 if distribucion == "neutral" else distintas > 1
+
+
+def test_curva_historial():
+    rutas = {nombre: getattr(storage, nombre) for nombre in _RUTAS_STORAGE}
+    buffer_file = buffer.BUFFER_FILE
+    stores = (set(storage._STORES), set(storage._BITACORAS), set(buffer._WRITERS))
+
+    curva = curva_historial([0, 500], GeneradorRespuestas("arquetipos"), endpoint="api", total=20, concurrencia=4)
+    assert [r["historial_previo"] for r in curva] == [0, 500]
+    assert all(r["errores"] == 0 and r["p99_ms"] >= r["p50_ms"] for r in curva)
+
+    # _app_aislada restaura las rutas y no deja stores abiertos sobre el temporal
+    assert {nombre: getattr(storage, nombre) for nombre in _RUTAS_STORAGE} == rutas
+    assert buffer.BUFFER_FILE is buffer_file
+    assert (set(storage._STORES), set(storage._BITACORAS), set(buffer._WRITERS)) == stores
+
+
+def test_evaluacion_offline():
+    datos = cargar_matriz_datos()
+    X, y = datos.X[::6], datos.etiquetas()[::6]
+    entrenamiento, evaluacion = separar(y, 0.25, seed=1)
+    assert not set(entrenamiento) & set(evaluacion)
+
+    modelo = entrenar_modelo(X[entrenamiento], y[entrenamiento], {"tol": 1e-3})
+    assert modelo.linear is not None
+    resultado = evaluar(X[evaluacion], y[evaluacion], modelo, muestras_latencia=10)
+    json.dumps(resultado)
+
+    assert resultado["filas"] == len(evaluacion)
+    for nombre in ("clasificador", "pipeline"):
+        parte = resultado[nombre]
+        assert 0.0 <= parte["top1_accuracy"] <= parte["top3_accuracy"] <= 1.0
+        assert set(parte["recall_por_carrera"]) == set(y[evaluacion])
+        assert parte["latencia"]["fila_ms"]["p99"] >= parte["latencia"]["fila_ms"]["p50"] > 0
+    pipeline = resultado["pipeline"]
+    for tasa in ("rechazo_eje", "rechazo_requisitos", "sin_recomendacion"):
+        assert 0.0 <= pipeline[tasa] <= 1.0
+    assert set(pipeline["latencia"]["etapas_us_por_fila"]) == {"eje", "normalizacion", "prediccion", "requisitos"}
+
+
+def test_rankear_perfiles_igual_al_lote():
+    cuestionarios = generar_respuestas(40, seed=2)
+    ranking = rankear_perfiles(construir_matriz_usuarios(cuestionarios), top=3)
+    lote = recomendar_carreras_batch(cuestionarios, top=3)
+    assert [[c for c, _ in r] for r in ranking.recomendadas] == [[r["carrera"] for r in recs] for recs in lote]
+
+
+def main() -> int:
+    import tempfile
+
+    test_generar_respuestas()
+    test_ejecutar_y_comparar()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_agregar_muchos(Path(tmp))
+    test_evaluacion_offline()
+    test_rankear_perfiles_igual_al_lote()
+    print("✓ Benchmarks: OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
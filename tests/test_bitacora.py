@@ -0,0 +1,183 @@
+"""
+Validación de la bitácora binaria de buffer y muestras.
+
+Verifica que:
+- Los registros se releen iguales, en lotes NumPy
+- Escrituras concurrentes de varios hilos no se mezclan y se agrupan en pocos fsync
+- Una cola cortada se ignora al leer y se trunca antes del próximo anexado
+- Un registro con CRC inválido no se cuenta ni se lee
+- El buffer heredado en JSONL se migra y el reclamo/restauración conserva las muestras
+- La migración del buffer se revisa una vez por writer, no en cada muestra
+- Las muestras de entrenamiento heredadas en JSONL se migran una vez, con su timestamp
+- Una migración omite las líneas corruptas y, si no puede escribir, deja el JSONL
+  en su lugar para reintentar (sin perder muestras ni archivos ``.migrando``)
+"""
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from models import buffer  # noqa: E402
+from utils import storage  # noqa: E402
+from utils.bitacora import Bitacora, contar_registros, iterar_lotes  # noqa: E402
+
+
+def test_ida_y_vuelta_en_lotes(tmp_path: Path):
+    ruta = tmp_path / "log.bin"
+    bitacora = Bitacora(ruta, fsync=False)
+    X = np.random.default_rng(0).uniform(0.0, 8.0, size=(25, 30))
+    for i, fila in enumerate(X):
+        bitacora.agregar(fila, (f"carrera {i}", "auto"), ts=float(i))
+    bitacora.agregar([1.0, 2.0], ("ñandú",))
+
+    lotes = list(iterar_lotes(ruta, tamano_lote=10))
+    assert [len(l) for l in lotes] == [10, 10, 5, 1]
+    np.testing.assert_array_equal(np.vstack([l.X for l in lotes[:3]]), X)
+    assert lotes[1].ts.tolist() == [float(i) for i in range(10, 20)]
+    assert lotes[2].textos[-1] == ("carrera 24", "auto")
+    assert lotes[3].X.shape == (1, 2) and lotes[3].textos == [("ñandú",)]
+    assert contar_registros(ruta) == 26
+
+
+def test_escrituras_concurrentes(tmp_path: Path):
+    ruta = tmp_path / "log.bin"
+    bitacora = Bitacora(ruta)
+    hilos, por_hilo = 8, 50
+
+    def _escribir(h: int) -> None:
+        for i in range(por_hilo):
+            bitacora.agregar(np.full(30, h + i / 100), (str(h), str(i)))
+
+    trabajadores = [threading.Thread(target=_escribir, args=(h,)) for h in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+
+    lote = next(iterar_lotes(ruta, tamano_lote=10_000))
+    assert len(lote) == hilos * por_hilo
+    for fila, (h, i) in zip(lote.X, lote.textos):
+        assert np.all(fila == int(h) + int(i) / 100)
+    assert bitacora.registros_escritos == hilos * por_hilo
+    assert bitacora.grupos_escritos <= hilos * por_hilo
+
+
+def test_cola_cortada(tmp_path: Path):
+    ruta = tmp_path / "log.bin"
+    Bitacora(ruta, fsync=False).agregar_muchos([([1.0] * 30, ("a",)), ([2.0] * 30, ("b",))])
+    completo = ruta.read_bytes()
+    ruta.write_bytes(completo[:-7])
+
+    assert contar_registros(ruta) == 1
+    assert [l.textos for l in iterar_lotes(ruta)] == [[("a",)]]
+
+    Bitacora(ruta, fsync=False).agregar([3.0] * 30, ("c",))
+    assert [t for l in iterar_lotes(ruta) for t in l.textos] == [("a",), ("c",)]
+
+
+def test_crc_invalido(tmp_path: Path):
+    ruta = tmp_path / "log.bin"
+    Bitacora(ruta, fsync=False).agregar_muchos([([1.0] * 30, ("a",)), ([2.0] * 30, ("b",))])
+    datos = bytearray(ruta.read_bytes())
+    datos[-1] ^= 0xFF
+    ruta.write_bytes(bytes(datos))
+
+    assert contar_registros(ruta) == 1
+    assert [t for l in iterar_lotes(ruta) for t in l.textos] == [("a",)]
+
+
+def test_buffer_migra_y_restaura(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(buffer, "BUFFER_FILE", tmp_path / "buffer.bin")
+    legado = tmp_path / "buffer.jsonl"
+    legado.write_text(
+        json.dumps({"ts": "2024-01-01T00:00:00Z", "features": [1.0] * 30, "labels": ["A", "B"]}) + "\n",
+        encoding="utf-8",
+    )
+
+    buffer.add_to_buffer([2.0] * 30, ["C", "D"])
+    assert not legado.exists()
+    assert buffer.buffer_size() == 2
+    assert [e["labels"] for e in buffer.load_buffer()] == [["A", "B"], ["C", "D"]]
+
+    entries, claim = buffer.claim_buffer()
+    assert len(entries) == 2 and buffer.buffer_size() == 0
+    buffer.add_to_buffer([3.0] * 30, ["E", "F"])
+    buffer.release_claim(claim, restore=True)
+    assert not claim.exists()
+    assert sorted(e["labels"][0] for e in buffer.load_buffer()) == ["A", "C", "E"]
+    assert next(buffer.iter_buffer()).X.shape == (3, 30)
+
+
+def test_buffer_revisa_migracion_una_vez(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(buffer, "BUFFER_FILE", tmp_path / "buffer.bin")
+    revisiones = []
+    migrar = buffer._migrate_legacy
+    monkeypatch.setattr(buffer, "_migrate_legacy", lambda w: revisiones.append(w) or migrar(w))
+
+    for i in range(5):
+        buffer.add_to_buffer([float(i)] * 30, ["A"])
+    assert len(revisiones) == 1 and buffer.buffer_size() == 5
+
+
+def test_muestras_migran_una_vez(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(storage, "MUESTRAS_FILE", str(tmp_path / "muestras.bin"))
+    monkeypatch.setattr(storage, "MUESTRAS_LEGADO", str(tmp_path / "muestras.jsonl"))
+    legado = tmp_path / "muestras.jsonl"
+    legado.write_text(
+        json.dumps({"ts": "2024-01-01T00:00:00+00:00", "label": "A", "fuente": "manual", "features": [1.0] * 30})
+        + "\n",
+        encoding="utf-8",
+    )
+
+    assert storage.agregar_muestra_entrenamiento([2.0] * 30, "B")
+    assert not legado.exists()
+    lote = next(storage.iterar_muestras_entrenamiento())
+    assert lote.textos == [("A", "manual"), ("B", "auto")]
+    assert lote.ts[0] == 1704067200.0
+    np.testing.assert_array_equal(lote.X[:, 0], [1.0, 2.0])
+
+
+def test_migracion_con_lineas_corruptas(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(buffer, "BUFFER_FILE", tmp_path / "buffer.bin")
+    legado = tmp_path / "buffer.jsonl"
+    fila = json.dumps({"features": [1.0] * 30, "labels": ["A"]})
+    legado.write_text(fila + "\n{cortada\n" + json.dumps({"labels": ["B"]}) + "\n" + fila + "\n", encoding="utf-8")
+
+    buffer.add_to_buffer([2.0] * 30, ["C"])
+    assert not legado.exists() and not list(tmp_path.glob("*.migrando"))
+    assert [e["labels"] for e in buffer.load_buffer()] == [["A"], ["A"], ["C"]]
+
+    # Si la escritura falla el JSONL vuelve a su lugar
+    monkeypatch.setattr(storage, "MUESTRAS_FILE", str(tmp_path / "muestras.bin"))
+    monkeypatch.setattr(storage, "MUESTRAS_LEGADO", str(tmp_path / "muestras.jsonl"))
+    muestras = tmp_path / "muestras.jsonl"
+    muestras.write_text(json.dumps({"label": "A", "features": [1.0] * 30}) + "\n", encoding="utf-8")
+
+    def _falla(self, datos):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(Bitacora, "agregar_bytes", _falla)
+    storage._bitacora_muestras()
+    assert muestras.exists() and not list(tmp_path.glob("*.migrando"))
+
+
+def main() -> int:
+    import tempfile
+
+    for test in (test_ida_y_vuelta_en_lotes, test_escrituras_concurrentes, test_cola_cortada, test_crc_invalido):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✓ Bitácora binaria: OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
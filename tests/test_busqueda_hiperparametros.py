@@ -0,0 +1,141 @@
+"""
+Validación de la búsqueda de hiperparámetros.
+
+Verifica que:
+- La grilla cubre el producto del espacio y el modo aleatorio no repite configuraciones
+- Las particiones de calibración coinciden con las de CalibratedClassifierCV(cv=k)
+- La búsqueda en un pool de procesos da los mismos resultados que en serie
+- El mejor modelo se publica con los hiperparámetros y la búsqueda en el meta
+- Un modelo con calibración isotónica se sirve con el pipeline sklearn
+- El reentrenamiento reutiliza los hiperparámetros publicados
+- En modo incremental, un modelo isotónico pasa al reajuste completo sin trabar el buffer
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from models import buffer, modelo_ml  # noqa: E402
+from models.aprendizaje_incremental import actualizar_incremental, admite_incremental  # noqa: E402
+from models.busqueda_hiperparametros import (  # noqa: E402
+    ESPACIO_BUSQUEDA,
+    RANGO_ALPHA,
+    buscar,
+    elegir_mejor,
+    generar_configuraciones,
+    preparar_particiones,
+    promover,
+)
+from models.entrenamiento import FEATURE_COLUMNS, DatasetMatriz, cargar_matriz_datos  # noqa: E402
+from models.reentrenamiento import ServicioReentrenamiento  # noqa: E402
+
+CONFIGURACIONES = [
+    {"loss": "log_loss", "alpha": 1e-4, "penalty": "l2", "method": "sigmoid", "cv": 3, "tol": 1e-3},
+    {"loss": "modified_huber", "alpha": 5e-4, "penalty": "l2", "method": "isotonic", "cv": 2, "tol": 1e-3},
+]
+
+
+@pytest.fixture(scope="module")
+def datos():
+    d = cargar_matriz_datos()
+    return np.asarray(d.X[::8]), np.asarray(d.etiquetas()[::8])
+
+
+def test_generar_configuraciones():
+    grilla = generar_configuraciones(modo="grilla")
+    assert len(grilla) == int(np.prod([len(v) for v in ESPACIO_BUSQUEDA.values()]))
+    assert len({tuple(sorted(c.items())) for c in grilla}) == len(grilla)
+
+    aleatorias = generar_configuraciones(modo="aleatoria", n_iter=15, seed=3)
+    assert len(aleatorias) == 15
+    assert all(RANGO_ALPHA[0] <= c["alpha"] <= RANGO_ALPHA[1] for c in aleatorias)
+    assert aleatorias == generar_configuraciones(modo="aleatoria", n_iter=15, seed=3)
+    with pytest.raises(ValueError):
+        generar_configuraciones(modo="bayesiana")
+
+
+def test_particiones(datos):
+    from sklearn.model_selection import StratifiedKFold
+
+    _, y = datos
+    particiones = preparar_particiones(y, [3, 5, 3])
+    assert sorted(particiones.folds) == [3, 5]
+    assert not np.intersect1d(particiones.entrenamiento, particiones.validacion).size
+    assert len(particiones.entrenamiento) + len(particiones.validacion) == len(y)
+
+    y_ent = y[particiones.entrenamiento]
+    for (a, b), (c, d) in zip(particiones.folds[3], StratifiedKFold(n_splits=3).split(np.zeros(len(y_ent)), y_ent)):
+        np.testing.assert_array_equal(a, c)
+        np.testing.assert_array_equal(b, d)
+
+
+def test_busqueda_paralela_igual_a_serie(datos):
+    X, y = datos
+    serie = buscar(X, y, CONFIGURACIONES, n_jobs=1)
+    paralelo = buscar(X, y, CONFIGURACIONES, n_jobs=2)
+
+    assert [r["indice"] for r in paralelo] == [0, 1]
+    for a, b in zip(serie, paralelo):
+        assert "error" not in a
+        for metrica in ("accuracy", "top3_accuracy", "log_loss"):
+            assert a[metrica] == pytest.approx(b[metrica])
+        assert 0.0 <= a["accuracy"] <= a["top3_accuracy"] <= 1.0
+        assert a["fit_seconds"] > 0
+
+    mejor = elegir_mejor(serie + [{"indice": 9, "hiperparametros": {}, "error": "x", "fit_seconds": 0.0}])
+    assert mejor["log_loss"] == min(r["log_loss"] for r in serie)
+    assert elegir_mejor(serie, "accuracy")["accuracy"] == max(r["accuracy"] for r in serie)
+
+
+def test_promover_y_reentrenar(datos, tmp_path: Path, monkeypatch):
+    X, y = datos
+    resultados = buscar(X, y, CONFIGURACIONES, n_jobs=1)
+    artifact_dir = tmp_path / "artifacts"
+
+    version = promover(X, y, resultados[1], resultados, "log_loss", artifact_dir)
+    assert (artifact_dir / "ACTIVE").read_text(encoding="utf-8") == version
+    meta = modelo_ml._load_meta(modelo_ml._active_dir(artifact_dir))
+    assert meta["hyperparameters"]["method"] == "isotonic"
+    assert meta["search"]["n_configurations"] == 2
+    assert meta["search"]["best"]["indice"] == 1
+
+    # Sin exportación lineal: el registro usa el pipeline sklearn
+    activo = modelo_ml.ModelRegistry(artifact_dir=artifact_dir, check_interval=0.0).get()
+    assert activo.linear is None and activo.artifacts is not None
+    proba = activo.predict_proba(np.full((1, len(FEATURE_COLUMNS)), 3.0))
+    assert proba.shape == (1, len(activo.classes_)) and proba.sum() == pytest.approx(1.0)
+
+    clases, codigos = np.unique(y, return_inverse=True)
+    reducido = DatasetMatriz(X=X, y=codigos, classes=clases)
+    monkeypatch.setattr(buffer, "BUFFER_FILE", tmp_path / "buffer.bin")
+    monkeypatch.setattr(modelo_ml, "cargar_matriz_datos", lambda *a, **k: reducido)
+    assert modelo_ml.retrain_from_buffer(artifact_dir, force=True)
+    clf = modelo_ml.load_or_train(artifact_dir=modelo_ml._active_dir(artifact_dir)).classifier
+    assert clf.method == "isotonic"
+    assert clf.estimator.loss == "modified_huber"
+
+    # Modo incremental con un modelo isotónico: reajuste completo, buffer consumido
+    assert not admite_incremental(artifact_dir)
+    with pytest.raises(ValueError):
+        actualizar_incremental(artifact_dir)
+    for fila, etiqueta in zip(X[:4], y[:4]):
+        buffer.add_to_buffer(fila.tolist(), [str(etiqueta)])
+    servicio = ServicioReentrenamiento(umbral_muestras=1, artifact_dir=artifact_dir, modo="incremental")
+    assert servicio.ejecutar_una_vez()
+    assert servicio.errores == 0 and servicio.reajustes_completos == 1
+    assert buffer.buffer_size() == 0
+
+
+def main() -> int:
+    return pytest.main([__file__, "-q"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
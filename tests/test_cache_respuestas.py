@@ -0,0 +1,77 @@
+"""
+Validación del cache de recomendaciones por respuestas.
+
+Verifica que:
+- Respuestas iguales en otro orden comparten la entrada del cache
+- El LRU desaloja por capacidad y las entradas vencen por TTL
+- Un cambio de versión del modelo vacía el cache
+- Los resultados en cache coinciden con el cálculo directo y no se comparten mutables
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from models import recomendador  # noqa: E402
+from models.cache_respuestas import CacheRespuestas, clave_respuestas  # noqa: E402
+from tests.test_recomendacion_batch import generar_cuestionarios  # noqa: E402
+
+
+def test_clave_canonica():
+    respuestas = [(0, 1), (3, 2), (1, 4)]
+    assert clave_respuestas(np.array(respuestas)) == clave_respuestas(np.array(respuestas[::-1]))
+    assert clave_respuestas(np.array(respuestas)) != clave_respuestas(np.array([(0, 1), (3, 2), (1, 3)]))
+
+
+def test_lru_ttl_y_version():
+    cache = CacheRespuestas(capacidad=2, ttl=3600.0)
+    assert cache.obtener("a", "v1", lambda: 1) == 1
+    assert cache.obtener("a", "v1", lambda: 2) == 1
+    cache.obtener("b", "v1", lambda: 3)
+    cache.obtener("a", "v1", lambda: 4)
+    cache.obtener("c", "v1", lambda: 5)  # desaloja "b", el menos usado
+    assert cache.obtener("b", "v1", lambda: 6) == 6
+    assert cache.stats()["desalojos"] == 2
+
+    assert cache.obtener("b", "v2", lambda: 7) == 7
+    assert cache.stats()["invalidaciones"] == 1 and cache.stats()["tamano"] == 1
+
+    cache.ttl = 1e-9
+    assert cache.obtener("b", "v2", lambda: 8) == 8
+    assert cache.stats()["vencidos"] == 1
+
+
+def test_recomendar_con_cache():
+    recomendador.CACHE_RECOMENDACIONES.limpiar()
+    antes = recomendador.cache_stats()
+
+    cuestionarios = [r for r in generar_cuestionarios(20, seed=3) if r]
+    for respuestas in cuestionarios:
+        directo = recomendador._recomendar_carreras(respuestas, 3)
+        primero = recomendador.recomendar_carreras(respuestas)
+        for r in primero:
+            r["razones"].append("mutado")
+        segundo = recomendador.recomendar_carreras(list(reversed(respuestas)))
+        assert segundo == directo
+
+    stats = recomendador.cache_stats()
+    assert stats["aciertos"] - antes["aciertos"] == len(cuestionarios)
+    assert stats["fallos"] - antes["fallos"] == len(cuestionarios)
+
+
+def main() -> int:
+    test_clave_canonica()
+    test_lru_ttl_y_version()
+    test_recomendar_con_cache()
+    print("✓ Cache de recomendaciones: OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Equivalencia del vector de usuario compilado (tensor de pesos) con la
+implementación original basada en recorrer los dicts de ``pesos``.
+
+Cubre respuestas completas, incompletas, repetidas y fuera de rango, y las
+tres entradas: individual, lista de cuestionarios y matriz densa de opciones.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+import numpy as np  # noqa: E402
+
+from models.entrenamiento import FEATURE_COLUMNS, obtener_feature_space, obtener_limites_features  # noqa: E402
+from models.preguntas import obtener_pregunta, obtener_todas_preguntas  # noqa: E402
+from models.recomendador import (  # noqa: E402
+    SOFT_FEATURES,
+    construir_matriz_desde_opciones,
+    construir_matriz_usuarios,
+    construir_vector_usuario,
+)
+
+
+def vector_referencia(respuestas: List[Tuple[int, int]]) -> np.ndarray:
+    """Implementación original de construir_vector_usuario (recorrido por dicts)."""
+    technical_features = set(FEATURE_COLUMNS) - SOFT_FEATURES
+    perfil_sum: Dict[str, float] = {col: 0.0 for col in FEATURE_COLUMNS}
+    perfil_weight: Dict[str, float] = {col: 0.0 for col in FEATURE_COLUMNS}
+
+    for idx_pregunta, idx_opcion in respuestas:
+        pregunta = obtener_pregunta(idx_pregunta)
+        if not pregunta:
+            continue
+        opciones = pregunta.get("opciones", [])
+        if not (0 <= idx_opcion < len(opciones)):
+            continue
+        pesos = opciones[idx_opcion].get("pesos", {})
+        informatividad = float(pregunta.get("informatividad", 0.5))
+        tipo = pregunta.get("tipo", "")
+        if tipo == "tecnica":
+            allowed = technical_features
+        elif tipo == "blanda":
+            allowed = SOFT_FEATURES
+        else:
+            allowed = set(FEATURE_COLUMNS)
+        for feature_name, delta in pesos.items():
+            if feature_name in perfil_sum and feature_name in allowed:
+                perfil_sum[feature_name] += float(delta) * informatividad
+                perfil_weight[feature_name] += informatividad
+
+    vector = np.array(
+        [
+            (0.8 if col in SOFT_FEATURES else 1.5) + perfil_sum[col] / (perfil_weight[col] + 0.1)
+            for col in FEATURE_COLUMNS
+        ],
+        dtype=float,
+    )
+
+    mean_v = np.mean(vector)
+    std_v = np.std(vector)
+    if std_v > 0.01:
+        z_scores = (vector - mean_v) / std_v
+        vector = np.where(np.abs(z_scores) > 2.5, mean_v + np.sign(z_scores) * 2.5 * std_v, vector)
+
+    bounds = obtener_limites_features()
+    mins = np.array([bounds[col][0] for col in FEATURE_COLUMNS], dtype=float)
+    maxs = np.array([bounds[col][1] for col in FEATURE_COLUMNS], dtype=float)
+    return np.clip(vector, mins, maxs).reshape(1, -1)
+
+
+def _cuestionarios(n: int, seed: int = 11) -> List[List[Tuple[int, int]]]:
+    rng = np.random.default_rng(seed)
+    preguntas = obtener_todas_preguntas()
+    salida: List[List[Tuple[int, int]]] = [[], [(0, 99)], [(-1, 0), (999, 1)], [(3, 2), (3, 2), (3, 0)]]
+    for _ in range(n):
+        respuestas = [(i, int(rng.integers(len(p["opciones"])))) for i, p in enumerate(preguntas)]
+        if rng.random() < 0.3:
+            respuestas = [r for r in respuestas if rng.random() < 0.5]
+        salida.append(respuestas)
+    return salida
+
+
+def test_vector_individual_equivale_a_referencia():
+    for respuestas in _cuestionarios(200):
+        np.testing.assert_allclose(construir_vector_usuario(respuestas), vector_referencia(respuestas), rtol=0, atol=1e-12)
+
+
+def test_matriz_equivale_a_referencia():
+    cuestionarios = _cuestionarios(200, seed=5)
+    esperado = np.vstack([vector_referencia(r) for r in cuestionarios])
+    np.testing.assert_allclose(construir_matriz_usuarios(cuestionarios), esperado, rtol=0, atol=1e-12)
+
+
+def test_matriz_densa_de_opciones():
+    rng = np.random.default_rng(3)
+    preguntas = obtener_todas_preguntas()
+    n_opciones = np.array([len(p["opciones"]) for p in preguntas])
+    opciones = rng.integers(0, n_opciones, size=(100, len(preguntas)))
+    opciones[rng.random(opciones.shape) < 0.1] = -1
+
+    esperado = np.vstack([
+        vector_referencia([(q, int(o)) for q, o in enumerate(fila) if o >= 0]) for fila in opciones
+    ])
+    np.testing.assert_allclose(construir_matriz_desde_opciones(opciones), esperado, rtol=0, atol=1e-12)
+
+
+def test_feature_space_en_sitio():
+    bounds = obtener_limites_features()
+    mins = np.array([bounds[col][0] for col in FEATURE_COLUMNS], dtype=float)
+    maxs = np.array([bounds[col][1] for col in FEATURE_COLUMNS], dtype=float)
+    rango = maxs - mins
+    rango[rango < 1e-6] = 1.0
+
+    espacio = obtener_feature_space()
+    assert not espacio.mins.flags.writeable
+    assert espacio.index["AI ML"] == FEATURE_COLUMNS.index("AI ML")
+
+    X = np.random.default_rng(1).uniform(0.0, 8.0, size=(20, len(FEATURE_COLUMNS)))
+    buffer = X.copy()
+    resultado = espacio.normalize(buffer, out=buffer)
+    assert resultado is buffer
+    np.testing.assert_array_equal(buffer, (X - mins) / rango)
+
+    espacio.denormalize(buffer, out=buffer)
+    np.testing.assert_array_equal(buffer, ((X - mins) / rango) * (maxs - mins) + mins)
+
+
+def main() -> int:
+    test_vector_individual_equivale_a_referencia()
+    test_matriz_equivale_a_referencia()
+    test_matriz_densa_de_opciones()
+    test_feature_space_en_sitio()
+    print("✓ Tensor de preguntas equivalente a la implementación original")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
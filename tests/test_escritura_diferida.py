@@ -0,0 +1,119 @@
+"""
+Validación de la escritura diferida y del modo ASGI.
+
+Verifica que:
+- Las escrituras encoladas se ejecutan en orden y ``vaciar`` espera a todas
+- Con la cola llena la escritura se hace en el hilo que llama
+- Un error en una escritura no detiene a las siguientes
+- /api/v1/recommend por ASGI responde sin esperar al historial y lo guarda después
+- ASGI y Flask validan igual el pedido, incluido ``?top=`` cuando el cuerpo no trae ``top``
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+
+from models import buffer  # noqa: E402
+from models.recomendador import recomendar_carreras  # noqa: E402
+from tests.test_recomendacion_batch import generar_cuestionarios  # noqa: E402
+from utils import storage  # noqa: E402
+from utils.escritura_diferida import ColaEscritura  # noqa: E402
+
+
+def test_orden_y_vaciado():
+    cola = ColaEscritura()
+    escritos = []
+    for i in range(200):
+        cola.enviar(escritos.append, i)
+    cola.vaciar()
+    assert escritos == list(range(200))
+    assert cola.stats()["escritas"] == 200 and cola.stats()["directas"] == 0
+    cola.detener()
+
+
+def test_cola_llena_y_errores():
+    cola = ColaEscritura(capacidad=1)
+    ocupado, liberar = threading.Event(), threading.Event()
+    hilos = []
+    cola.enviar(lambda: ocupado.set() or liberar.wait(5))  # ocupa al escritor
+    assert ocupado.wait(5)
+    cola.enviar(lambda: None)
+    cola.enviar(lambda: hilos.append(threading.current_thread()))  # cola llena: en el llamador
+    assert hilos == [threading.current_thread()]
+    liberar.set()
+    cola.vaciar()
+
+    def _falla():
+        raise OSError("disco lleno")
+
+    cola.enviar(_falla)
+    cola.vaciar()
+    cola.enviar(hilos.append, "despues")
+    cola.vaciar()
+    assert hilos[-1] == "despues"
+    assert cola.stats()["errores"] == 1 and cola.stats()["directas"] == 1
+    cola.detener()
+
+
+def _llamar_asgi(application, cuerpo: bytes, query: bytes = b"") -> tuple[int, dict]:
+    mensajes = []
+
+    async def receive():
+        return {"type": "http.request", "body": cuerpo, "more_body": False}
+
+    async def send(mensaje):
+        mensajes.append(mensaje)
+
+    scope = {"type": "http", "path": "/api/v1/recommend", "method": "POST", "query_string": query}
+    asyncio.run(application(scope, receive, send))
+    return mensajes[0]["status"], json.loads(mensajes[1]["body"])
+
+
+def test_asgi_recomendar(tmp_path: Path, monkeypatch):
+    import app as app_module
+    from asgi import application
+
+    monkeypatch.setattr(storage, "HISTORIAL_DB", str(tmp_path / "historial.db"))
+    monkeypatch.setattr(storage, "HISTORIAL_FILE", str(tmp_path / "historial.json"))
+    monkeypatch.setattr(buffer, "BUFFER_FILE", tmp_path / "buffer.bin")
+
+    respuestas = generar_cuestionarios(1)[0]
+    estado, cuerpo = _llamar_asgi(application, json.dumps({"respuestas": respuestas}).encode())
+    assert estado == 200
+    assert cuerpo["recomendaciones"] == json.loads(json.dumps(recomendar_carreras(respuestas)))
+
+    app_module.cola_escritura.vaciar()
+    assert storage.obtener_historial_db().contar() == 1
+
+    estado, cuerpo = _llamar_asgi(application, b"{}")
+    assert estado == 400 and cuerpo["error"]
+
+    # Mismo parseo que la ruta Flask: ?top= cuando el cuerpo no lo trae, mismos errores
+    cliente = app_module.app.test_client()
+    estado, cuerpo = _llamar_asgi(application, json.dumps({"respuestas": respuestas}).encode(), b"top=2")
+    flask = cliente.post("/api/v1/recommend?top=2", json={"respuestas": respuestas})
+    assert estado == flask.status_code == 200
+    assert cuerpo == flask.get_json() and len(cuerpo["recomendaciones"]) <= 2
+    for crudo, query in ((b"no es json", b""), (json.dumps({"respuestas": respuestas}).encode(), b"top=x")):
+        estado, cuerpo = _llamar_asgi(application, crudo, query)
+        flask = cliente.post("/api/v1/recommend?" + query.decode(), data=crudo, content_type="application/json")
+        assert estado == flask.status_code == 400 and cuerpo == flask.get_json()
+    app_module.cola_escritura.vaciar()
+
+
+def main() -> int:
+    return pytest.main([__file__, "-q"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
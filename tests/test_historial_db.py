@@ -0,0 +1,148 @@
+"""
+Validación del historial persistente en SQLite.
+
+Verifica que:
+- Agregar tests no reescribe el historial y conserva features exactas
+- La lectura paginada respeta el orden (recientes primero), también navegando por id
+- El historial.json heredado se importa una sola vez
+- cargar_historial/agregar_al_historial siguen funcionando como antes
+- Los agregados incrementales coinciden con calcular_estadisticas
+- Los filtros por fecha y carrera usan el índice y se completan en bases anteriores
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from models.recomendador import calcular_estadisticas  # noqa: E402
+from utils import storage  # noqa: E402
+from utils.historial_db import HistorialDB  # noqa: E402
+
+
+def test_agregar_y_paginar(tmp_path: Path):
+    db = HistorialDB(tmp_path / "historial.db")
+    for i in range(25):
+        db.agregar([f"Carrera {i}", "Otra"], [90, 10], features=[0.1 * i, 1.0 / 3.0])
+
+    assert db.contar() == 25
+
+    primera = db.pagina(1, 10)
+    assert [t["carreras"][0] for t in primera[:2]] == ["Carrera 24", "Carrera 23"]
+    assert len(db.pagina(3, 10)) == 5
+    assert db.pagina(4, 10) == []
+
+    segunda = db.pagina_keyset(10, antes_de=primera[-1]["id"])
+    assert segunda == db.pagina(2, 10)
+    assert db.pagina_keyset(10, despues_de=segunda[0]["id"]) == primera
+    assert db.pagina_keyset(10) == primera
+    assert len(db.pagina_keyset(10, antes_de=db.pagina(3, 10)[0]["id"] + 1)) == 5
+
+    todos = db.todos()
+    assert len(todos) == 25
+    assert todos[0]["features"] == [0.0, 1.0 / 3.0]
+    assert todos[-1]["compatibilidades"] == [90, 10]
+
+
+def test_importa_json_heredado_una_vez(tmp_path: Path):
+    legado = [
+        {"fecha": "2024-01-01T10:00:00", "carreras": ["A", "B"], "compatibilidades": [60, 40], "features": None},
+        {"fecha": "2024-01-02T10:00:00", "carreras": ["C"], "compatibilidades": [100], "features": [1.5]},
+    ]
+    json_path = tmp_path / "historial.json"
+    json_path.write_text(json.dumps(legado), encoding="utf-8")
+
+    db = HistorialDB(tmp_path / "historial.db")
+    assert db.importar_json(json_path) == 2
+    db.agregar(["D"], [100])
+    assert db.importar_json(json_path) == 0
+    assert [t["carreras"][0] for t in db.todos()] == ["A", "C", "D"]
+
+
+def test_api_compatible(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(storage, "HISTORIAL_DB", str(tmp_path / "historial.db"))
+    monkeypatch.setattr(storage, "HISTORIAL_FILE", str(tmp_path / "historial.json"))
+
+    historial = storage.cargar_historial()
+    assert historial == []
+
+    historial = storage.agregar_al_historial(historial, ["A", "B"], [70, 30], features=[1.0, 2.0])
+    assert len(historial) == 1
+    assert storage.cargar_historial()[0]["carreras"] == ["A", "B"]
+
+    assert storage.guardar_historial([])
+    assert storage.cargar_historial() == []
+
+
+def test_agregados_incrementales(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(storage, "HISTORIAL_DB", str(tmp_path / "historial.db"))
+    monkeypatch.setattr(storage, "HISTORIAL_FILE", str(tmp_path / "historial.json"))
+
+    assert storage.cargar_estadisticas_agregadas() == calcular_estadisticas([])
+
+    storage.registrar_test(["Software Developer", "API Specialist"], [61, 39])
+    storage.registrar_test(["Networking Engineer", "Hardware Engineer", "Helpdesk Engineer"], [50, 30, 20])
+    storage.registrar_test(["Software Developer", "Carrera Externa"], [77, 23])
+    storage.registrar_test(["Technical Writer", "Project Manager"], [90])
+
+    esperado = calcular_estadisticas(storage.cargar_historial())
+    assert storage.cargar_estadisticas_agregadas() == esperado
+    assert esperado["carrera_popular"] == "Software Developer"
+
+    db = storage.obtener_historial_db()
+    assert db.reconstruir_agregados() == 4
+    assert storage.cargar_estadisticas_agregadas() == esperado
+
+    storage.guardar_historial([])
+    assert storage.cargar_estadisticas_agregadas()["total_tests"] == 0
+
+
+def test_filtros_fecha_y_carrera(tmp_path: Path):
+    ruta = tmp_path / "historial.db"
+    db = HistorialDB(ruta)
+    for dia in range(1, 11):
+        carreras = ["Software Developer", "API Specialist"] if dia % 2 else ["Helpdesk Engineer", "Software Developer"]
+        db.agregar(carreras, [80, 70], fecha=f"2024-03-{dia:02d}T12:00:00")
+
+    assert db.contar(desde="2024-03-03", hasta="2024-03-05") == 3
+    # ISO completo: ambos extremos inclusivos
+    assert db.contar(desde="2024-03-03T12:00:00", hasta="2024-03-05T12:00:00") == 3
+    assert db.contar(hasta="2024-03-05T11:59:59") == 4
+    assert db.contar(carrera="API Specialist") == 5
+    assert db.contar(carrera="Software Developer") == 10
+    pagina = db.pagina(1, 2, carrera="Helpdesk Engineer", desde="2024-03-05")
+    assert [t["fecha"][:10] for t in pagina] == ["2024-03-10", "2024-03-08"]
+    assert [t["fecha"][:10] for t in db.iterar(tamano_lote=2, hasta="2024-03-02")] == ["2024-03-01", "2024-03-02"]
+
+    # Base creada antes del índice: se completa al abrirla
+    db.cerrar()
+    conn = sqlite3.connect(ruta)
+    conn.execute("DELETE FROM tests_carreras")
+    conn.execute("DELETE FROM meta WHERE clave = 'indice_carreras_version'")
+    conn.commit()
+    conn.close()
+    assert HistorialDB(ruta).contar(carrera="API Specialist") == 5
+
+    db.reemplazar([{"fecha": "2024-01-01T00:00:00", "carreras": ["Hardware Engineer"], "compatibilidades": [50]}])
+    assert db.contar(carrera="API Specialist") == 0 and db.contar(carrera="Hardware Engineer") == 1
+
+
+def main() -> int:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+        test_agregar_y_paginar(Path(a))
+        test_importa_json_heredado_una_vez(Path(b))
+    with tempfile.TemporaryDirectory() as c:
+        test_filtros_fecha_y_carrera(Path(c))
+    print("✓ Historial SQLite: OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Validación de la inferencia lineal en NumPy.
+
+Verifica que:
+- El modelo exportado reproduce ``CalibratedClassifierCV.predict_proba``
+- El archivo plano se mapea sin cambios, en solo lectura y sin copiar los arrays
+- Los ``.npz`` de versiones anteriores se siguen leyendo
+- Otro proceso que reemplaza el archivo activo con ``os.replace`` es detectado por el registro
+- predict_top con el modelo lineal no importa scikit-learn
+"""
+from __future__ import annotations
+
+import mmap
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from models.inferencia_lineal import export_linear_model, load_linear_model, save_linear_model  # noqa: E402
+from models import modelo_ml  # noqa: E402
+from models.modelo_ml import get_active_model, load_or_train  # noqa: E402
+from models.recomendador import construir_matriz_usuarios  # noqa: E402
+from tests.test_recomendacion_batch import generar_cuestionarios  # noqa: E402
+
+
+def test_probabilidades_equivalentes():
+    art = load_or_train()
+    linear = export_linear_model(art.scaler, art.classifier)
+
+    X = np.vstack([
+        construir_matriz_usuarios(generar_cuestionarios(300)),
+        np.random.default_rng(0).uniform(-2.0, 10.0, size=(200, art.scaler.n_features_in_)),
+    ])
+    esperado = art.classifier.predict_proba(art.scaler.transform(X))
+
+    assert linear.classes_.tolist() == art.classifier.classes_.astype(str).tolist()
+    np.testing.assert_allclose(linear.predict_proba(X), esperado, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(linear.predict_proba(X[0]), esperado[:1], rtol=0, atol=1e-12)
+
+
+def _base_mmap(a: np.ndarray):
+    while isinstance(a, np.ndarray):
+        a = a.base
+    return a.obj if isinstance(a, memoryview) else a
+
+
+def test_guardar_y_cargar(tmp_path: Path):
+    art = load_or_train()
+    linear = export_linear_model(art.scaler, art.classifier, version="v-test")
+    save_linear_model(linear, tmp_path / "career_linear.bin")
+    cargado = load_linear_model(tmp_path / "career_linear.bin")
+
+    assert cargado.version == "v-test"
+    assert cargado.n_folds == linear.n_folds
+    assert cargado.classes_.tolist() == linear.classes_.tolist()
+    X = np.random.default_rng(1).uniform(0.0, 8.0, size=(20, art.scaler.n_features_in_))
+    np.testing.assert_array_equal(cargado.predict_proba(X), linear.predict_proba(X))
+
+    for nombre in ("coef", "intercept", "sig_a", "sig_b", "valid"):
+        a = getattr(cargado, nombre)
+        assert not a.flags.writeable
+        assert isinstance(_base_mmap(a), mmap.mmap)
+        assert a.ctypes.data % 64 == 0
+
+
+def test_carga_npz_anterior(tmp_path: Path):
+    art = load_or_train()
+    linear = export_linear_model(art.scaler, art.classifier, version="v-npz")
+    np.savez(
+        tmp_path / "career_linear.npz",
+        classes_=linear.classes_,
+        coef=linear.coef,
+        intercept=linear.intercept,
+        sig_a=linear.sig_a,
+        sig_b=linear.sig_b,
+        valid=linear.valid,
+        n_folds=np.array(linear.n_folds),
+        version=np.array(linear.version),
+    )
+    cargado = load_linear_model(tmp_path / "career_linear.npz")
+    assert cargado.version == "v-npz"
+    np.testing.assert_array_equal(cargado.coef, linear.coef)
+
+
+def test_archivo_plano_invalido(tmp_path: Path):
+    art = load_or_train()
+    ruta = tmp_path / "career_linear.bin"
+    save_linear_model(export_linear_model(art.scaler, art.classifier), ruta)
+    with open(ruta, "r+b") as f:
+        f.truncate(ruta.stat().st_size - 64)
+    try:
+        load_linear_model(ruta)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("se esperaba ValueError con un archivo truncado")
+
+
+def test_reemplazo_atomico_entre_procesos(tmp_path: Path):
+    art = load_or_train()
+    linear = export_linear_model(art.scaler, art.classifier)
+    modelo_ml._save_meta({"version": "v1", "calibrated": True}, tmp_path)
+    save_linear_model(
+        modelo_ml.LinearCalibratedModel(**{**linear.__dict__, "version": "v1"}), tmp_path / "career_linear.bin"
+    )
+    registro = modelo_ml.ModelRegistry(artifact_dir=tmp_path, check_interval=0.0)
+    anterior = registro.get()
+    assert anterior.version == "v1" and anterior.artifacts is None
+
+    # Otro "worker" publica v2: coeficientes nuevos y un solo rename del archivo
+    codigo = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from models.inferencia_lineal import load_linear_model, save_linear_model\n"
+        "from models.modelo_ml import LinearCalibratedModel, _save_meta\n"
+        "d = Path(sys.argv[1])\n"
+        "m = load_linear_model(d / 'career_linear.bin')\n"
+        "_save_meta({'version': 'v2', 'calibrated': True}, d)\n"
+        "save_linear_model(LinearCalibratedModel(**{**m.__dict__, 'coef': m.coef * 0.5, 'version': 'v2'}), "
+        "d / 'career_linear.bin')\n"
+    )
+    resultado = subprocess.run([sys.executable, "-c", codigo, str(tmp_path)], cwd=_ROOT)
+    assert resultado.returncode == 0
+
+    nuevo = registro.get()
+    assert nuevo is not anterior
+    assert nuevo.version == "v2"
+    np.testing.assert_array_equal(nuevo.linear.coef, linear.coef * 0.5)
+    # El mapeo anterior sigue apuntando al inodo reemplazado
+    np.testing.assert_array_equal(anterior.linear.coef, linear.coef)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["career_linear.bin", "career_meta.json"]
+
+
+def test_prediccion_sin_sklearn():
+    assert get_active_model().linear is not None  # exporta el archivo plano si aún no existe
+    codigo = (
+        "import sys\n"
+        "from models.recomendador import recomendar_carreras\n"
+        "assert recomendar_carreras([(i, 2) for i in range(30)])\n"
+        "sys.exit(1 if any(m.startswith('sklearn') for m in sys.modules) else 0)\n"
+    )
+    resultado = subprocess.run([sys.executable, "-c", codigo], cwd=_ROOT)
+    assert resultado.returncode == 0
+
+
+def main() -> int:
+    import tempfile
+
+    test_probabilidades_equivalentes()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_guardar_y_cargar(Path(tmp))
+    for test in (test_carga_npz_anterior, test_archivo_plano_invalido, test_reemplazo_atomico_entre_procesos):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    test_prediccion_sin_sklearn()
+    print("✓ Inferencia lineal: OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Validación de los metadatos precalculados del dataset.
+
+Verifica que:
+- Los límites guardados coinciden con los calculados desde el CSV
+- Un CSV modificado invalida los metadatos; uno solo tocado (mtime nuevo) se
+  rehashea una vez y la huella guardada se actualiza
+- Con metadatos válidos, construir un vector de usuario no importa pandas
+- La caché binaria del dataset reproduce exactamente el CSV y solo rehashea el CSV
+  si cambian su tamaño o mtime
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from models import entrenamiento  # noqa: E402
+from models.entrenamiento import (  # noqa: E402
+    FEATURE_COLUMNS,
+    TARGET_COLUMN,
+    cargar_datos,
+    cargar_matriz_datos,
+    cargar_metadatos_dataset,
+    construir_metadatos_dataset,
+    obtener_limites_features,
+)
+
+
+def test_metadatos_coinciden_con_csv(tmp_path: Path):
+    destino = tmp_path / "dataset_meta.json"
+    meta = construir_metadatos_dataset(destino=destino)
+
+    esperado = obtener_limites_features(_ROOT / "CareerMap.csv")
+    assert meta["feature_columns"] == FEATURE_COLUMNS
+    assert {c: tuple(v) for c, v in meta["bounds"].items()} == esperado
+    assert len(meta["classes"]) > 1
+    assert cargar_metadatos_dataset(origen=destino) == meta
+
+
+def test_csv_modificado_invalida_metadatos(tmp_path: Path):
+    csv = tmp_path / "CareerMap.csv"
+    shutil.copy2(_ROOT / "CareerMap.csv", csv)
+    destino = tmp_path / "dataset_meta.json"
+    construir_metadatos_dataset(csv_path=csv, destino=destino)
+    assert cargar_metadatos_dataset(csv_path=csv, origen=destino) is not None
+
+    lineas = csv.read_text(encoding="utf-8").splitlines(keepends=True)
+    csv.write_text("".join(lineas[:-1]), encoding="utf-8")
+    assert cargar_metadatos_dataset(csv_path=csv, origen=destino) is None
+
+
+def test_csv_tocado_actualiza_huella(tmp_path: Path, monkeypatch):
+    csv = tmp_path / "CareerMap.csv"
+    shutil.copy2(_ROOT / "CareerMap.csv", csv)
+    destino = tmp_path / "dataset_meta.json"
+    construir_metadatos_dataset(csv_path=csv, destino=destino)
+
+    st = csv.stat()
+    os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))  # p. ej. tras un checkout
+    hasheados = []
+    huella_csv = entrenamiento._huella_csv
+
+    def _contar(path, con_hash=True):
+        if con_hash:
+            hasheados.append(path)
+        return huella_csv(path, con_hash)
+
+    monkeypatch.setattr(entrenamiento, "_huella_csv", _contar)
+    for _ in range(3):
+        assert cargar_metadatos_dataset(csv_path=csv, origen=destino) is not None
+    assert len(hasheados) == 1
+    assert json.loads(destino.read_text(encoding="utf-8"))["csv_huella"]["mtime_ns"] == csv.stat().st_mtime_ns
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_arranque_sin_pandas():
+    obtener_limites_features()  # asegura que exista dataset_meta.json
+    codigo = (
+        "import sys\n"
+        "from models.recomendador import construir_vector_usuario\n"
+        "construir_vector_usuario([(0, 1), (5, 2)])\n"
+        "sys.exit(1 if 'pandas' in sys.modules else 0)\n"
+    )
+    resultado = subprocess.run([sys.executable, "-c", codigo], cwd=_ROOT)
+    assert resultado.returncode == 0
+
+
+def test_cache_binaria_equivale_al_csv(tmp_path: Path):
+    csv = tmp_path / "CareerMap.csv"
+    shutil.copy2(_ROOT / "CareerMap.csv", csv)
+    cache = tmp_path / "cache"
+
+    df = cargar_datos(csv)
+    primera = cargar_matriz_datos(csv, cache_dir=cache)
+    segunda = cargar_matriz_datos(csv, cache_dir=cache)
+
+    assert isinstance(segunda.X, np.memmap) and not segunda.X.flags.writeable
+    np.testing.assert_array_equal(segunda.X, df[FEATURE_COLUMNS].to_numpy(dtype=float))
+    np.testing.assert_array_equal(segunda.etiquetas(), df[TARGET_COLUMN].astype(str).to_numpy())
+    np.testing.assert_array_equal(primera.classes, np.unique(segunda.etiquetas()))
+
+    lineas = csv.read_text(encoding="utf-8").splitlines(keepends=True)
+    csv.write_text("".join(lineas[:-1]), encoding="utf-8")
+    assert cargar_matriz_datos(csv, cache_dir=cache).X.shape[0] == len(df) - 1
+    assert len([d for d in cache.iterdir() if d.is_dir()]) == 2
+
+
+def test_cache_solo_rehashea_si_cambia_el_csv(tmp_path: Path, monkeypatch):
+    csv = tmp_path / "CareerMap.csv"
+    shutil.copy2(_ROOT / "CareerMap.csv", csv)
+    cache = tmp_path / "cache"
+
+    hasheados = []
+    huella_csv = entrenamiento._huella_csv
+
+    def _contar(path, con_hash=True):
+        if con_hash:
+            hasheados.append(path)
+        return huella_csv(path, con_hash)
+
+    monkeypatch.setattr(entrenamiento, "_huella_csv", _contar)
+    for _ in range(3):
+        cargar_matriz_datos(csv, cache_dir=cache)
+    assert len(hasheados) == 1
+
+    with csv.open("a", encoding="utf-8") as f:
+        f.write(csv.read_text(encoding="utf-8").splitlines(keepends=True)[1])
+    cargar_matriz_datos(csv, cache_dir=cache)
+    cargar_matriz_datos(csv, cache_dir=cache)
+    assert len(hasheados) == 2
+
+
+def main() -> int:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b, tempfile.TemporaryDirectory() as c:
+        test_metadatos_coinciden_con_csv(Path(a))
+        test_csv_modificado_invalida_metadatos(Path(b))
+        test_cache_binaria_equivale_al_csv(Path(c))
+    test_arranque_sin_pandas()
+    print("✓ Metadatos del dataset: OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Validación de la instrumentación por etapas.
+
+Verifica que:
+- El histograma acumula por bucket y estima cuantiles
+- ``medir`` registra la etapa y la anota en la traza activa
+- recomendar_carreras registra vector, eje, normalización, predicción y requisitos
+- /metrics está apagado por defecto; encendido responde en formato Prometheus (los
+  ``*_total`` como counter) y el header de traza agrega Server-Timing
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+
+from models import buffer, recomendador  # noqa: E402
+from tests.test_recomendacion_batch import generar_cuestionarios  # noqa: E402
+from utils import storage  # noqa: E402
+from utils.metricas import METRICAS, Histograma, RegistroMetricas, finalizar_traza, iniciar_traza  # noqa: E402
+
+
+def test_histograma_y_cuantiles():
+    h = Histograma()
+    for _ in range(90):
+        h.observar(0.0007)
+    for _ in range(10):
+        h.observar(0.3)
+    assert h.cantidad == 100 and h.suma == pytest.approx(90 * 0.0007 + 3.0)
+    assert 0.0005 <= h.cuantil(0.5) <= 0.001
+    assert 0.25 <= h.cuantil(0.99) <= 0.5
+
+    registro = RegistroMetricas()
+    registro.observar("eje", 0.002)
+    registro.incrementar("errores_total")
+    texto = registro.exportar_prometheus({"cache_entradas": 3}, {"cargas_total": 2})
+    assert 'careermate_etapa_segundos_bucket{etapa="eje",le="0.0025"} 1' in texto
+    assert 'careermate_etapa_segundos_count{etapa="eje"} 1' in texto
+    assert "careermate_errores_total 1" in texto and "careermate_cache_entradas 3" in texto
+    assert "# TYPE careermate_cargas_total counter\ncareermate_cargas_total 2" in texto
+    assert "# TYPE careermate_cache_entradas gauge" in texto
+
+
+def test_etapas_de_recomendacion():
+    recomendador.CACHE_RECOMENDACIONES.limpiar()
+    token = iniciar_traza()
+    recomendador.recomendar_carreras(generar_cuestionarios(1, seed=11)[0])
+    etapas = [etapa for etapa, _ in finalizar_traza(token)]
+
+    for etapa in ("vector", "eje", "normalizacion", "carga_modelo", "predict_proba", "prediccion", "requisitos", "recomendacion_total"):
+        assert etapa in etapas
+    assert etapas[-1] == "recomendacion_total"
+    assert METRICAS.resumen()["vector"]["cantidad"] >= 1
+
+
+def test_endpoint_metrics_y_traza(tmp_path: Path, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(storage, "HISTORIAL_DB", str(tmp_path / "historial.db"))
+    monkeypatch.setattr(storage, "HISTORIAL_FILE", str(tmp_path / "historial.json"))
+    monkeypatch.setattr(buffer, "BUFFER_FILE", tmp_path / "buffer.bin")
+    cliente = app_module.app.test_client()
+
+    respuestas = generar_cuestionarios(1, seed=12)[1]
+    r = cliente.post("/api/v1/recommend", json=respuestas, headers={"X-CareerMate-Trace": "1"})
+    app_module.cola_escritura.vaciar()
+    assert "persistencia;dur=" in r.headers["Server-Timing"]
+    assert "Server-Timing" not in cliente.post("/api/v1/recommend", json=respuestas).headers
+    app_module.cola_escritura.vaciar()
+
+    assert cliente.get("/metrics").status_code == 404
+    monkeypatch.setattr(app_module, "METRICAS_ENDPOINT", True)
+    texto = cliente.get("/metrics").get_data(as_text=True)
+    assert "# TYPE careermate_etapa_segundos histogram" in texto
+    assert 'etapa="request_api_recomendar"' in texto and 'etapa="historial_escritura"' in texto
+    assert "# TYPE careermate_cache_aciertos_total counter" in texto
+    assert "# TYPE careermate_cache_entradas gauge" in texto
+
+
+def main() -> int:
+    return pytest.main([__file__, "-q"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Validación de la recomendación por lotes.
+
+Genera cuestionarios sintéticos (aleatorios, todo neutral, arquetipos por
+feature principal) y verifica que ``recomendar_carreras_batch`` devuelva las
+mismas recomendaciones que ``recomendar_carreras`` fila por fila. La matriz
+de requisitos mínimos equivale a ``cumple_requisitos_minimos`` y los motivos
+de exclusión solo se arman con el log INFO habilitado.
+"""
+from __future__ import annotations
+
+import logging
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+import numpy as np  # noqa: E402
+
+from models.ejes_profesionales import EJE_IDS, calcular_scores_ejes, seleccionar_eje_batch  # noqa: E402
+from models.entrenamiento import FEATURE_COLUMNS  # noqa: E402
+from models.preguntas import obtener_todas_preguntas  # noqa: E402
+from models import recomendador  # noqa: E402
+from models.recomendador import (  # noqa: E402
+    CARRERAS_REQUISITOS,
+    MATRIZ_REQUISITOS,
+    REQUISITOS_MINIMOS,
+    construir_matriz_usuarios,
+    construir_vector_usuario,
+    cumple_requisitos_minimos,
+    factibilidad_requisitos,
+    recomendar_carreras,
+    recomendar_carreras_batch,
+)
+
+
+def generar_cuestionarios(n: int, seed: int = 7) -> list[list[tuple[int, int]]]:
+    rng = np.random.default_rng(seed)
+    preguntas = obtener_todas_preguntas()
+    cuestionarios: list[list[tuple[int, int]]] = []
+
+    # Todo neutral / todo mínimo / todo máximo
+    cuestionarios.append([(i, len(p["opciones"]) // 2) for i, p in enumerate(preguntas)])
+    cuestionarios.append([(i, 0) for i in range(len(preguntas))])
+    cuestionarios.append([(i, len(p["opciones"]) - 1) for i, p in enumerate(preguntas)])
+
+    # Arquetipos: una pregunta técnica al máximo, el resto bajo
+    for foco, p in enumerate(preguntas):
+        if p["tipo"] != "tecnica":
+            continue
+        cuestionarios.append([(i, len(q["opciones"]) - 1 if i == foco else 0) for i, q in enumerate(preguntas)])
+
+    # Aleatorios, algunos incompletos
+    while len(cuestionarios) < n:
+        respuestas = [(i, int(rng.integers(len(p["opciones"])))) for i, p in enumerate(preguntas)]
+        if rng.random() < 0.2:
+            respuestas = [r for r in respuestas if rng.random() < 0.6]
+        cuestionarios.append(respuestas)
+
+    cuestionarios.append([])
+    return cuestionarios
+
+
+def _resumen(resultados: list[dict]) -> list[tuple]:
+    return [(r["carrera"], r["eje_profesional"], r["es_hibrido"], r["razones"]) for r in resultados]
+
+
+def test_matriz_equivale_a_vectores():
+    cuestionarios = generar_cuestionarios(60)[:-1]
+    matriz = construir_matriz_usuarios(cuestionarios)
+    filas = np.vstack([construir_vector_usuario(r) for r in cuestionarios])
+    np.testing.assert_allclose(matriz, filas, rtol=0, atol=1e-12)
+
+
+def test_ejes_batch_equivale_a_scores_por_dict():
+    X = construir_matriz_usuarios(generar_cuestionarios(150)[:-1])
+    ejes = seleccionar_eje_batch(X)
+
+    for i, fila in enumerate(X):
+        scores = calcular_scores_ejes({col: float(v) for col, v in zip(FEATURE_COLUMNS, fila)})
+        normalizados = np.array([scores[e].score_normalizado for e in EJE_IDS])
+        np.testing.assert_allclose(ejes.scores_normalizados[i], normalizados, atol=1e-9)
+
+        ranking = sorted(scores.values(), key=lambda s: s.score_normalizado, reverse=True)
+        margen = ranking[0].score_normalizado - ranking[1].score_normalizado
+        if margen > 1e-9:
+            assert ejes.eje_principal(i) == ranking[0].eje_id
+        assert bool(ejes.es_hibrido[i]) == (margen < 0.15)
+
+        detalle = ejes.resultado(i)
+        assert detalle.eje_principal == ejes.eje_principal(i)
+        assert set(detalle.scores) == set(EJE_IDS)
+        assert detalle.explicacion
+
+
+def test_batch_equivale_a_individual():
+    cuestionarios = generar_cuestionarios(120)
+    lote = recomendar_carreras_batch(cuestionarios, tamano_lote=50)
+
+    assert len(lote) == len(cuestionarios)
+    for respuestas, resultado in zip(cuestionarios, lote):
+        esperado = recomendar_carreras(respuestas)
+        assert _resumen(resultado) == _resumen(esperado)
+        for a, b in zip(resultado, esperado):
+            assert abs(a["probabilidad"] - b["probabilidad"]) < 1e-9
+            assert abs(a["compatibilidad"] - b["compatibilidad"]) <= 1
+
+
+def test_matriz_requisitos_equivale_a_dict():
+    assert MATRIZ_REQUISITOS.shape == (len(CARRERAS_REQUISITOS), len(FEATURE_COLUMNS))
+    assert not MATRIZ_REQUISITOS.flags.writeable
+    for carrera, fila in zip(CARRERAS_REQUISITOS, MATRIZ_REQUISITOS):
+        assert int(np.isfinite(fila).sum()) == len(REQUISITOS_MINIMOS.get(carrera, {}))
+
+    rng = np.random.default_rng(3)
+    X = np.vstack([
+        construir_matriz_usuarios(generar_cuestionarios(80)[:-1]),
+        rng.uniform(1.0, 2.2, size=(200, len(FEATURE_COLUMNS))),
+    ])
+    X[-5:, ::3] = np.nan  # como cumple_requisitos_minimos, un NaN no excluye
+    factible = factibilidad_requisitos(X)
+    assert factible.shape == (X.shape[0], len(CARRERAS_REQUISITOS))
+    for i, fila in enumerate(X):
+        perfil = {col: float(v) for col, v in zip(FEATURE_COLUMNS, fila)}
+        esperado = [cumple_requisitos_minimos(c, perfil)[0] for c in CARRERAS_REQUISITOS]
+        assert factible[i].tolist() == esperado
+        assert factibilidad_requisitos(fila).tolist() == esperado
+    assert 0 < factible.sum() < factible.size
+
+
+def test_motivos_solo_con_info(monkeypatch, caplog):
+    llamadas = []
+    original = recomendador.cumple_requisitos_minimos
+
+    def contar(carrera, perfil):
+        llamadas.append(carrera)
+        return original(carrera, perfil)
+
+    monkeypatch.setattr(recomendador, "cumple_requisitos_minimos", contar)
+    cuestionarios = generar_cuestionarios(120)[:-1]
+
+    caplog.set_level(logging.WARNING, logger="models.recomendador")
+    for respuestas in cuestionarios:
+        recomendador._recomendar_carreras(respuestas, 3)
+    recomendar_carreras_batch(cuestionarios)
+    assert llamadas == []
+
+    caplog.set_level(logging.INFO, logger="models.recomendador")
+    for respuestas in cuestionarios:
+        recomendador._recomendar_carreras(respuestas, 3)
+    assert llamadas
+    assert any("Excluida" in r.getMessage() for r in caplog.records)
+
+
+def main() -> int:
+    test_matriz_equivale_a_vectores()
+    test_ejes_batch_equivale_a_scores_por_dict()
+    test_batch_equivale_a_individual()
+    test_matriz_requisitos_equivale_a_dict()
+    print("✓ Recomendación por lotes equivalente a la individual")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
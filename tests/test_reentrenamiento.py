@@ -0,0 +1,172 @@
+"""
+Validación del reentrenamiento en segundo plano.
+
+Verifica que:
+- Reentrenar publica una versión nueva y mueve el puntero ACTIVE
+- El registro adopta la versión nueva y la anterior sigue siendo utilizable
+- Las muestras del buffer se acumulan entre versiones
+- Si el entrenamiento falla, el buffer se restaura
+- El servicio se dispara por cantidad de muestras o por tiempo
+- El modo incremental (partial_fit) publica versiones y mide la deriva
+"""
+from __future__ import annotations
+
+import copy
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from models import buffer, modelo_ml  # noqa: E402
+from models.aprendizaje_incremental import REFIT_LINEAR, _reescalar_coeficientes, actualizar_incremental  # noqa: E402
+from models.entrenamiento import DatasetMatriz, FEATURE_COLUMNS, cargar_matriz_datos  # noqa: E402
+from models.reentrenamiento import ServicioReentrenamiento  # noqa: E402
+
+
+@pytest.fixture
+def entorno(tmp_path: Path, monkeypatch):
+    modelo_ml.load_or_train()
+    origen = modelo_ml._paths()
+    artifact_dir = tmp_path / "artifacts"
+    artifact_dir.mkdir()
+    for key in ("scaler", "model", "meta"):
+        shutil.copy2(origen[key], artifact_dir / origen[key].name)
+
+    monkeypatch.setattr(buffer, "BUFFER_FILE", tmp_path / "buffer.bin")
+
+    # Submuestra del dataset para que cada reentrenamiento tarde poco
+    datos = cargar_matriz_datos()
+    reducido = DatasetMatriz(X=np.asarray(datos.X[::6]), y=np.asarray(datos.y[::6]), classes=datos.classes)
+    monkeypatch.setattr(modelo_ml, "cargar_matriz_datos", lambda *a, **k: reducido)
+    return artifact_dir, datos.classes
+
+
+def _agregar_muestras(clases: np.ndarray, n: int) -> None:
+    rng = np.random.default_rng(n)
+    for _ in range(n):
+        a, b = rng.choice(len(clases), size=2, replace=False)
+        buffer.add_to_buffer(rng.uniform(0.0, 8.0, len(FEATURE_COLUMNS)).tolist(), [str(clases[a]), str(clases[b])])
+
+
+def test_publica_version_y_cambia_puntero(entorno):
+    artifact_dir, clases = entorno
+    registro = modelo_ml.ModelRegistry(artifact_dir=artifact_dir, check_interval=0.0)
+    anterior = registro.get()
+
+    _agregar_muestras(clases, 3)
+    assert modelo_ml.retrain_from_buffer(artifact_dir)
+    assert buffer.buffer_size() == 0
+
+    version = (artifact_dir / "ACTIVE").read_text(encoding="utf-8")
+    assert (artifact_dir / "versions" / version / "career_linear.bin").exists()
+
+    nuevo = registro.get()
+    assert nuevo is not anterior
+    assert nuevo.version == version
+    X = np.full((1, len(FEATURE_COLUMNS)), 3.0)
+    assert anterior.predict_proba(X).shape == nuevo.predict_proba(X).shape
+
+    _agregar_muestras(clases, 1)
+    assert modelo_ml.retrain_from_buffer(artifact_dir)
+    meta = json.loads(modelo_ml._paths(modelo_ml._active_dir(artifact_dir))["meta"].read_text(encoding="utf-8"))
+    assert meta["n_buffer_samples"] == 8
+    assert registro.get().version == meta["version"] != version
+
+
+def test_fallo_restaura_buffer(entorno, monkeypatch):
+    artifact_dir, clases = entorno
+    _agregar_muestras(clases, 2)
+
+    def _falla(*args, **kwargs):
+        raise RuntimeError("entrenamiento interrumpido")
+
+    monkeypatch.setattr(modelo_ml, "_retrain_version", _falla)
+    with pytest.raises(RuntimeError):
+        modelo_ml.retrain_from_buffer(artifact_dir)
+
+    assert buffer.buffer_size() == 2
+    assert not (artifact_dir / "ACTIVE").exists()
+
+
+def test_servicio_dispara_por_umbral_o_tiempo(entorno, monkeypatch):
+    _, clases = entorno
+    llamadas = []
+    monkeypatch.setattr(modelo_ml, "retrain_from_buffer", lambda artifact_dir=None: llamadas.append(1) or True)
+
+    servicio = ServicioReentrenamiento(umbral_muestras=2, intervalo_max=3600.0)
+    assert not servicio.ejecutar_una_vez()
+
+    _agregar_muestras(clases, 1)
+    assert not servicio.ejecutar_una_vez()
+    servicio.solicitar()
+    assert servicio.ejecutar_una_vez()
+
+    servicio.umbral_muestras = 10
+    assert not servicio.ejecutar_una_vez()
+    servicio.intervalo_max = 0.0
+    assert servicio.ejecutar_una_vez()
+    assert len(llamadas) == 2
+    assert servicio.stats()["reentrenamientos"] == 2
+
+
+def _agregar_filas_reales(n: int) -> None:
+    datos = cargar_matriz_datos()
+    etiquetas = datos.etiquetas()
+    rng = np.random.default_rng(n)
+    for i, j in rng.integers(len(etiquetas), size=(n, 2)):
+        buffer.add_to_buffer(datos.X[i].tolist(), [str(etiquetas[i]), str(etiquetas[j])])
+
+
+def test_reescalar_conserva_decision():
+    art = modelo_ml.load_or_train()
+    scaler, clf = copy.deepcopy(art.scaler), copy.deepcopy(art.classifier)
+    X = np.asarray(cargar_matriz_datos().X[:50])
+    antes = [f.estimator.decision_function(scaler.transform(X)) for f in clf.calibrated_classifiers_]
+
+    media, escala = scaler.mean_.copy(), scaler.scale_.copy()
+    scaler.partial_fit(np.random.default_rng(0).uniform(0.0, 8.0, size=(30, X.shape[1])))
+    _reescalar_coeficientes(clf, media, escala, scaler.mean_, scaler.scale_)
+
+    for fold, esperado in zip(clf.calibrated_classifiers_, antes):
+        np.testing.assert_allclose(fold.estimator.decision_function(scaler.transform(X)), esperado, atol=1e-9)
+
+
+def test_actualizacion_incremental(entorno):
+    artifact_dir, _ = entorno
+    assert actualizar_incremental(artifact_dir) is None
+
+    _agregar_filas_reales(20)
+    resumen = actualizar_incremental(artifact_dir)
+    assert resumen["filas"] == 40 and resumen["lotes"] == 1 and not resumen["recalibrado"]
+    assert resumen["deriva"]["top1_agreement"] > 0.9
+    assert buffer.buffer_size() == 0
+
+    activa = modelo_ml._active_dir(artifact_dir)
+    assert activa.name == resumen["version"]
+    assert (activa / REFIT_LINEAR).exists()
+
+    _agregar_filas_reales(10)
+    resumen = actualizar_incremental(artifact_dir, recalibrar=True)
+    meta = modelo_ml._load_meta(modelo_ml._active_dir(artifact_dir))
+    assert resumen["recalibrado"] and meta["incremental_batches"] == 2
+    assert meta["n_buffer_samples"] == 60
+
+    assert modelo_ml.retrain_from_buffer(artifact_dir, force=True)
+    meta = modelo_ml._load_meta(modelo_ml._active_dir(artifact_dir))
+    assert meta["incremental_batches"] == 0 and meta["n_buffer_samples"] == 60
+    assert not (modelo_ml._active_dir(artifact_dir) / REFIT_LINEAR).exists()
+
+
+def main() -> int:
+    return pytest.main([__file__, "-q"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Validación del registro de modelo residente en proceso.
+
+Verifica que:
+- Los artefactos se cargan una sola vez aunque se pidan muchas predicciones
+- Un cambio en los artefactos en disco provoca exactamente una recarga
+- El contador de pedidos no pierde incrementos con varios hilos
+"""
+from __future__ import annotations
+
+import json
+import shutil
+import sys
+import threading
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from models.modelo_ml import ModelRegistry, _paths, load_or_train  # noqa: E402
+
+
+def _copiar_artefactos(destino: Path) -> Path:
+    load_or_train()
+    origen = _paths()
+    destino.mkdir(parents=True, exist_ok=True)
+    for key in ("scaler", "model", "meta"):
+        shutil.copy2(origen[key], destino / origen[key].name)
+    return destino
+
+
+def test_registro_carga_una_sola_vez(tmp_path: Path):
+    registro = ModelRegistry(artifact_dir=_copiar_artefactos(tmp_path / "artifacts"), check_interval=0.0)
+
+    primero = registro.get()
+    for _ in range(50):
+        assert registro.get() is primero
+
+    stats = registro.stats()
+    assert stats["load_count"] == 1
+    assert stats["requests"] == 51
+    assert stats["last_load_seconds"] > 0
+
+
+def test_registro_recarga_si_cambian_artefactos(tmp_path: Path):
+    artifact_dir = _copiar_artefactos(tmp_path / "artifacts")
+    registro = ModelRegistry(artifact_dir=artifact_dir, check_interval=0.0)
+    anterior = registro.get()
+
+    meta_path = _paths(artifact_dir)["meta"]
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    meta["version"] = "test-nueva-version"
+    meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    nuevo = registro.get()
+    assert nuevo is not anterior
+    assert nuevo.version == "test-nueva-version"
+    assert registro.get() is nuevo
+    assert registro.stats()["load_count"] == 2
+
+
+def test_contador_de_pedidos_concurrente(tmp_path: Path):
+    registro = ModelRegistry(artifact_dir=_copiar_artefactos(tmp_path / "artifacts"), check_interval=3600.0)
+    registro.get()
+    hilos, por_hilo = 8, 2000
+
+    def _pedir() -> None:
+        for _ in range(por_hilo):
+            registro.get()
+
+    trabajadores = [threading.Thread(target=_pedir) for _ in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    assert registro.stats()["requests"] == 1 + hilos * por_hilo
+
+
+def main() -> int:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_registro_carga_una_sola_vez(Path(tmp) / "a")
+        test_registro_recarga_si_cambian_artefactos(Path(tmp) / "b")
+        test_contador_de_pedidos_concurrente(Path(tmp) / "c")
+    print("✓ Registro de modelo: OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Validación del índice de vecinos de v1 contra la fuerza bruta.
+
+Verifica que:
+- ``IndiceVecinos`` da, por carrera, la misma distancia mínima que
+  ``euclidean_distances`` y las carreras en orden de primera aparición
+- Con empates (filas repetidas entre carreras, consultas sobre filas del
+  dataset) el orden y las distancias coinciden con el recorrido original
+- El camino servido (``cargar_matriz_datos`` → ``obtener_indice_vecinos`` →
+  ``recomendar_carreras``) equivale a leer Datos_limpio.csv por fuerza bruta
+- ``cargar_matriz_datos`` solo rehashea el CSV si cambian tamaño o mtime y
+  rearma una caché inválida sin romper los arrays ya mapeados
+
+v1 tiene su propio paquete ``models``: el fixture lo importa en lugar del
+de la raíz mientras corren estas pruebas y después restaura el original.
+"""
+from __future__ import annotations
+
+import importlib
+import shutil
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+_ROOT = Path(__file__).resolve().parents[1]
+_V1 = _ROOT / "v1"
+
+pd = pytest.importorskip("pandas")
+euclidean_distances = pytest.importorskip("sklearn.metrics.pairwise").euclidean_distances
+
+
+def _modulos_models() -> dict:
+    return {k: m for k, m in sys.modules.items() if k == "models" or k.startswith("models.")}
+
+
+@pytest.fixture(scope="module")
+def v1():
+    originales = _modulos_models()
+    for nombre in originales:
+        del sys.modules[nombre]
+    sys.path.insert(0, str(_V1))
+    try:
+        yield SimpleNamespace(
+            entrenamiento=importlib.import_module("models.entrenamiento"),
+            recomendador=importlib.import_module("models.recomendador"),
+            preguntas=importlib.import_module("models.preguntas"),
+        )
+    finally:
+        sys.path.remove(str(_V1))
+        for nombre in _modulos_models():
+            del sys.modules[nombre]
+        sys.modules.update(originales)
+
+
+def _fuerza_bruta(X: np.ndarray, etiquetas, vector: np.ndarray) -> dict:
+    """Recorrido original de v1: mínimo por carrera en orden de primera aparición."""
+    distancias = euclidean_distances(np.asarray(vector, dtype=float).reshape(1, -1), X)[0]
+    minimos: dict = {}
+    for carrera, distancia in zip(etiquetas, distancias):
+        if carrera not in minimos or distancia < minimos[carrera]:
+            minimos[carrera] = distancia
+    return minimos
+
+
+def _comparar(indice, X: np.ndarray, etiquetas, consultas: np.ndarray) -> None:
+    for q in consultas:
+        esperado = _fuerza_bruta(X, etiquetas, q)
+        obtenido = indice.distancias_minimas(q)
+        assert indice.clases == list(esperado)
+        np.testing.assert_allclose(obtenido, list(esperado.values()), rtol=0, atol=1e-6)
+
+
+def test_datos_limpio_equivale_a_fuerza_bruta(v1):
+    df = pd.read_csv(_V1 / "Datos_limpio.csv")
+    X = df[v1.entrenamiento.FEATURE_COLUMNS].to_numpy(dtype=float)
+    etiquetas = df[v1.entrenamiento.TARGET_COLUMN].astype(str).tolist()
+
+    rng = np.random.default_rng(0)
+    consultas = np.vstack([X, rng.uniform(X.min(axis=0), X.max(axis=0), size=(100, X.shape[1]))])
+    _comparar(v1.recomendador.IndiceVecinos(X, etiquetas), X, etiquetas, consultas)
+
+
+def test_empates_equivalen_a_fuerza_bruta(v1):
+    rng = np.random.default_rng(1)
+    base = rng.integers(0, 5, size=(12, 6)).astype(float)
+    # Filas repetidas en varias carreras y etiquetas intercaladas
+    X = np.vstack([base, base[::-1], base[:4]])
+    etiquetas = [f"C{i % 5}" for i in range(len(X))]
+    etiquetas[-4:] = ["C7"] * 4
+
+    consultas = np.vstack([X, np.round(rng.uniform(0, 4, size=(50, 6)))])
+    indice = v1.recomendador.IndiceVecinos(X, etiquetas)
+    _comparar(indice, X, etiquetas, consultas)
+
+    # Una consulta sobre una fila compartida empata en 0 para varias carreras
+    d = indice.distancias_minimas(base[0])
+    assert (d == 0.0).sum() >= 2 and (d >= 0.0).all()
+
+
+def test_camino_servido_equivale_a_fuerza_bruta(v1, tmp_path: Path, monkeypatch):
+    ent, rec = v1.entrenamiento, v1.recomendador
+    cache = tmp_path / "cache"
+    cargar = ent.cargar_matriz_datos
+    monkeypatch.setattr(ent, "cargar_matriz_datos", lambda *a, **k: cargar(*a, cache_dir=cache, **k))
+    monkeypatch.setattr(rec, "_INDICE_VECINOS", None)
+
+    df = pd.read_csv(_V1 / "Datos_limpio.csv")
+    X = df[ent.FEATURE_COLUMNS].to_numpy(dtype=float)
+    etiquetas = df[ent.TARGET_COLUMN].astype(str).tolist()
+
+    indice = rec.obtener_indice_vecinos()
+    assert rec.obtener_indice_vecinos() is indice
+    _comparar(indice, X, etiquetas, X)
+
+    rng = np.random.default_rng(2)
+    total = len(v1.preguntas.PREGUNTAS_BASE)
+    for _ in range(30):
+        respuestas = [
+            (i, int(rng.integers(0, len(v1.preguntas.PREGUNTAS_BASE[i]["opciones"])))) for i in range(total)
+        ]
+        esperado = _fuerza_bruta(X, etiquetas, rec.construir_vector_usuario(respuestas))
+        orden = sorted(esperado.items(), key=lambda par: par[1])
+        resultados = rec.recomendar_carreras(respuestas, top=len(esperado))
+        np.testing.assert_allclose([r["distancia"] for r in resultados], [d for _, d in orden], rtol=0, atol=1e-6)
+        for r in resultados:
+            assert r["distancia"] == pytest.approx(esperado[r["carrera"]], abs=1e-6)
+
+
+def test_cache_de_matriz(v1, tmp_path: Path, monkeypatch):
+    ent = v1.entrenamiento
+    csv = tmp_path / "Datos_limpio.csv"
+    shutil.copy2(_V1 / "Datos_limpio.csv", csv)
+    cache = tmp_path / "cache"
+
+    hasheados = []
+    sha256 = ent._sha256
+    monkeypatch.setattr(ent, "_sha256", lambda p: hasheados.append(p) or sha256(p))
+    primera = ent.cargar_matriz_datos(csv, cache_dir=cache)
+    ent.cargar_matriz_datos(csv, cache_dir=cache)
+    assert len(hasheados) == 1
+
+    # Caché inválida: se rearma; el memmap anterior sigue legible
+    (destino,) = [d for d in cache.iterdir() if d.is_dir()]
+    (destino / "columnas.json").write_text("[]", encoding="utf-8")
+    esperado = np.array(primera.X)
+    nueva = ent.cargar_matriz_datos(csv, cache_dir=cache)
+    np.testing.assert_array_equal(nueva.X, esperado)
+    np.testing.assert_array_equal(primera.X, esperado)
+    assert [d.name for d in cache.iterdir() if d.is_dir()] == [destino.name]
+    assert len(hasheados) == 1
+
+
+def main() -> int:
+    return pytest.main([__file__, "-q"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
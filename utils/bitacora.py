@@ -0,0 +1,329 @@
+"""
+Bitácora binaria de solo-anexado, segura entre hilos y procesos.
+
+Cada registro es ``<longitud:u32><crc32:u32><payload>`` con payload
+``<ts:f64><n_features:u16><n_textos:u16>``, las features como float64
+contiguos y cada texto como ``<largo:u16><utf-8>``. Un registro cortado
+por una caída se detecta por longitud/CRC: el lector se detiene ahí y el
+primer escritor de cada proceso trunca esa cola antes de anexar.
+
+Escritura con *group commit*: el primer hilo que llega escribe (un solo
+``write`` + ``fsync``) todo lo encolado por los demás mientras tanto; la
+exclusión entre procesos usa ``fcntl.flock`` cuando está disponible.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo exclusión dentro del proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MARCO = struct.Struct("<II")
+_CABECERA = struct.Struct("<dHH")
+_LARGO_TEXTO = struct.Struct("<H")
+
+
+def codificar_registro(features: Sequence[float], textos: Sequence[str] = (), ts: float | None = None) -> bytes:
+    vector = np.asarray(features, dtype="<f8").reshape(-1)
+    partes = [
+        _CABECERA.pack(time.time() if ts is None else float(ts), vector.shape[0], len(textos)),
+        vector.tobytes(),
+    ]
+    for texto in textos:
+        crudo = str(texto).encode("utf-8")
+        partes.append(_LARGO_TEXTO.pack(len(crudo)))
+        partes.append(crudo)
+    payload = b"".join(partes)
+    return _MARCO.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+@dataclass(frozen=True)
+class LoteRegistros:
+    """Lote leído de la bitácora: ``X`` (n, features), ``ts`` (n,) y textos por registro."""
+
+    X: np.ndarray
+    ts: np.ndarray
+    textos: list[tuple[str, ...]]
+
+    def __len__(self) -> int:
+        return len(self.textos)
+
+
+def longitud_valida(datos: bytes) -> int:
+    """Bytes del prefijo de ``datos`` formado por registros completos y con CRC válido."""
+    pos = 0
+    while pos + _MARCO.size <= len(datos):
+        longitud, crc = _MARCO.unpack_from(datos, pos)
+        fin = pos + _MARCO.size + longitud
+        if fin > len(datos) or zlib.crc32(datos[pos + _MARCO.size:fin]) != crc:
+            break
+        pos = fin
+    return pos
+
+
+class _Grupo:
+    __slots__ = ("listo", "error")
+
+    def __init__(self) -> None:
+        self.listo = threading.Event()
+        self.error: BaseException | None = None
+
+
+class _Bloqueo:
+    """``flock`` exclusivo sobre el descriptor (no-op sin fcntl)."""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+def _abrir_bloqueado(path: Path) -> tuple[int, _Bloqueo]:
+    """
+    Abre ``path`` para anexar y toma el lock. Si el archivo fue renombrado
+    (reclamado) entre el open y el lock, reintenta con el archivo nuevo.
+    """
+    while True:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        bloqueo = _Bloqueo(fd)
+        bloqueo.__enter__()
+        try:
+            if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                return fd, bloqueo
+        except FileNotFoundError:
+            pass
+        bloqueo.__exit__(None, None, None)
+        os.close(fd)
+
+
+class Bitacora:
+    def __init__(self, path: str | os.PathLike, fsync: bool = True):
+        self.path = Path(path)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._pendientes: list[bytes] = []
+        self._grupo = _Grupo()
+        self._escribiendo = False
+        self._cola_revisada = False
+
+        self.grupos_escritos = 0
+        self.registros_escritos = 0
+
+    def agregar(self, features: Sequence[float], textos: Sequence[str] = (), ts: float | None = None) -> None:
+        self.agregar_bytes(codificar_registro(features, textos, ts))
+
+    def agregar_muchos(self, registros: Iterable[tuple[Sequence[float], Sequence[str]]]) -> None:
+        self.agregar_bytes(b"".join(codificar_registro(f, t) for f, t in registros))
+
+    def agregar_bytes(self, datos: bytes) -> None:
+        """Anexa registros ya codificados; retorna cuando están en disco."""
+        if not datos:
+            return
+        with self._lock:
+            self._pendientes.append(datos)
+            grupo = self._grupo
+            lider = not self._escribiendo
+            if lider:
+                self._escribiendo = True
+
+        if lider:
+            self._escribir_pendientes()
+
+        grupo.listo.wait()
+        if grupo.error is not None:
+            raise grupo.error
+
+    def _escribir_pendientes(self) -> None:
+        while True:
+            with self._lock:
+                if not self._pendientes:
+                    self._escribiendo = False
+                    return
+                datos = b"".join(self._pendientes)
+                n = len(self._pendientes)
+                self._pendientes = []
+                grupo, self._grupo = self._grupo, _Grupo()
+
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd, bloqueo = _abrir_bloqueado(self.path)
+                try:
+                    if not self._cola_revisada:
+                        self._truncar_cola(fd)
+                    os.write(fd, datos)
+                    if self.fsync:
+                        os.fsync(fd)
+                finally:
+                    bloqueo.__exit__(None, None, None)
+                    os.close(fd)
+                self.grupos_escritos += 1
+                self.registros_escritos += n
+            except BaseException as e:
+                grupo.error = e
+            grupo.listo.set()
+
+    def _truncar_cola(self, fd: int) -> None:
+        """Descarta un registro a medio escribir que haya dejado una caída."""
+        datos = self.path.read_bytes()
+        valida = longitud_valida(datos)
+        if valida < len(datos):
+            os.ftruncate(fd, valida)
+        self._cola_revisada = True
+
+    def reclamar(self, destino: str | os.PathLike) -> bool:
+        """
+        Renombra la bitácora a ``destino`` con el lock tomado, de modo que
+        ningún escritor quede a mitad de un registro. False si no existía.
+        """
+        if not self.path.exists():
+            return False
+        try:
+            fd, bloqueo = _abrir_bloqueado(self.path)
+        except OSError:
+            return False
+        try:
+            if os.fstat(fd).st_size == 0:
+                return False
+            os.replace(self.path, destino)
+            return True
+        finally:
+            bloqueo.__exit__(None, None, None)
+            os.close(fd)
+
+
+def migrar_jsonl(
+    legado: str | os.PathLike,
+    bitacora: Bitacora,
+    a_registro: Callable[[dict], tuple[Sequence[float], Sequence[str], float | None]],
+) -> int:
+    """
+    Pasa un archivo JSONL heredado a ``bitacora``; ``a_registro`` convierte
+    cada fila en (features, textos, ts). Las líneas ilegibles o incompletas se
+    omiten con un aviso. Si la lectura o la escritura fallan, el archivo vuelve
+    a su nombre para reintentar en el próximo arranque. Retorna los registros
+    migrados.
+    """
+    legado = Path(legado)
+    if not legado.exists():
+        return 0
+    tomado = legado.with_name(f"{legado.name}.{os.getpid()}.{time.time_ns()}.migrando")
+    try:
+        os.replace(legado, tomado)
+    except FileNotFoundError:
+        return 0
+
+    registros: list[bytes] = []
+    omitidas = 0
+    try:
+        with tomado.open("r", encoding="utf-8") as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                try:
+                    registros.append(codificar_registro(*a_registro(json.loads(linea))))
+                except (ValueError, KeyError, TypeError):
+                    omitidas += 1
+        bitacora.agregar_bytes(b"".join(registros))
+    except Exception:
+        logger.exception("No se pudo migrar %s; se reintenta en el próximo arranque", legado)
+        try:
+            os.replace(tomado, legado)
+        except OSError:
+            pass
+        return 0
+
+    if omitidas:
+        logger.warning("%s: %d líneas inválidas omitidas al migrar", legado.name, omitidas)
+    tomado.unlink()
+    return len(registros)
+
+
+def contar_registros(path: str | os.PathLike) -> int:
+    """Cantidad de registros completos y con CRC válido (los mismos que lee ``iterar_lotes``)."""
+    p = Path(path)
+    if not p.exists():
+        return 0
+    with p.open("rb") as f:
+        return sum(1 for _ in _payloads(f))
+
+
+def _payloads(f: BinaryIO) -> Iterator[bytes]:
+    """
+    Payloads de los registros completos y con CRC válido, leyendo el archivo
+    de a un registro. Se detiene en la primera cola cortada o corrupta.
+    """
+    while True:
+        marco = f.read(_MARCO.size)
+        if len(marco) < _MARCO.size:
+            return
+        longitud, crc = _MARCO.unpack(marco)
+        payload = f.read(longitud)
+        if len(payload) < longitud or zlib.crc32(payload) != crc:
+            return
+        yield payload
+
+
+def iterar_lotes(path: str | os.PathLike, tamano_lote: int = 1024) -> Iterator[LoteRegistros]:
+    """
+    Recorre la bitácora en lotes NumPy, leyendo el archivo de a un registro.
+    Un lote se corta también cuando cambia la cantidad de features. Se detiene
+    en el primer registro incompleto o con CRC inválido (cola de una escritura
+    interrumpida).
+    """
+    p = Path(path)
+    if not p.exists():
+        return
+
+    ts: list[float] = []
+    textos: list[tuple[str, ...]] = []
+    features = bytearray()
+    n_features = None
+
+    def _lote() -> LoteRegistros:
+        X = np.frombuffer(bytes(features), dtype="<f8").astype(float).reshape(len(ts), n_features or 0)
+        return LoteRegistros(X=X, ts=np.array(ts, dtype=float), textos=list(textos))
+
+    with p.open("rb") as f:
+        for payload in _payloads(f):
+            marca, n, n_textos = _CABECERA.unpack_from(payload, 0)
+            if ts and (n != n_features or len(ts) >= tamano_lote):
+                yield _lote()
+                ts, textos, features = [], [], bytearray()
+            n_features = n
+
+            cursor = _CABECERA.size
+            features += payload[cursor:cursor + 8 * n]
+            cursor += 8 * n
+            registro_textos = []
+            for _ in range(n_textos):
+                (largo,) = _LARGO_TEXTO.unpack_from(payload, cursor)
+                cursor += _LARGO_TEXTO.size
+                registro_textos.append(payload[cursor:cursor + largo].decode("utf-8"))
+                cursor += largo
+            ts.append(marca)
+            textos.append(tuple(registro_textos))
+
+    if ts:
+        yield _lote()
@@ -0,0 +1,103 @@
+"""
+Cola de escritura diferida (write-behind) para historial y buffer.
+
+El request encola la escritura y responde; un único hilo la ejecuta en
+orden de llegada. Si la cola está llena la escritura se hace en el hilo
+que llama (contrapresión en vez de perder datos). Al cerrar el proceso se
+vacía lo pendiente.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import threading
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+_FIN = object()
+
+
+class ColaEscritura:
+    def __init__(self, capacidad: int = 10_000, activa: bool = True):
+        self.activa = activa
+        self._cola: queue.Queue = queue.Queue(maxsize=capacidad)
+        self._hilo: threading.Thread | None = None
+        self._lock = threading.Lock()
+        # Los contadores los actualizan el hilo escritor y los que escriben directo
+        self._lock_contadores = threading.Lock()
+
+        self.encoladas = 0
+        self.escritas = 0
+        self.directas = 0
+        self.errores = 0
+        self.ultimo_error: str | None = None
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(target=self._trabajar, name="escritura-diferida", daemon=True)
+            self._hilo.start()
+            atexit.register(self.detener)
+
+    def enviar(self, funcion: Callable[..., Any], *args, **kwargs) -> None:
+        """Programa ``funcion(*args, **kwargs)``; no espera a que se escriba."""
+        if self.activa:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._iniciar()
+            try:
+                self._cola.put_nowait((funcion, args, kwargs))
+                with self._lock_contadores:
+                    self.encoladas += 1
+                return
+            except queue.Full:
+                pass
+        with self._lock_contadores:
+            self.directas += 1
+        self._ejecutar(funcion, args, kwargs)
+
+    def _ejecutar(self, funcion, args, kwargs) -> None:
+        try:
+            funcion(*args, **kwargs)
+            with self._lock_contadores:
+                self.escritas += 1
+        except Exception as e:
+            with self._lock_contadores:
+                self.errores += 1
+                self.ultimo_error = repr(e)
+            logger.exception("Error en escritura diferida")
+
+    def _trabajar(self) -> None:
+        while True:
+            tarea = self._cola.get()
+            try:
+                if tarea is _FIN:
+                    return
+                self._ejecutar(*tarea)
+            finally:
+                self._cola.task_done()
+
+    def vaciar(self) -> None:
+        """Bloquea hasta que todas las escrituras encoladas terminaron."""
+        self._cola.join()
+
+    def detener(self, timeout: float | None = None) -> None:
+        hilo = self._hilo
+        if hilo is None or not hilo.is_alive():
+            return
+        self._cola.put(_FIN)
+        hilo.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock_contadores:
+            return {
+                "activa": self.activa,
+                "pendientes": self._cola.qsize(),
+                "encoladas": self.encoladas,
+                "escritas": self.escritas,
+                "directas": self.directas,
+                "errores": self.errores,
+                "ultimo_error": self.ultimo_error,
+            }
@@ -0,0 +1,497 @@
+"""
+Almacén del historial de tests sobre SQLite en modo WAL.
+
+Cada test es una fila independiente: agregar un test es un único INSERT
+(O(1), sin reescribir el historial completo) y las lecturas se hacen por
+páginas usando el índice por id/fecha. Las features se guardan como bytes
+float64 contiguos en lugar de JSON indentado. La tabla ``tests_carreras``
+indexa las carreras recomendadas de cada test para filtrar sin decodificar
+el JSON de cada fila.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Sequence
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    fecha TEXT NOT NULL,
+    carreras TEXT NOT NULL,
+    compatibilidades TEXT NOT NULL,
+    features BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_tests_fecha ON tests(fecha);
+CREATE TABLE IF NOT EXISTS tests_carreras (
+    test_id INTEGER NOT NULL,
+    posicion INTEGER NOT NULL,
+    carrera TEXT NOT NULL,
+    PRIMARY KEY (test_id, posicion)
+);
+CREATE INDEX IF NOT EXISTS idx_tests_carreras_carrera ON tests_carreras(carrera, test_id);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+CREATE TABLE IF NOT EXISTS agregados_carrera (
+    orden INTEGER PRIMARY KEY,
+    carrera TEXT NOT NULL UNIQUE,
+    recomendaciones INTEGER NOT NULL DEFAULT 0,
+    suma_compatibilidad REAL NOT NULL DEFAULT 0
+);
+"""
+
+_AGREGADOS_VERSION = "1"
+_INDICE_CARRERAS_VERSION = "1"
+
+_COLUMNAS = "id, fecha, carreras, compatibilidades, features"
+
+
+def _features_a_blob(features: Sequence[float] | None) -> bytes | None:
+    if features is None:
+        return None
+    return array("d", (float(x) for x in features)).tobytes()
+
+
+def _blob_a_features(blob: bytes | None) -> list[float] | None:
+    if blob is None:
+        return None
+    valores = array("d")
+    valores.frombytes(blob)
+    return valores.tolist()
+
+
+def _json_compacto(valor: Any) -> str:
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":"))
+
+
+def _filtros_sql(desde: str | None, hasta: str | None, carrera: str | None) -> tuple[str, list]:
+    """
+    Cláusula WHERE para el rango de fechas (``desde``/``hasta`` inclusivos,
+    ``AAAA-MM-DD`` o ISO completo) y la carrera recomendada en cualquier posición.
+    """
+    condiciones: list[str] = []
+    params: list = []
+    if desde:
+        condiciones.append("fecha >= ?")
+        params.append(desde)
+    if hasta:
+        if len(hasta) == 10:
+            # Un día completo: todo lo que empieza con la fecha indicada
+            condiciones.append("fecha < ?")
+            params.append(hasta + "\uffff")
+        else:
+            condiciones.append("fecha <= ?")
+            params.append(hasta)
+    if carrera:
+        condiciones.append("id IN (SELECT test_id FROM tests_carreras WHERE carrera = ?)")
+        params.append(carrera)
+    return (" WHERE " + " AND ".join(condiciones)) if condiciones else "", params
+
+
+def _fila_a_test(fila: sqlite3.Row | tuple) -> dict:
+    _id, fecha, carreras, compatibilidades, features = fila
+    return {
+        "id": _id,
+        "fecha": fecha,
+        "carreras": json.loads(carreras),
+        "compatibilidades": json.loads(compatibilidades),
+        "features": _blob_a_features(features),
+    }
+
+
+class HistorialDB:
+    """
+    Historial persistente con append O(1) y lectura paginada.
+
+    Cada hilo (y cada proceso tras un fork) abre su propia conexión; SQLite
+    en modo WAL permite lectores concurrentes mientras un worker escribe.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._inicializada = False
+
+    # -------------------------
+    # Conexión
+    # -------------------------
+
+    def _conexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            return conn
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+
+        if not self._inicializada:
+            with self._init_lock:
+                if not self._inicializada:
+                    conn.executescript(_SCHEMA)
+                    self._inicializada = True
+                    version = conn.execute("SELECT valor FROM meta WHERE clave = 'agregados_version'").fetchone()
+                    if version is None or version[0] != _AGREGADOS_VERSION:
+                        self.reconstruir_agregados()
+                    version = conn.execute("SELECT valor FROM meta WHERE clave = 'indice_carreras_version'").fetchone()
+                    if version is None or version[0] != _INDICE_CARRERAS_VERSION:
+                        self.reconstruir_indice_carreras()
+        return conn
+
+    def cerrar(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -------------------------
+    # Escritura
+    # -------------------------
+
+    def agregar(
+        self,
+        carreras: list[str],
+        compatibilidades: list[int],
+        features: Sequence[float] | None = None,
+        fecha: str | None = None,
+    ) -> dict:
+        test = {
+            "fecha": fecha or datetime.now().isoformat(),
+            "carreras": list(carreras),
+            "compatibilidades": list(compatibilidades),
+            "features": [float(x) for x in features] if features is not None else None,
+        }
+        conn = self._conexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(
+                "INSERT INTO tests (fecha, carreras, compatibilidades, features) VALUES (?, ?, ?, ?)",
+                (
+                    test["fecha"],
+                    _json_compacto(test["carreras"]),
+                    _json_compacto(test["compatibilidades"]),
+                    _features_a_blob(test["features"]),
+                ),
+            )
+            test["id"] = cur.lastrowid
+            self._indexar_carreras(conn, [test])
+            self._sumar_agregados(conn, [test])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return test
+
+    def agregar_muchos(self, tests: list[dict]) -> int:
+        """Agrega varios tests en una sola transacción (importaciones y cargas masivas)."""
+        conn = self._conexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ultimo_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tests").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO tests (fecha, carreras, compatibilidades, features) VALUES (?, ?, ?, ?)",
+                (
+                    (
+                        t.get("fecha") or datetime.now().isoformat(),
+                        _json_compacto(t.get("carreras", [])),
+                        _json_compacto(t.get("compatibilidades", [])),
+                        _features_a_blob(t.get("features")),
+                    )
+                    for t in tests
+                ),
+            )
+            conn.execute(
+                "INSERT INTO tests_carreras (test_id, posicion, carrera) "
+                "SELECT tests.id, j.key, j.value FROM tests, json_each(tests.carreras) AS j WHERE tests.id > ?",
+                (ultimo_id,),
+            )
+            self._sumar_agregados(conn, tests)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(tests)
+
+    def reemplazar(self, historial: list[dict]) -> None:
+        """Reemplaza el historial completo (usado por limpiar e importaciones)."""
+        conn = self._conexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM tests")
+            conn.execute("DELETE FROM tests_carreras")
+            conn.executemany(
+                "INSERT INTO tests (fecha, carreras, compatibilidades, features) VALUES (?, ?, ?, ?)",
+                (
+                    (
+                        t.get("fecha") or datetime.now().isoformat(),
+                        _json_compacto(t.get("carreras", [])),
+                        _json_compacto(t.get("compatibilidades", [])),
+                        _features_a_blob(t.get("features")),
+                    )
+                    for t in historial
+                ),
+            )
+            conn.execute(
+                "INSERT INTO tests_carreras (test_id, posicion, carrera) "
+                "SELECT tests.id, j.key, j.value FROM tests, json_each(tests.carreras) AS j"
+            )
+            self._reiniciar_agregados(conn)
+            self._sumar_agregados(conn, historial)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def importar_json(self, json_path: str | os.PathLike) -> int:
+        """
+        Importa una sola vez un ``historial.json`` heredado.
+        Retorna la cantidad de tests importados (0 si ya se había hecho).
+        """
+        p = Path(json_path)
+        conn = self._conexion()
+        if conn.execute("SELECT 1 FROM meta WHERE clave = 'json_importado'").fetchone():
+            return 0
+        if not p.exists() or self.contar() > 0:
+            conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('json_importado', ?)", (str(p),))
+            return 0
+
+        historial = json.loads(p.read_text(encoding="utf-8"))
+        self.reemplazar(historial if isinstance(historial, list) else [])
+        conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('json_importado', ?)", (str(p),))
+        return self.contar()
+
+    # -------------------------
+    # Índice de carreras para filtros
+    # -------------------------
+
+    @staticmethod
+    def _indexar_carreras(conn: sqlite3.Connection, tests: list[dict]) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO tests_carreras (test_id, posicion, carrera) VALUES (?, ?, ?)",
+            ((t["id"], i, carrera) for t in tests for i, carrera in enumerate(t.get("carreras", []))),
+        )
+
+    def reconstruir_indice_carreras(self) -> int:
+        """Completa ``tests_carreras`` desde el JSON de cada test (bases creadas antes del índice)."""
+        conn = self._conexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM tests_carreras")
+            conn.execute(
+                "INSERT INTO tests_carreras (test_id, posicion, carrera) "
+                "SELECT tests.id, j.key, j.value FROM tests, json_each(tests.carreras) AS j"
+            )
+            total = int(conn.execute("SELECT COUNT(*) FROM tests_carreras").fetchone()[0])
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (clave, valor) VALUES ('indice_carreras_version', ?)",
+                (_INDICE_CARRERAS_VERSION,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return total
+
+    # -------------------------
+    # Agregados para estadísticas
+    # -------------------------
+
+    @staticmethod
+    def _sumar_agregados(conn: sqlite3.Connection, tests: list[dict]) -> None:
+        """Suma tests a los agregados; debe llamarse dentro de una transacción."""
+        filas: list[tuple[str, float]] = []
+        for t in tests:
+            carreras = t.get("carreras", [])
+            compatibilidades = t.get("compatibilidades", [])
+            for i, carrera in enumerate(carreras):
+                if i < len(compatibilidades):
+                    filas.append((carrera, compatibilidades[i]))
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO agregados_carrera (carrera) VALUES (?)",
+            ((carrera,) for carrera, _ in filas),
+        )
+        conn.executemany(
+            "UPDATE agregados_carrera SET recomendaciones = recomendaciones + 1, "
+            "suma_compatibilidad = suma_compatibilidad + ? WHERE carrera = ?",
+            ((compat, carrera) for carrera, compat in filas),
+        )
+        conn.execute(
+            "INSERT INTO meta (clave, valor) VALUES ('total_tests', ?) "
+            "ON CONFLICT(clave) DO UPDATE SET valor = CAST(valor AS INTEGER) + ?",
+            (len(tests), len(tests)),
+        )
+
+    @staticmethod
+    def _reiniciar_agregados(conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM agregados_carrera")
+        conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('total_tests', 0)")
+
+    def reconstruir_agregados(self) -> int:
+        """
+        Recalcula los agregados recorriendo todo el historial.
+        Solo para recuperación; el flujo normal los mantiene en cada append.
+        """
+        conn = self._conexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._reiniciar_agregados(conn)
+            total = 0
+            lote: list[dict] = []
+            for t in self.iterar():
+                lote.append(t)
+                if len(lote) >= 1000:
+                    self._sumar_agregados(conn, lote)
+                    total += len(lote)
+                    lote = []
+            self._sumar_agregados(conn, lote)
+            total += len(lote)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (clave, valor) VALUES ('agregados_version', ?)",
+                (_AGREGADOS_VERSION,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return total
+
+    def agregados(self) -> dict:
+        """
+        Agregados actuales: total de tests y, por carrera en orden de aparición,
+        (recomendaciones, suma de compatibilidad). Costo O(número de carreras).
+        """
+        conn = self._conexion()
+        fila = conn.execute("SELECT valor FROM meta WHERE clave = 'total_tests'").fetchone()
+        por_carrera = conn.execute(
+            "SELECT carrera, recomendaciones, suma_compatibilidad FROM agregados_carrera ORDER BY orden"
+        ).fetchall()
+        return {
+            "total_tests": int(fila[0]) if fila else 0,
+            "por_carrera": [(c, int(n), float(s)) for c, n, s in por_carrera],
+        }
+
+    # -------------------------
+    # Lectura
+    # -------------------------
+
+    def contar(self, desde: str | None = None, hasta: str | None = None, carrera: str | None = None) -> int:
+        """Tests que cumplen los filtros; sin filtros es el total de los agregados (sin ``COUNT(*)``)."""
+        if not (desde or hasta or carrera):
+            return self.agregados()["total_tests"]
+        where, params = _filtros_sql(desde, hasta, carrera)
+        return int(self._conexion().execute(f"SELECT COUNT(*) FROM tests{where}", params).fetchone()[0])
+
+    def pagina(
+        self,
+        pagina: int = 1,
+        por_pagina: int = 50,
+        recientes_primero: bool = True,
+        desde: str | None = None,
+        hasta: str | None = None,
+        carrera: str | None = None,
+    ) -> list[dict]:
+        """Retorna una página de tests (``pagina`` empieza en 1), con filtros opcionales."""
+        orden = "DESC" if recientes_primero else "ASC"
+        offset = max(0, pagina - 1) * por_pagina
+        where, params = _filtros_sql(desde, hasta, carrera)
+        filas = self._conexion().execute(
+            f"SELECT {_COLUMNAS} FROM tests{where} ORDER BY id {orden} LIMIT ? OFFSET ?",
+            (*params, por_pagina, offset),
+        ).fetchall()
+        return [_fila_a_test(f) for f in filas]
+
+    def pagina_keyset(
+        self,
+        por_pagina: int = 50,
+        antes_de: int | None = None,
+        despues_de: int | None = None,
+        desde: str | None = None,
+        hasta: str | None = None,
+        carrera: str | None = None,
+    ) -> list[dict]:
+        """
+        Hasta ``por_pagina`` tests, recientes primero, navegando por id en vez
+        de OFFSET: con ``antes_de`` los anteriores a ese id (página siguiente),
+        con ``despues_de`` los inmediatamente posteriores (página previa) y sin
+        ninguno los más recientes.
+        """
+        where, params = _filtros_sql(desde, hasta, carrera)
+        orden = "DESC"
+        if antes_de is not None:
+            where = (where + " AND" if where else " WHERE") + " id < ?"
+            params.append(antes_de)
+        elif despues_de is not None:
+            where = (where + " AND" if where else " WHERE") + " id > ?"
+            params.append(despues_de)
+            orden = "ASC"
+        filas = self._conexion().execute(
+            f"SELECT {_COLUMNAS} FROM tests{where} ORDER BY id {orden} LIMIT ?",
+            (*params, por_pagina),
+        ).fetchall()
+        if orden == "ASC":
+            filas.reverse()
+        return [_fila_a_test(f) for f in filas]
+
+    def iterar(
+        self,
+        tamano_lote: int = 1000,
+        desde: str | None = None,
+        hasta: str | None = None,
+        carrera: str | None = None,
+    ) -> Iterator[dict]:
+        """Recorre el historial (filtrado) en orden cronológico leyendo por lotes (keyset)."""
+        conn = self._conexion()
+        where, params = _filtros_sql(desde, hasta, carrera)
+        where = (where + " AND" if where else " WHERE") + " id > ?"
+        ultimo_id = 0
+        while True:
+            filas = conn.execute(
+                f"SELECT {_COLUMNAS} FROM tests{where} ORDER BY id ASC LIMIT ?",
+                (*params, ultimo_id, tamano_lote),
+            ).fetchall()
+            if not filas:
+                return
+            for f in filas:
+                yield _fila_a_test(f)
+            ultimo_id = filas[-1][0]
+
+    def todos(self) -> list[dict]:
+        return list(self.iterar())
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mantenimiento del historial de tests")
+    parser.add_argument("comando", choices=["reconstruir", "reindexar-carreras", "importar-json"])
+    parser.add_argument("--db", default="historial.db", help="Ruta de la base SQLite")
+    parser.add_argument("--json", default="historial.json", help="historial.json heredado a importar")
+    args = parser.parse_args(argv)
+
+    db = HistorialDB(args.db)
+    if args.comando == "reconstruir":
+        total = db.reconstruir_agregados()
+        print(f"Agregados reconstruidos a partir de {total} tests")
+    elif args.comando == "reindexar-carreras":
+        total = db.reconstruir_indice_carreras()
+        print(f"Carreras indexadas: {total}")
+    else:
+        total = db.importar_json(args.json)
+        print(f"Tests importados: {total}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
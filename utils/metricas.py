@@ -0,0 +1,167 @@
+"""
+Temporizadores por etapa con histogramas acumulados.
+
+``medir("etapa")`` cronometra un bloque y suma la duración al histograma de
+esa etapa (buckets fijos al estilo Prometheus). Si hay una traza activa en
+el contexto actual (``iniciar_traza``), la etapa también se anota ahí para
+registrarla al final del request. ``exportar_prometheus`` genera el formato
+de texto que sirve ``/metrics``.
+
+``CAREERMATE_METRICAS=0`` desactiva la medición (``medir`` no hace nada).
+"""
+from __future__ import annotations
+
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+METRICAS_ACTIVAS = os.getenv("CAREERMATE_METRICAS", "1") != "0"
+
+# Límites superiores en segundos (el último bucket es +Inf)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_TRAZA: contextvars.ContextVar[list | None] = contextvars.ContextVar("careermate_traza", default=None)
+
+
+class Histograma:
+    __slots__ = ("conteos", "suma", "cantidad", "_lock")
+
+    def __init__(self) -> None:
+        self.conteos = [0] * (len(BUCKETS) + 1)
+        self.suma = 0.0
+        self.cantidad = 0
+        self._lock = threading.Lock()
+
+    def observar(self, segundos: float) -> None:
+        i = bisect.bisect_left(BUCKETS, segundos)
+        with self._lock:
+            self.conteos[i] += 1
+            self.suma += segundos
+            self.cantidad += 1
+
+    def cuantil(self, q: float) -> float:
+        """Estimación del cuantil ``q`` interpolando dentro del bucket (como ``histogram_quantile``)."""
+        with self._lock:
+            conteos, total = list(self.conteos), self.cantidad
+        if total == 0:
+            return 0.0
+        objetivo = q * total
+        acumulado = 0
+        for i, n in enumerate(conteos):
+            if acumulado + n >= objetivo and n:
+                if i == len(BUCKETS):
+                    return BUCKETS[-1]
+                inferior = BUCKETS[i - 1] if i else 0.0
+                return inferior + (BUCKETS[i] - inferior) * (objetivo - acumulado) / n
+            acumulado += n
+        return BUCKETS[-1]
+
+
+class RegistroMetricas:
+    def __init__(self) -> None:
+        self._histogramas: dict[str, Histograma] = {}
+        self._contadores: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def histograma(self, etapa: str) -> Histograma:
+        h = self._histogramas.get(etapa)
+        if h is None:
+            with self._lock:
+                h = self._histogramas.setdefault(etapa, Histograma())
+        return h
+
+    def observar(self, etapa: str, segundos: float) -> None:
+        self.histograma(etapa).observar(segundos)
+        traza = _TRAZA.get()
+        if traza is not None:
+            traza.append((etapa, segundos))
+
+    def incrementar(self, nombre: str, n: float = 1) -> None:
+        with self._lock:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + n
+
+    @contextmanager
+    def medir(self, etapa: str) -> Iterator[None]:
+        if not METRICAS_ACTIVAS:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(etapa, time.perf_counter() - inicio)
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+
+    def resumen(self) -> dict:
+        """Por etapa: cantidad, total, promedio y p50/p95/p99 estimados (segundos)."""
+        return {
+            etapa: {
+                "cantidad": h.cantidad,
+                "total": h.suma,
+                "promedio": h.suma / h.cantidad if h.cantidad else 0.0,
+                "p50": h.cuantil(0.50),
+                "p95": h.cuantil(0.95),
+                "p99": h.cuantil(0.99),
+            }
+            for etapa, h in sorted(self._histogramas.items())
+        }
+
+    def exportar_prometheus(
+        self,
+        medidores: dict[str, float] | None = None,
+        contadores: dict[str, float] | None = None,
+    ) -> str:
+        """
+        Texto de exposición de Prometheus; ``medidores`` agrega gauges sueltos y
+        ``contadores`` valores acumulados llevados fuera del registro (``*_total``).
+        """
+        lineas = [
+            "# HELP careermate_etapa_segundos Duración de cada etapa del pipeline de recomendación.",
+            "# TYPE careermate_etapa_segundos histogram",
+        ]
+        for etapa, h in sorted(self._histogramas.items()):
+            with h._lock:
+                conteos, suma, cantidad = list(h.conteos), h.suma, h.cantidad
+            acumulado = 0
+            for limite, n in zip(BUCKETS, conteos):
+                acumulado += n
+                lineas.append(f'careermate_etapa_segundos_bucket{{etapa="{etapa}",le="{limite:g}"}} {acumulado}')
+            lineas.append(f'careermate_etapa_segundos_bucket{{etapa="{etapa}",le="+Inf"}} {cantidad}')
+            lineas.append(f'careermate_etapa_segundos_sum{{etapa="{etapa}"}} {suma:.9g}')
+            lineas.append(f'careermate_etapa_segundos_count{{etapa="{etapa}"}} {cantidad}')
+
+        for nombre, valor in sorted({**self._contadores, **(contadores or {})}.items()):
+            lineas.append(f"# TYPE careermate_{nombre} counter")
+            lineas.append(f"careermate_{nombre} {float(valor):g}")
+        for nombre, valor in sorted((medidores or {}).items()):
+            lineas.append(f"# TYPE careermate_{nombre} gauge")
+            lineas.append(f"careermate_{nombre} {float(valor):g}")
+        return "\n".join(lineas) + "\n"
+
+
+METRICAS = RegistroMetricas()
+
+
+def medir(etapa: str):
+    """Cronometra un bloque en el registro global: ``with medir("prediccion"): ...``."""
+    return METRICAS.medir(etapa)
+
+
+def iniciar_traza() -> contextvars.Token:
+    """Empieza a anotar las etapas del contexto actual (un request)."""
+    return _TRAZA.set([])
+
+
+def finalizar_traza(token: contextvars.Token) -> list[tuple[str, float]]:
+    """Termina la traza y retorna ``[(etapa, segundos), ...]`` en orden."""
+    traza = _TRAZA.get() or []
+    _TRAZA.reset(token)
+    return traza
@@ -1,19 +1,41 @@
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Sequence
+from typing import Any, Iterator, Sequence
+
+from utils.bitacora import Bitacora, LoteRegistros, iterar_lotes, migrar_jsonl
+from utils.metricas import medir
+from utils.historial_db import HistorialDB
 
 HISTORIAL_FILE = "historial.json"
+HISTORIAL_DB = "historial.db"
 ESTADISTICAS_FILE = "estadisticas.json"
-MUESTRAS_FILE = "muestras_entrenamiento.jsonl"
+# Bitácora binaria (utils.bitacora): features + textos (label, fuente)
+MUESTRAS_FILE = "muestras_entrenamiento.bin"
+# Formato anterior (una muestra JSON por línea); se migra una vez a la bitácora
+MUESTRAS_LEGADO = "muestras_entrenamiento.jsonl"
+
+_STORES: dict[str, HistorialDB] = {}
+_BITACORAS: dict[str, Bitacora] = {}
+
+
+def obtener_historial_db() -> HistorialDB:
+    """
+    Store del historial para la ruta configurada en ``HISTORIAL_DB``.
+    La primera vez importa el ``historial.json`` heredado si existe.
+    """
+    clave = str(Path(HISTORIAL_DB).resolve())
+    store = _STORES.get(clave)
+    if store is None:
+        store = HistorialDB(HISTORIAL_DB)
+        store.importar_json(HISTORIAL_FILE)
+        _STORES[clave] = store
+    return store
 
 
 def guardar_historial(historial: Any) -> bool:
     try:
-        Path(HISTORIAL_FILE).write_text(
-            json.dumps(historial, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        obtener_historial_db().reemplazar(list(historial or []))
         return True
     except Exception:
         return False
@@ -21,12 +43,69 @@ def guardar_historial(historial: Any) -> bool:
 
 def cargar_historial() -> list[dict]:
     try:
-        p = Path(HISTORIAL_FILE)
-        if p.exists():
-            return json.loads(p.read_text(encoding="utf-8"))
+        return obtener_historial_db().todos()
     except Exception:
-        pass
-    return []
+        return []
+
+
+def cargar_estadisticas_agregadas() -> dict:
+    """Estadísticas del dashboard desde los agregados incrementales del historial."""
+    from models.recomendador import construir_estadisticas
+
+    try:
+        agregados = obtener_historial_db().agregados()
+    except Exception:
+        agregados = {"total_tests": 0, "por_carrera": []}
+
+    conteos = {carrera: n for carrera, n, _ in agregados["por_carrera"]}
+    sumas = {carrera: s for carrera, _, s in agregados["por_carrera"]}
+    return construir_estadisticas(agregados["total_tests"], conteos, sumas)
+
+
+def cargar_historial_pagina(pagina: int = 1, por_pagina: int = 50, **filtros) -> list[dict]:
+    """Página del historial (recientes primero); ``filtros``: desde, hasta, carrera."""
+    try:
+        return obtener_historial_db().pagina(pagina, por_pagina, **filtros)
+    except Exception:
+        return []
+
+
+def cargar_historial_keyset(
+    por_pagina: int = 50,
+    antes_de: int | None = None,
+    despues_de: int | None = None,
+    **filtros,
+) -> list[dict]:
+    """Página del historial (recientes primero) navegando por id; ver ``HistorialDB.pagina_keyset``."""
+    try:
+        return obtener_historial_db().pagina_keyset(por_pagina, antes_de, despues_de, **filtros)
+    except Exception:
+        return []
+
+
+def contar_historial(**filtros) -> int:
+    try:
+        return obtener_historial_db().contar(**filtros)
+    except Exception:
+        return 0
+
+
+def iterar_historial(**filtros) -> Iterator[dict]:
+    """Recorre el historial filtrado en orden cronológico, por lotes."""
+    return obtener_historial_db().iterar(**filtros)
+
+
+def registrar_test(
+    carreras: list[str],
+    compatibilidades: list[int],
+    features: list[float] | None = None,
+) -> dict | None:
+    """Agrega un test al historial sin leer ni reescribir los anteriores."""
+    try:
+        with medir("historial_escritura"):
+            return obtener_historial_db().agregar(carreras, compatibilidades, features)
+    except Exception:
+        return None
 
 
 def agregar_al_historial(
@@ -35,35 +114,46 @@ def agregar_al_historial(
     compatibilidades: list[int],
     features: list[float] | None = None,
 ) -> list[dict]:
-    nuevo_test = {
-        "fecha": datetime.now().isoformat(),
-        "carreras": carreras,
-        "compatibilidades": compatibilidades,
-        "features": features,
-    }
-    historial.append(nuevo_test)
-    guardar_historial(historial)
+    nuevo_test = registrar_test(carreras, compatibilidades, features)
+    if nuevo_test is not None:
+        historial.append(nuevo_test)
     return historial
 
 
+def _bitacora_muestras() -> Bitacora:
+    clave = str(Path(MUESTRAS_FILE).resolve())
+    bitacora = _BITACORAS.get(clave)
+    if bitacora is None:
+        bitacora = _BITACORAS[clave] = Bitacora(MUESTRAS_FILE)
+        _migrar_muestras_legado(bitacora)
+    return bitacora
+
+
+def _fila_muestra_legado(fila: dict) -> tuple:
+    ts = datetime.fromisoformat(fila["ts"]).timestamp() if fila.get("ts") else None
+    return fila["features"], (str(fila.get("label", "")), str(fila.get("fuente", "auto"))), ts
+
+
+def _migrar_muestras_legado(bitacora: Bitacora) -> None:
+    """Pasa las muestras del ``muestras_entrenamiento.jsonl`` heredado a la bitácora (conserva ``ts``)."""
+    migrar_jsonl(MUESTRAS_LEGADO, bitacora, _fila_muestra_legado)
+
+
 def agregar_muestra_entrenamiento(features: Sequence[float], label: str, fuente: str = "auto") -> bool:
+    """Anexa la muestra; las escrituras concurrentes comparten un mismo fsync."""
     try:
-        row = {
-            "ts": datetime.now().isoformat(),
-            "label": str(label),
-            "fuente": str(fuente),
-            "features": [float(x) for x in features],
-        }
-        p = Path(MUESTRAS_FILE)
-        if not p.exists():
-            p.touch()
-        with p.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        _bitacora_muestras().agregar(features, (str(label), str(fuente)))
         return True
     except Exception:
         return False
 
 
+def iterar_muestras_entrenamiento(tamano_lote: int = 1024) -> Iterator[LoteRegistros]:
+    """Muestras guardadas en lotes NumPy (``X``, ``ts`` y ``textos`` = (label, fuente))."""
+    _bitacora_muestras()
+    return iterar_lotes(MUESTRAS_FILE, tamano_lote)
+
+
 def limpiar_historial():
     guardar_historial([])
     return []
@@ -0,0 +1,103 @@
+"""
+Benchmark del recomendador euclidiano de v1: recorrido por fuerza bruta
+(cargar CSV + euclidean_distances + bucle por carrera en cada consulta)
+contra el índice residente ``IndiceVecinos``.
+
+Uso:
+    python benchmark_vecinos.py
+    python benchmark_vecinos.py --csv ../CareerMap.csv --consultas 500
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import euclidean_distances
+
+from models.entrenamiento import FEATURE_COLUMNS, TARGET_COLUMN
+from models.recomendador import IndiceVecinos
+
+
+def _leer_csv(csv_path: Path) -> pd.DataFrame:
+    df = pd.read_csv(csv_path)
+    if TARGET_COLUMN not in df.columns and "Role" in df.columns:
+        df = df.rename(columns={"Role": TARGET_COLUMN})
+    return df
+
+
+def fuerza_bruta(csv_path: Path, vector: np.ndarray) -> dict:
+    """Ruta original: relee el CSV y recorre todas las filas en Python."""
+    df = _leer_csv(csv_path)
+    X = df[FEATURE_COLUMNS].values
+    y = df[TARGET_COLUMN].values
+    distancias = euclidean_distances(vector.reshape(1, -1), X)[0]
+
+    carrera_distancias = {}
+    for carrera, distancia in zip(y, distancias):
+        if carrera not in carrera_distancias or distancia < carrera_distancias[carrera]:
+            carrera_distancias[carrera] = distancia
+    return carrera_distancias
+
+
+def verificar_indice(indice: IndiceVecinos, csv_path: Path, consultas: np.ndarray, tolerancia: float = 1e-6) -> float:
+    """
+    Compara el índice con la fuerza bruta: mismas carreras en el mismo orden y
+    distancias dentro de ``tolerancia``. Lanza RuntimeError si difieren (no
+    ``assert``, para que ``python -O`` no saltee la verificación). Retorna la
+    diferencia máxima observada.
+    """
+    error = 0.0
+    for q in consultas:
+        esperado = fuerza_bruta(csv_path, q)
+        obtenido = dict(zip(indice.clases, indice.distancias_minimas(q)))
+        if list(esperado) != list(obtenido):
+            raise RuntimeError(f"El índice devuelve otras carreras u otro orden: {list(obtenido)} != {list(esperado)}")
+        error = max(error, max(abs(esperado[c] - obtenido[c]) for c in esperado))
+        if error > tolerancia:
+            raise RuntimeError(f"Distancia del índice fuera de tolerancia: {error:.2e} > {tolerancia:.0e}")
+    return error
+
+
+def _medir(fn, consultas: np.ndarray) -> float:
+    inicio = time.perf_counter()
+    for q in consultas:
+        fn(q)
+    return (time.perf_counter() - inicio) / len(consultas)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--csv", default=str(Path(__file__).resolve().parent / "Datos_limpio.csv"))
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    csv_path = Path(args.csv)
+    df = _leer_csv(csv_path)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=float)
+
+    rng = np.random.default_rng(args.seed)
+    consultas = rng.uniform(X.min(axis=0), X.max(axis=0), size=(args.consultas, X.shape[1]))
+
+    inicio = time.perf_counter()
+    indice = IndiceVecinos(X, df[TARGET_COLUMN].to_numpy())
+    construccion = time.perf_counter() - inicio
+
+    error = verificar_indice(indice, csv_path, consultas[: min(50, len(consultas))])
+
+    t_bruta = _medir(lambda q: fuerza_bruta(csv_path, q), consultas)
+    t_indice = _medir(indice.distancias_minimas, consultas)
+
+    print(f"Dataset: {csv_path.name} ({len(X)} filas, {len(indice.clases)} carreras)")
+    print(f"Construcción del índice: {construccion * 1e3:.2f} ms")
+    print(f"Fuerza bruta:  {t_bruta * 1e3:8.3f} ms/consulta")
+    print(f"Índice:        {t_indice * 1e3:8.3f} ms/consulta  ({t_bruta / t_indice:.0f}x)")
+    print(f"Diferencia máxima de distancia: {error:.2e}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
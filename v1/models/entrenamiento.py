@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import shutil
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Columnas esperadas en el CSV (mismo orden que se usará en el vector de features)
 FEATURE_COLUMNS = [
@@ -44,6 +52,8 @@ def _get_base_dir() -> Path:
 
 
 def cargar_datos(csv_path: str | os.PathLike | None = None) -> pd.DataFrame:
+    import pandas as pd
+
     base_dir = _get_base_dir()
     if csv_path is None:
         csv_path = base_dir / "Datos_limpio.csv"
@@ -57,3 +67,104 @@ def cargar_datos(csv_path: str | os.PathLike | None = None) -> pd.DataFrame:
     if missing_cols:
         raise ValueError(f"Faltan columnas en el CSV: {missing_cols}")
     return df
+
+
+@dataclass(frozen=True)
+class DatasetMatriz:
+    """Dataset como arrays: X (N x features), y (índice de clase) y tabla de clases."""
+
+    X: np.ndarray
+    y: np.ndarray
+    classes: np.ndarray
+
+    def etiquetas(self) -> np.ndarray:
+        return self.classes[self.y]
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _sha256_csv(csv_path: Path, cache_dir: Path) -> str:
+    """
+    sha256 del CSV; solo se recalcula si tamaño o mtime difieren de la huella
+    guardada en ``cache_dir/huellas.json``.
+    """
+    indice = cache_dir / "huellas.json"
+    clave = str(csv_path.resolve())
+    try:
+        huellas = json.loads(indice.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        huellas = {}
+
+    st = csv_path.stat()
+    guardada = huellas.get(clave) or {}
+    if guardada.get("sha256") and guardada.get("size") == st.st_size and guardada.get("mtime_ns") == st.st_mtime_ns:
+        return guardada["sha256"]
+
+    huellas[clave] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _sha256(csv_path)}
+    tmp = indice.with_name(f"{indice.name}.{os.getpid()}.tmp")
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(huellas, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, indice)
+    except OSError:
+        # Caché de solo lectura: se recalcula el hash en cada carga
+        pass
+    return huellas[clave]["sha256"]
+
+
+def cargar_matriz_datos(
+    csv_path: str | os.PathLike | None = None,
+    cache_dir: str | os.PathLike | None = None,
+    mmap: bool = True,
+) -> DatasetMatriz:
+    """
+    Carga el dataset desde una caché binaria (.npy) identificada por el sha256
+    del CSV (recalculado solo si cambian tamaño o mtime). Solo la primera vez
+    se parsea el CSV con pandas; la caché se arma aparte y se publica con un
+    rename, sin borrar antes archivos que otro proceso pueda tener mapeados.
+    """
+    csv_path = Path(csv_path) if csv_path is not None else _get_base_dir() / "Datos_limpio.csv"
+    if not csv_path.exists():
+        raise FileNotFoundError(f"No se encontró el dataset CSV en: {csv_path}")
+
+    base = Path(cache_dir) if cache_dir is not None else Path(__file__).resolve().parent / "artifacts" / "dataset_cache"
+    destino = base / _sha256_csv(csv_path, base)[:16]
+
+    columnas = destino / "columnas.json"
+    if not (columnas.exists() and json.loads(columnas.read_text(encoding="utf-8")) == FEATURE_COLUMNS):
+        df = cargar_datos(csv_path)
+        classes, y = np.unique(df[TARGET_COLUMN].astype(str).to_numpy(), return_inverse=True)
+
+        tmp = base / f"{destino.name}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "X.npy", np.ascontiguousarray(df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)))
+        np.save(tmp / "y.npy", y.astype(np.int32))
+        np.save(tmp / "classes.npy", classes.astype(str))
+        (tmp / "columnas.json").write_text(json.dumps(FEATURE_COLUMNS, ensure_ascii=False), encoding="utf-8")
+        # Una caché vieja se aparta con un rename (los mapeos abiertos siguen
+        # siendo válidos) y recién después se publica la nueva
+        viejo = base / f"{destino.name}.{os.getpid()}.viejo"
+        try:
+            os.replace(destino, viejo)
+        except OSError:
+            pass
+        try:
+            os.replace(tmp, destino)
+        except OSError:
+            # Otro proceso publicó la misma caché primero
+            shutil.rmtree(tmp, ignore_errors=True)
+        shutil.rmtree(viejo, ignore_errors=True)
+
+    modo = "r" if mmap else None
+    return DatasetMatriz(
+        X=np.load(destino / "X.npy", mmap_mode=modo),
+        y=np.load(destino / "y.npy", mmap_mode=modo),
+        classes=np.load(destino / "classes.npy"),
+    )
@@ -7,6 +7,58 @@ import numpy as np
 from models.carreras import CARRERAS_OBJETIVO
 from models.entrenamiento import FEATURE_COLUMNS
 
+_INDICE_VECINOS: "IndiceVecinos | None" = None
+
+
+class IndiceVecinos:
+    """Índice residente para la distancia mínima de un vector a cada carrera.
+
+    Las filas del dataset se agrupan por carrera en una sola matriz contigua
+    (carreras en orden de primera aparición, como el recorrido original) con
+    sus normas al cuadrado precalculadas, de modo que una consulta es un
+    producto matriz-vector más un ``np.minimum.reduceat`` sobre los tramos de
+    cada carrera.
+    """
+
+    def __init__(self, X: np.ndarray, etiquetas) -> None:
+        etiquetas = np.asarray(etiquetas).astype(str)
+        clases, primera, inversa = np.unique(etiquetas, return_index=True, return_inverse=True)
+
+        # Reordenar clases por primera aparición en el dataset
+        orden_clases = np.argsort(primera, kind="stable")
+        rango = np.empty_like(orden_clases)
+        rango[orden_clases] = np.arange(len(orden_clases))
+        codigo = rango[inversa.reshape(-1)]
+
+        orden_filas = np.argsort(codigo, kind="stable")
+        self.clases: List[str] = clases[orden_clases].tolist()
+        self.X = np.ascontiguousarray(np.asarray(X, dtype=float)[orden_filas])
+        self.normas = np.einsum("ij,ij->i", self.X, self.X)
+        conteos = np.bincount(codigo, minlength=len(self.clases))
+        self.inicios = np.concatenate(([0], np.cumsum(conteos)[:-1]))
+
+    def distancias_minimas(self, vector: np.ndarray) -> np.ndarray:
+        """Distancia euclidiana mínima de ``vector`` a cada carrera (orden ``clases``)."""
+        q = np.asarray(vector, dtype=float).reshape(-1)
+        # ||x - q||² = ||x||² - 2·x·q + ||q||²
+        d2 = self.X @ q
+        d2 *= -2.0
+        d2 += self.normas
+        d2 += q @ q
+        minimos = np.minimum.reduceat(d2, self.inicios)
+        return np.sqrt(np.maximum(minimos, 0.0, out=minimos), out=minimos)
+
+
+def obtener_indice_vecinos() -> IndiceVecinos:
+    """Construye el índice la primera vez y lo mantiene en memoria."""
+    global _INDICE_VECINOS
+    if _INDICE_VECINOS is None:
+        from models.entrenamiento import cargar_matriz_datos
+
+        datos = cargar_matriz_datos()
+        _INDICE_VECINOS = IndiceVecinos(datos.X, datos.etiquetas())
+    return _INDICE_VECINOS
+
 
 def construir_vector_usuario(respuestas: List[Tuple[int, int]]) -> np.ndarray:
     """Construye el vector de 27 features a partir de las respuestas.
@@ -66,8 +118,6 @@ def construir_vector_usuario(respuestas: List[Tuple[int, int]]) -> np.ndarray:
 def recomendar_carreras(respuestas: List[Tuple[int, int]], top: int = 1):
     """Recomienda la carrera más cercana por distancia euclidiana."""
     from models.carreras import DESCRIPCIONES, obtener_imagen_carrera
-    from models.entrenamiento import cargar_datos, TARGET_COLUMN
-    from sklearn.metrics.pairwise import euclidean_distances
 
     if not respuestas:
         return []
@@ -75,21 +125,9 @@ def recomendar_carreras(respuestas: List[Tuple[int, int]], top: int = 1):
     # Construir vector del usuario
     vector_usuario = construir_vector_usuario(respuestas)
     
-    # Cargar datos de entrenamiento
-    df = cargar_datos()
-    
-    # Obtener vectores de cada carrera
-    X = df[FEATURE_COLUMNS].values
-    y = df[TARGET_COLUMN].values
-    
-    # Calcular distancias euclidianas
-    distancias = euclidean_distances(vector_usuario, X)[0]
-    
-    # Crear mapeo de carrera a mejor distancia (puede haber duplicados en dataset)
-    carrera_distancias = {}
-    for carrera, distancia in zip(y, distancias):
-        if carrera not in carrera_distancias or distancia < carrera_distancias[carrera]:
-            carrera_distancias[carrera] = distancia
+    # Mejor distancia por carrera (puede haber duplicados en dataset) desde el índice residente
+    indice = obtener_indice_vecinos()
+    carrera_distancias = dict(zip(indice.clases, indice.distancias_minimas(vector_usuario).tolist()))
     
     # Convertir distancias a "compatibilidad" (0-100%)
     # Distancia 0 = 100%, distancia alta = 0%